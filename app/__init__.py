@@ -5,11 +5,18 @@ from flask import Flask, g, session
 from app.config import Config
 from app.extensions import db, migrate
 from app.models import User
+from app.services.blob_store import media_store
+from app.services.budget import budget_meter
+from app.services.http_client import x_http
+from app.services.jobs import job_queue
+from app.services.log_writer import api_log_writer
+from app.services.payload_store import payload_store
 from app.utils.encrypt_decrypt import load_env_vars_to_db
 from app.blueprints.auth.routes import bp as auth_bp
 from app.blueprints.home.routes import bp as home_bp
 from app.blueprints.items.routes import bp as items_bp
 from app.blueprints.x_api.routes import bp as x_api_bp
+from app.blueprints.x_api.spaces_poller import spaces_poller
 
 
 def create_app():
@@ -19,6 +26,13 @@ def create_app():
 
     db.init_app(app)
     migrate.init_app(app, db)
+    x_http.init_app(app)
+    api_log_writer.init_app(app)
+    payload_store.init_app(app)
+    media_store.init_app(app)
+    job_queue.init_app(app)
+    budget_meter.init_app(app)
+    spaces_poller.init_app(app)
 
     with app.app_context():
         load_env_vars_to_db()
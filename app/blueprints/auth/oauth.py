@@ -4,9 +4,10 @@ import secrets
 from datetime import datetime, timedelta
 from urllib.parse import urlencode
 
-import requests
 from flask import current_app
 
+from app.services.http_client import x_http
+
 
 def generate_pkce_pair():
     verifier = secrets.token_urlsafe(64)
@@ -47,7 +48,7 @@ def exchange_code_for_token(code, code_verifier, redirect_uri):
     if client_secret:
         basic = base64.b64encode(f"{client_id}:{client_secret}".encode("utf-8")).decode("utf-8")
         headers["Authorization"] = f"Basic {basic}"
-    response = requests.post(
+    response = x_http.post(
         "https://api.x.com/2/oauth2/token",
         data={
             "code": code,
@@ -72,7 +73,7 @@ def refresh_tokens(refresh_token):
     if client_secret:
         basic = base64.b64encode(f"{client_id}:{client_secret}".encode("utf-8")).decode("utf-8")
         headers["Authorization"] = f"Basic {basic}"
-    response = requests.post(
+    response = x_http.post(
         "https://api.x.com/2/oauth2/token",
         data={
             "grant_type": "refresh_token",
@@ -89,7 +90,7 @@ def refresh_tokens(refresh_token):
 
 
 def fetch_profile(access_token):
-    response = requests.get(
+    response = x_http.get(
         "https://api.x.com/2/users/me",
         headers={"Authorization": f"Bearer {access_token}"},
         params={"user.fields": "id,name,username,profile_image_url,created_at"},
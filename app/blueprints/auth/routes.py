@@ -5,6 +5,7 @@ from flask import Blueprint, current_app, flash, redirect, render_template, requ
 from app.blueprints.auth import oauth
 from app.blueprints.auth.decorators import login_required
 from app.blueprints.auth.oauth_flow import handle_callback
+from app.blueprints.auth.token_helpers import token_cache
 from app.extensions import db
 from app.models import User, UserLinkedAccount, UserOAuthToken
 
@@ -111,6 +112,7 @@ def disconnect_account(account_id):
     UserOAuthToken.query.filter_by(
         owner_user_id=session["user_id"], x_user_id=linked.x_user_id
     ).delete()
+    token_cache.invalidate(session["user_id"])
     db.session.delete(linked)
     db.session.commit()
     if session.get("active_x_user_id") == linked.x_user_id:
@@ -147,6 +149,7 @@ def revoke_token(account_id):
     UserOAuthToken.query.filter_by(
         owner_user_id=session["user_id"], x_user_id=linked.x_user_id
     ).delete()
+    token_cache.invalidate(session["user_id"])
     db.session.commit()
     flash("Token revoked.", "info")
     return redirect(url_for("home.index"))
@@ -1,12 +1,19 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
 from datetime import datetime
 
-from flask import session
+from flask import current_app, g, has_app_context, has_request_context, session
 
 from app.blueprints.auth import oauth
 from app.extensions import db
 from app.models import UserOAuthToken
 from app.utils.encrypt_decrypt import decrypt_value, encrypt_value
 
+logger = logging.getLogger(__name__)
+
 
 def _is_expired(expires_at):
     if not expires_at:
@@ -14,6 +21,153 @@ def _is_expired(expires_at):
     return datetime.utcnow() >= expires_at
 
 
+@dataclass
+class CachedToken:
+    owner_user_id: int
+    x_user_id: str
+    access_token: str
+    refresh_token: str | None
+    expires_at: datetime | None
+    loaded_at: float
+
+    def as_dict(self):
+        return {
+            "access_token": self.access_token,
+            "refresh_token": self.refresh_token,
+            "x_user_id": self.x_user_id,
+        }
+
+
+def _load_token_row(owner_user_id, x_user_id=None):
+    # populate_existing so a row refreshed by another process is not served from the identity map.
+    query = db.select(UserOAuthToken).filter_by(owner_user_id=owner_user_id).execution_options(populate_existing=True)
+    token = None
+    if x_user_id:
+        token = db.session.execute(query.filter_by(x_user_id=x_user_id)).scalars().first()
+    if not token:
+        token = db.session.execute(query).scalars().first()
+    return token
+
+
+class TokenCache:
+    """Decrypted OAuth tokens per (owner, active X account).
+
+    Tokens close to ``expires_at`` are refreshed on a background thread.
+    Refreshes hold a per-account lock and re-read the row first, so concurrent
+    callers (or another process that already rotated the refresh token) never
+    trigger a second ``oauth.refresh_tokens`` call.
+    """
+
+    def __init__(self) -> None:
+        self._entries: dict[tuple, CachedToken] = {}
+        self._locks: dict[tuple, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def _config(self, name, default):
+        return float(current_app.config.get(name, default)) if has_app_context() else default
+
+    def _account_lock(self, owner_user_id, x_user_id):
+        with self._lock:
+            return self._locks.setdefault((owner_user_id, x_user_id), threading.Lock())
+
+    def _load(self, key):
+        token = _load_token_row(*key)
+        if not token:
+            return None
+        entry = CachedToken(
+            owner_user_id=token.owner_user_id,
+            x_user_id=token.x_user_id,
+            access_token=decrypt_value(token.access_token),
+            refresh_token=decrypt_value(token.refresh_token),
+            expires_at=token.expires_at,
+            loaded_at=time.monotonic(),
+        )
+        with self._lock:
+            self._entries[key] = entry
+        return entry
+
+    def get(self, owner_user_id, x_user_id=None):
+        key = (owner_user_id, x_user_id)
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None or time.monotonic() - entry.loaded_at > self._config("X_TOKEN_CACHE_TTL", 300):
+            entry = self._load(key)
+            if entry is None:
+                return None
+        if entry.refresh_token and entry.expires_at:
+            remaining = (entry.expires_at - datetime.utcnow()).total_seconds()
+            if remaining <= 0:
+                entry = self.refresh(entry) or entry
+            elif remaining < self._config("X_TOKEN_REFRESH_AHEAD", 300):
+                self._refresh_in_background(entry)
+        return entry.as_dict()
+
+    def refresh(self, stale):
+        """Replace ``stale`` with a fresh token; returns None if it cannot be refreshed."""
+        with self._account_lock(stale.owner_user_id, stale.x_user_id):
+            return self._refresh_locked(stale)
+
+    def _refresh_locked(self, stale):
+        # Someone else may have refreshed while we waited for the lock.
+        current = self._load((stale.owner_user_id, stale.x_user_id))
+        if current is not None and current.access_token != stale.access_token:
+            return current
+        refresh_token = (current or stale).refresh_token
+        if not refresh_token:
+            return None
+        refreshed = oauth.refresh_tokens(refresh_token)
+        if "access_token" not in refreshed:
+            logger.warning("Token refresh for X user %s failed: %s", stale.x_user_id, refreshed.get("error"))
+            return None
+        store_tokens(stale.owner_user_id, stale.x_user_id, refreshed)
+        return self._load((stale.owner_user_id, stale.x_user_id))
+
+    def _refresh_in_background(self, stale):
+        lock = self._account_lock(stale.owner_user_id, stale.x_user_id)
+        if not lock.acquire(blocking=False):
+            return  # a refresh for this account is already running
+        app = current_app._get_current_object()
+
+        def run():
+            try:
+                with app.app_context():
+                    try:
+                        self._refresh_locked(stale)
+                    except Exception:
+                        logger.exception("Background token refresh for X user %s failed.", stale.x_user_id)
+                    finally:
+                        db.session.remove()
+            finally:
+                lock.release()
+
+        threading.Thread(target=run, name=f"token-refresh-{stale.x_user_id}", daemon=True).start()
+
+    def store(self, owner_user_id, x_user_id, access_token, refresh_token, expires_at):
+        """Point every cached key for this account at newly stored tokens."""
+        with self._lock:
+            for key, entry in list(self._entries.items()):
+                if entry.owner_user_id == owner_user_id and entry.x_user_id == x_user_id:
+                    self._entries[key] = CachedToken(
+                        owner_user_id=owner_user_id,
+                        x_user_id=x_user_id,
+                        access_token=access_token,
+                        refresh_token=refresh_token or entry.refresh_token,
+                        expires_at=expires_at,
+                        loaded_at=time.monotonic(),
+                    )
+
+    def invalidate(self, owner_user_id=None):
+        with self._lock:
+            if owner_user_id is None:
+                self._entries.clear()
+                return
+            for key in [key for key in self._entries if key[0] == owner_user_id]:
+                del self._entries[key]
+
+
+token_cache = TokenCache()
+
+
 def store_tokens(owner_user_id, x_user_id, token_data):
     access_token = token_data.get("access_token")
     refresh_token = token_data.get("refresh_token")
@@ -33,38 +187,36 @@ def store_tokens(owner_user_id, x_user_id, token_data):
     if scope:
         record.scope = scope
     db.session.commit()
+    token_cache.store(owner_user_id, x_user_id, access_token, refresh_token, expires_at)
     return record
 
 
+def get_current_identity():
+    """Return (owner_user_id, active_x_user_id) for the current request or background task."""
+    identity = g.get("x_identity") if has_app_context() else None
+    if identity:
+        return identity
+    if has_request_context():
+        return session.get("user_id"), session.get("active_x_user_id")
+    return None, None
+
+
+@contextmanager
+def acting_as(owner_user_id, x_user_id=None):
+    """Run X API helpers outside a request on behalf of a local user."""
+    previous = g.get("x_identity")
+    g.x_identity = (owner_user_id, x_user_id)
+    try:
+        yield
+    finally:
+        g.x_identity = previous
+
+
 def get_current_user_token():
-    owner_user_id = session.get("user_id")
+    owner_user_id, active_x_user_id = get_current_identity()
     if not owner_user_id:
         return None
-    active_x_user_id = session.get("active_x_user_id")
-    token = None
-    if active_x_user_id:
-        token = UserOAuthToken.query.filter_by(
-            owner_user_id=owner_user_id, x_user_id=active_x_user_id
-        ).first()
-    if not token:
-        token = UserOAuthToken.query.filter_by(owner_user_id=owner_user_id).first()
-    if not token:
-        return None
-
-    access_token = decrypt_value(token.access_token)
-    refresh_token = decrypt_value(token.refresh_token)
-
-    if refresh_token and _is_expired(token.expires_at):
-        refreshed = oauth.refresh_tokens(refresh_token)
-        if "access_token" in refreshed:
-            token = store_tokens(owner_user_id, token.x_user_id, refreshed)
-            access_token = decrypt_value(token.access_token)
-            refresh_token = decrypt_value(token.refresh_token)
-    return {
-        "access_token": access_token,
-        "refresh_token": refresh_token,
-        "x_user_id": token.x_user_id,
-    }
+    return token_cache.get(owner_user_id, active_x_user_id)
 
 
 def call_x_api_with_refresh(request_func, url, **kwargs):
@@ -78,14 +230,24 @@ def call_x_api_with_refresh(request_func, url, **kwargs):
     if response.status_code != 401:
         return response
 
-    refresh_token = token_info.get("refresh_token")
-    if not refresh_token:
-        return response
-
-    refreshed = oauth.refresh_tokens(refresh_token)
-    if "access_token" not in refreshed:
+    refreshed = refresh_user_token(token_info)
+    if not refreshed:
         return response
 
-    store_tokens(session["user_id"], token_info["x_user_id"], refreshed)
     headers["Authorization"] = f"Bearer {refreshed['access_token']}"
     return request_func(url, headers=headers, **kwargs)
+
+
+def refresh_user_token(token_info):
+    """Refresh a token returned by get_current_user_token after X rejected it."""
+    owner_user_id, _ = get_current_identity()
+    stale = CachedToken(
+        owner_user_id=owner_user_id,
+        x_user_id=token_info["x_user_id"],
+        access_token=token_info["access_token"],
+        refresh_token=token_info.get("refresh_token"),
+        expires_at=None,
+        loaded_at=time.monotonic(),
+    )
+    refreshed = token_cache.refresh(stale)
+    return refreshed.as_dict() if refreshed else None
@@ -1,6 +1,9 @@
+from datetime import datetime, timedelta
+
 import click
 from flask.cli import AppGroup
 
+from app.blueprints.auth.token_helpers import acting_as
 from app.blueprints.x_api.helpers import (
     get_my_x_user,
     get_x_user_by_id,
@@ -8,7 +11,22 @@ from app.blueprints.x_api.helpers import (
     get_x_users_by_ids,
     get_x_users_by_usernames,
     get_x_users_search,
+    search_local_posts,
+    search_x_posts_recent,
 )
+from app.blueprints.x_api.media_upload import MediaUploadEngine
+from app.blueprints.x_api.pagination import XPaginator
+from app.blueprints.x_api.post_metrics import post_metric_series, post_metric_velocity
+from app.blueprints.x_api.spaces_poller import is_space_id, spaces_poller
+from app.blueprints.x_api.threads import build_thread
+from app.blueprints.x_api.trend_collector import parse_woeids, run_collector
+from app.blueprints.x_api.trend_timeline import trend_movers
+from app.blueprints.x_api.user_metrics import downsample_user_metrics, local_user_ids, user_growth
+from app.extensions import db
+from app.models import XMediaUpload
+from app.services.blob_store import media_store
+from app.services.jobs import job_queue
+from app.services.post_search import post_search_index
 
 # Create a command group for X API tasks
 x_api_cli = AppGroup('x-api', help='X API management commands.')
@@ -63,3 +81,227 @@ def search_users_cmd(query, max_results, next_token):
     click.echo(f"Searching X users for: {query}")
     get_x_users_search(query, max_results=max_results, next_token=next_token)
 
+
+
+@x_api_cli.command('crawl-recent-search')
+@click.argument('query')
+@click.option('--max-results', default=100, type=int)
+@click.option('--max-pages', default=None, type=int)
+@click.option('--max-items', default=None, type=int)
+@click.option('--since-id', default=None)
+@click.option('--cursor', default=None, help='Resume from a cursor printed by a previous run.')
+def crawl_recent_search_cmd(query, max_results, max_pages, max_items, since_id, cursor):
+    """Page through recent search results, storing each page as it arrives."""
+    click.echo(f"Crawling recent search for: {query}")
+    paginator = XPaginator(
+        search_x_posts_recent,
+        query,
+        max_results=max_results,
+        max_pages=max_pages,
+        max_items=max_items,
+        since_id=since_id,
+        cursor=cursor,
+    )
+    for page in paginator.pages():
+        click.echo(f"Page {paginator.pages_fetched}: {len(page['data'])} posts")
+    click.echo(f"Fetched {paginator.items_yielded} posts over {paginator.pages_fetched} pages.")
+    if paginator.error:
+        click.echo(f"Stopped on error: {paginator.error}")
+    if paginator.cursor:
+        click.echo(f"Resume with --cursor {paginator.cursor}")
+
+
+@x_api_cli.command('search-local-posts')
+@click.argument('query')
+@click.option('--page', default=1, type=int)
+@click.option('--per-page', default=20, type=int)
+@click.option('--sort', type=click.Choice(['relevance', 'recent']), default='relevance')
+def search_local_posts_cmd(query, page, per_page, sort):
+    """Search stored posts (text, author, annotation entities) without calling X."""
+    found = search_local_posts(query, page=page, per_page=per_page, sort=sort)
+    for post in found["results"]:
+        text = " ".join(post["text"].split())
+        click.echo(f"{post['id']}  @{post['username'] or post['author_id']}  {post['created_at'] or ''}  {text[:120]}")
+    click.echo(f"Page {found['page']}/{found['pages']} of {found['total']} matches.")
+
+
+@x_api_cli.command('rebuild-post-search')
+@click.option('--batch-size', default=1000, type=int, help='Posts indexed per commit.')
+def rebuild_post_search_cmd(batch_size):
+    """Re-index every stored post for local search."""
+    if post_search_index.dialect() is None:
+        raise click.ClickException("Local post search needs SQLite FTS5 or PostgreSQL; run flask db upgrade first.")
+    click.echo(f"Indexed {post_search_index.rebuild(batch_size=batch_size)} posts.")
+
+
+@x_api_cli.command('thread')
+@click.argument('post_id', type=int)
+@click.option('--no-fetch', is_flag=True, help='Only show stored posts; do not fetch missing ancestors.')
+@click.option('--fetch-replies', is_flag=True, help='Pull recent replies with a conversation_id: search first.')
+def thread_cmd(post_id, no_fetch, fetch_replies):
+    """Print the conversation containing a post as an indented tree."""
+    thread = build_thread(post_id, nested=False, fetch_missing=not no_fetch, fetch_replies=fetch_replies)
+    for post in thread["posts"]:
+        marker = "... " if post["missing_parent"] else ""
+        text = " ".join(post["text"].split())
+        click.echo(f"{'  ' * post['depth']}{marker}{post['id']} @{post['username'] or post['author_id']}: {text[:100]}")
+    click.echo(f"{thread['size']} posts, depth {thread['max_depth']}, {thread['fetched']} fetched from X.")
+    if thread["missing_ancestors"]:
+        click.echo(f"Still missing: {', '.join(thread['missing_ancestors'])}")
+
+
+@x_api_cli.command('post-metrics')
+@click.argument('post_id', type=int)
+@click.option('--bucket', type=click.Choice(['hour', 'day']), default='hour')
+@click.option('--hours', default=24 * 7, type=float, help='How far back to look.')
+def post_metrics_cmd(post_id, bucket, hours):
+    """Print a stored post's engagement curve from recorded metric samples."""
+    since = datetime.utcnow() - timedelta(hours=hours)
+    for point in post_metric_series(post_id, bucket, since=since):
+        deltas = point["deltas"]
+        click.echo(
+            f"{point['period']}  likes {point['like_count']} (+{deltas['like_count']})  "
+            f"reposts {point['repost_count']} (+{deltas['repost_count']})  "
+            f"replies {point['reply_count']} (+{deltas['reply_count']})  "
+            f"impressions {point['impression_count']} (+{deltas['impression_count']})"
+        )
+    velocity = post_metric_velocity(post_id, hours=min(hours, 24))
+    if velocity["per_hour"]:
+        click.echo(f"Last {velocity['hours']:g}h per hour: " + ", ".join(f"{key} {value}" for key, value in velocity["per_hour"].items()))
+
+
+@x_api_cli.command('user-growth')
+@click.argument('users')
+@click.option('--days', default=30, type=float, help='Window length ending now.')
+def user_growth_cmd(users, days):
+    """Show follower/following/post/listed changes for comma-separated stored ids or usernames."""
+    values = [value.strip() for value in users.split(",") if value.strip()]
+    user_ids = local_user_ids([value for value in values if value.isdigit()], [value for value in values if not value.isdigit()])
+    for entry in user_growth(user_ids, datetime.utcnow() - timedelta(days=days)):
+        name = f"@{entry['username']}" if entry["username"] else entry["user_id"]
+        if not entry["samples"]:
+            click.echo(f"{name}: no samples")
+            continue
+        click.echo(
+            f"{name}: followers {entry['followers_count']} ({entry['followers_count_change']:+d}), "
+            f"following {entry['following_count']} ({entry['following_count_change']:+d}), "
+            f"posts {entry['post_count']} ({entry['post_count_change']:+d}), "
+            f"listed {entry['listed_count']} ({entry['listed_count_change']:+d})"
+        )
+
+
+@x_api_cli.command('downsample-user-metrics')
+@click.option('--raw-days', default=None, type=float, help='Keep every sample this recent (default X_USER_METRICS_RAW_DAYS).')
+@click.option('--hourly-days', default=None, type=float, help='Keep hourly samples this recent (default X_USER_METRICS_HOURLY_DAYS).')
+def downsample_user_metrics_cmd(raw_days, hourly_days):
+    """Thin old user metric samples to one per hour, then one per day."""
+    click.echo(f"Removed {downsample_user_metrics(raw_days, hourly_days)} samples.")
+
+
+@x_api_cli.command('trend-movers')
+@click.argument('woeid', type=int)
+@click.option('--hours', default=6, type=float, help='Compare current ranks with this long ago.')
+@click.option('--limit', default=10, type=int)
+def trend_movers_cmd(woeid, hours, limit):
+    """Show trends that rose, fell, entered or left a location's list."""
+    movers = trend_movers(woeid, hours=hours, limit=limit)
+    for entry in movers["rising"] + movers["falling"]:
+        click.echo(f"#{entry['rank']:<3} {entry['change']:+d}  {entry['trend_name']}")
+    for entry in movers["entered"]:
+        click.echo(f"#{entry['rank']:<3} new {entry['trend_name']}")
+    for entry in movers["left"]:
+        click.echo(f"     out {entry['trend_name']} (best #{entry['best_rank']})")
+
+
+@x_api_cli.command('collect-trends')
+@click.option('--woeids', default=None, help='Comma separated WOEIDs (default X_TRENDS_WOEIDS).')
+@click.option('--interval', default=None, type=float, help='Seconds between cycles (default X_TRENDS_INTERVAL_SECONDS).')
+@click.option('--once', is_flag=True, help='Run a single cycle and exit.')
+def collect_trends_cmd(woeids, interval, once):
+    """Fetch trends for several locations on a schedule, one transaction per cycle."""
+
+    def echo_cycle(report):
+        if report.get("error"):
+            click.echo(report["error"])
+            return
+        click.echo(
+            f"{datetime.utcnow():%H:%M:%S} {report['calls']} calls ({report['succeeded']} ok, {report['failed']} failed, "
+            f"{len(report['deferred'])} deferred), {report['trends']} trends in {report['cycle_ms']} ms "
+            f"(fetch {report['fetch_ms']} ms, store {report['store_ms']} ms)"
+        )
+
+    run_collector(parse_woeids(woeids) or None, interval=interval, once=once, on_cycle=echo_cycle)
+
+
+@x_api_cli.command('migrate-media-blobs')
+@click.option('--batch-size', default=50, type=int, help='Uploads moved per commit.')
+def migrate_media_blobs_cmd(batch_size):
+    """Move media stored in x_media_uploads.file_blob into the media blob store."""
+    pending = XMediaUpload.query.filter(XMediaUpload.file_blob.isnot(None))
+    total = pending.count()
+    click.echo(f"Moving {total} media files to the blob store...")
+    moved = 0
+    while True:
+        uploads = pending.order_by(XMediaUpload.id).limit(batch_size).all()
+        if not uploads:
+            break
+        for upload in uploads:
+            upload.blob_hash = media_store.put(upload.file_blob)
+            upload.file_blob = None
+        db.session.commit()
+        db.session.expunge_all()
+        moved += len(uploads)
+        click.echo(f"Moved {moved}/{total}")
+    click.echo("Done.")
+
+
+@x_api_cli.command('resume-media-upload')
+@click.argument('upload_id', type=int)
+@click.option('--restart', is_flag=True, help='Run INIT again and resend every segment.')
+@click.option('--shared/--no-shared', default=None, help='Change the shared flag used when INIT runs (default: as uploaded).')
+def resume_media_upload_cmd(upload_id, restart, shared):
+    """Finish a chunked media upload, sending only the missing segments."""
+    upload = db.session.get(XMediaUpload, upload_id)
+    if upload is None:
+        raise click.ClickException(f"No media upload with id {upload_id}.")
+    with acting_as(upload.user_id, upload.x_user_id):
+        MediaUploadEngine.from_config().run(upload, restart=restart, shared=shared)
+    done = len(upload.completed_segments or [])
+    click.echo(f"Upload {upload.id}: {upload.status} ({done}/{upload.segment_count or 0} segments)")
+    if upload.error_message:
+        click.echo(upload.error_message)
+
+
+@x_api_cli.command('worker')
+@click.option('--once', is_flag=True, help='Exit when no job is due instead of waiting for more.')
+@click.option('--worker-id', default=None, help='Name recorded on claimed jobs (default host:pid).')
+def worker_cmd(once, worker_id):
+    """Run queued background jobs (uploads, Space polls, bulk lookups)."""
+    click.echo("Job worker started." if not once else "Running due jobs...")
+    processed = job_queue.work(worker_id=worker_id, once=once)
+    click.echo(f"Ran {processed} jobs.")
+
+
+@x_api_cli.command('track-spaces')
+@click.argument('space_ids')
+@click.option('--stop', is_flag=True, help='Stop following these spaces instead.')
+def track_spaces_cmd(space_ids, stop):
+    """Add live or scheduled spaces to the poller (comma separated ids)."""
+    ids = [item.strip() for item in space_ids.split(',') if item.strip()]
+    if stop:
+        click.echo(f"Stopped tracking {spaces_poller.untrack(ids)} spaces.")
+        return
+    invalid = [space_id for space_id in ids if not is_space_id(space_id)]
+    if invalid:
+        click.echo(f"Skipping malformed ids: {', '.join(invalid)}")
+    tracked = spaces_poller.track(ids)
+    click.echo(f"Tracking {len(tracked)} of {len(ids)} spaces.")
+
+
+@x_api_cli.command('poll-spaces')
+@click.option('--once', is_flag=True, help='Poll the spaces that are due, then exit.')
+def poll_spaces_cmd(once):
+    """Poll tracked live and scheduled spaces, faster while their audience changes."""
+    click.echo("Spaces poller started." if not once else "Polling due spaces...")
+    polled = spaces_poller.run(once=once)
+    click.echo(f"Polled {polled} spaces.")
@@ -1,17 +1,28 @@
 import io
 import json
 import re
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
 from typing import Any, Mapping
 
-import requests
 from PIL import Image
 
 from app.extensions import db
-from app.models import ApiRequestLog, AnnotationDomain, AnnotationEntity, PostContextAnnotation, User, XMediaUpload, XNewsStorySnapshot, XPost, XSpace, XSpaceSnapshot, XTrendSnapshot, XUsageSnapshot, XUser
-from flask import session
-
-from app.blueprints.auth.token_helpers import call_x_api_with_refresh, get_current_user_token
+from app.models import ApiRequestLog, AnnotationDomain, AnnotationEntity, PostContextAnnotation, User, XMediaUpload, XNewsStorySnapshot, XPost, XPostMetricSample, XSpace, XSpaceSnapshot, XTrendAppearance, XTrendSnapshot, XUsageDaily, XUsageSnapshot, XUser, XUserMetricSample
+from flask import current_app, has_app_context, has_request_context, session
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm.util import identity_key
+
+from app.blueprints.auth.token_helpers import call_x_api_with_refresh, get_current_identity, get_current_user_token
+from app.services.budget import billable_usage, budget_meter
+from app.services.http_client import x_http
+from app.services.log_writer import api_log_writer
+from app.services.payload_store import encode_json_payload, payload_hash, payload_store
+from app.services.pickers import picker_cache
+from app.services.post_search import post_search_index
+from app.services.rate_limits import endpoint_template
+from app.services.response_cache import local_response
 from app.utils.encrypt_decrypt import get_app_var
 
 
@@ -232,6 +243,8 @@ SPACE_EXPANSIONS = [
     "topic_ids",
 ]
 
+X_LOOKUP_BATCH_SIZE = 100
+
 
 def _filter_fields(fields: list[str]) -> list[str]:
     return [
@@ -257,50 +270,184 @@ def _get_replied_to_post_id(payload: Mapping[str, Any]) -> int | None:
     return None
 
 
-def _upsert_x_post(payload: Mapping[str, Any]) -> XPost | None:
-    post_id = payload.get("id")
-    if not post_id:
-        return None
+def _coerce_int(value: Any) -> int | None:
     try:
-        post_id = int(post_id)
+        return int(value) if value else None
     except (TypeError, ValueError):
         return None
 
-    record = db.session.get(XPost, post_id)
-    if record is None:
-        record = XPost(id=post_id)
-        db.session.add(record)
 
-    record.author_id = int(payload["author_id"]) if payload.get("author_id") else record.author_id
-    record.text = payload.get("text") or record.text
-    record.created_at = _parse_iso8601(payload.get("created_at")) or record.created_at
-    record.lang = payload.get("lang")
-    record.possibly_sensitive = payload.get("possibly_sensitive", record.possibly_sensitive)
-    record.reply_settings = payload.get("reply_settings")
-    record.conversation_id = int(payload["conversation_id"]) if payload.get("conversation_id") else record.conversation_id
-    record.in_reply_to_post_id = _get_replied_to_post_id(payload) or record.in_reply_to_post_id
+def _upsert_insert():
+    """Return the dialect insert construct supporting ON CONFLICT, if any."""
+    dialect = db.session.get_bind().dialect.name
+    if dialect == "sqlite":
+        return sqlite_insert
+    if dialect == "postgresql":
+        return postgresql_insert
+    return None
+
+
+def _prefetch_rows(model: type, keys: list[Any], columns: list[str]) -> dict[Any, dict[str, Any]]:
+    if not keys:
+        return {}
+    selected = [getattr(model, column) for column in ["id", *columns]]
+    rows = db.session.execute(db.select(*selected).where(model.id.in_(keys))).mappings()
+    return {row["id"]: dict(row) for row in rows}
+
 
+def _write_rows(model: type, rows: list[dict[str, Any]]) -> None:
+    """Insert or update ``rows`` in one statement, falling back to the ORM elsewhere."""
+    if not rows:
+        return
+
+    insert = _upsert_insert()
+    if insert is None:
+        for values in rows:
+            record = db.session.get(model, values["id"])
+            if record is None:
+                record = model(id=values["id"])
+                db.session.add(record)
+            for column, value in values.items():
+                setattr(record, column, value)
+        return
+
+    table = model.__table__
+    stmt = insert(table)
+    updates = {column: stmt.excluded[column] for column in rows[0] if column != "id"}
+    if "last_updated_at" in table.c:
+        updates["last_updated_at"] = db.func.now()
+    db.session.execute(stmt.on_conflict_do_update(index_elements=["id"], set_=updates), rows)
+
+    # Rows already loaded into the session are now stale.
+    for values in rows:
+        record = db.session.identity_map.get(identity_key(model, values["id"]))
+        if record is not None:
+            db.session.expire(record)
+
+
+def _store_raw_payloads(rows: list[dict[str, Any]], field: str, hash_field: str) -> None:
+    """Move each row's raw JSON into the payload store, keeping only its hash."""
+    hashes = payload_store.put_many([encode_json_payload(row.pop(field)) for row in rows])
+    for row, digest in zip(rows, hashes):
+        row[hash_field] = digest
+
+
+NEW_X_POST_DEFAULTS = {
+    "possibly_sensitive": False,
+    "repost_count": 0,
+    "reply_count": 0,
+    "like_count": 0,
+    "quote_count": 0,
+    "bookmark_count": 0,
+    "impression_count": 0,
+}
+
+
+def _x_post_values(payload: Mapping[str, Any], current: Mapping[str, Any]) -> dict[str, Any]:
     metrics = payload.get("public_metrics") or {}
-    record.repost_count = metrics.get("retweet_count", record.repost_count)
-    record.reply_count = metrics.get("reply_count", record.reply_count)
-    record.like_count = metrics.get("like_count", record.like_count)
-    record.quote_count = metrics.get("quote_count", record.quote_count)
-    record.bookmark_count = metrics.get("bookmark_count", record.bookmark_count)
-    record.impression_count = metrics.get("impression_count", record.impression_count)
-
-    record.raw_post_data = payload
-    _upsert_context_annotations(record.id, payload.get("context_annotations") or [])
-    return record
+    return {
+        "id": current["id"],
+        "author_id": _coerce_int(payload.get("author_id")) or current.get("author_id"),
+        "text": payload.get("text") or current.get("text"),
+        "created_at": _parse_iso8601(payload.get("created_at")) or current.get("created_at"),
+        "lang": payload.get("lang"),
+        "possibly_sensitive": payload.get("possibly_sensitive", current.get("possibly_sensitive")),
+        "reply_settings": payload.get("reply_settings"),
+        "conversation_id": _coerce_int(payload.get("conversation_id")) or current.get("conversation_id"),
+        "in_reply_to_post_id": _get_replied_to_post_id(payload) or current.get("in_reply_to_post_id"),
+        "repost_count": metrics.get("retweet_count", current.get("repost_count")),
+        "reply_count": metrics.get("reply_count", current.get("reply_count")),
+        "like_count": metrics.get("like_count", current.get("like_count")),
+        "quote_count": metrics.get("quote_count", current.get("quote_count")),
+        "bookmark_count": metrics.get("bookmark_count", current.get("bookmark_count")),
+        "impression_count": metrics.get("impression_count", current.get("impression_count")),
+        "raw_post_data": payload,
+    }
+
+
+POST_METRIC_COLUMNS = (
+    "repost_count",
+    "reply_count",
+    "like_count",
+    "quote_count",
+    "bookmark_count",
+    "impression_count",
+)
+
+
+USER_METRIC_COLUMNS = ("followers_count", "following_count", "post_count", "listed_count")
+
+
+def _metric_samples(
+    merged: Mapping[int, Mapping[str, Any]],
+    existing: Mapping[int, Mapping[str, Any]],
+    with_metrics: set[int],
+    columns: tuple[str, ...],
+    owner_column: str,
+) -> list[dict[str, Any]]:
+    """Metric samples for rows whose public metrics are new or differ from the stored row."""
+    sampled_at = datetime.utcnow()
+    samples = []
+    for row_id in with_metrics:
+        values = {column: merged[row_id][column] for column in columns}
+        before = existing.get(row_id)
+        if before is not None and all(before.get(column) == value for column, value in values.items()):
+            continue
+        samples.append({owner_column: row_id, "sampled_at": sampled_at, **values})
+    return samples
+
+
+def _upsert_x_posts(payloads: list[Mapping[str, Any]]) -> None:
+    """Upsert a page of posts and their context annotations in a few statements."""
+    payloads = [payload for payload in payloads or [] if _coerce_int(payload.get("id"))]
+    if not payloads:
+        return
+
+    post_ids = list(dict.fromkeys(_coerce_int(payload["id"]) for payload in payloads))
+    existing = _prefetch_rows(XPost, post_ids, [column for column in XPost.__table__.c.keys() if column != "id"])
+
+    merged: dict[int, dict[str, Any]] = {}
+    annotations: list[tuple[int, Mapping[str, Any]]] = []
+    with_metrics: set[int] = set()
+    for payload in payloads:
+        post_id = _coerce_int(payload["id"])
+        current = merged.get(post_id) or existing.get(post_id) or {"id": post_id, **NEW_X_POST_DEFAULTS}
+        merged[post_id] = _x_post_values(payload, current)
+        annotations.extend((post_id, annotation) for annotation in payload.get("context_annotations") or [])
+        if payload.get("public_metrics"):
+            with_metrics.add(post_id)
+
+    rows = list(merged.values())
+    samples = _metric_samples(merged, existing, with_metrics, POST_METRIC_COLUMNS, "post_id")
+    _store_raw_payloads(rows, "raw_post_data", "raw_post_hash")
+    _write_rows(XPost, rows)
+    if samples:
+        db.session.execute(XPostMetricSample.__table__.insert(), samples)
+    _upsert_context_annotations_bulk(annotations)
+    post_search_index.update(post_ids)
+    if any(post_id not in existing for post_id in merged):
+        picker_cache.invalidate("posts")
+
+
+def _upsert_x_post(payload: Mapping[str, Any]) -> XPost | None:
+    post_id = _coerce_int(payload.get("id"))
+    if post_id is None:
+        return None
+    _upsert_x_posts([payload])
+    return db.session.get(XPost, post_id)
+
+
+def _as_list(data: Any) -> list[Any]:
+    """Single-object lookups return ``data`` as a dict; list endpoints return a list."""
+    if not data:
+        return []
+    return [data] if isinstance(data, dict) else list(data)
 
 
 def _store_post_payload(payload: Mapping[str, Any]) -> None:
     includes = payload.get("includes") or {}
-    for user in includes.get("users", []) or []:
-        _upsert_x_user(user)
-    for post in payload.get("data", []) or []:
-        _upsert_x_post(post)
-    for post in includes.get("tweets", []) or []:
-        _upsert_x_post(post)
+    _upsert_x_users(includes.get("users") or [])
+    _upsert_x_posts([*_as_list(payload.get("data")), *(includes.get("tweets") or [])])
 
 
 def _upsert_x_space(payload: Mapping[str, Any]) -> XSpace | None:
@@ -332,16 +479,45 @@ def _upsert_x_space(payload: Mapping[str, Any]) -> XSpace | None:
     return record
 
 
-def _record_space_snapshot(space: XSpace, payload: Mapping[str, Any], source: str) -> None:
-    snapshot = XSpaceSnapshot(
-        space_id=space.id,
-        source=source,
-        state=payload.get("state"),
-        participant_count=payload.get("participant_count"),
-        subscriber_count=payload.get("subscriber_count"),
-        raw_space_data=payload,
-    )
-    db.session.add(snapshot)
+def _record_space_snapshots(payloads: list[Mapping[str, Any]], source: str) -> list[XSpace]:
+    """Upsert spaces and snapshot those whose payload differs from their latest snapshot."""
+    spaces = {}
+    for payload in payloads or []:
+        space = _upsert_x_space(payload)
+        if space:
+            spaces[space.id] = (space, payload)
+    if not spaces:
+        return []
+
+    latest = (
+        db.select(db.func.max(XSpaceSnapshot.id))
+        .where(XSpaceSnapshot.space_id.in_(list(spaces)))
+        .group_by(XSpaceSnapshot.space_id)
+    )
+    previous = dict(
+        db.session.execute(
+            db.select(XSpaceSnapshot.space_id, XSpaceSnapshot.raw_space_hash).where(XSpaceSnapshot.id.in_(latest))
+        ).all()
+    )
+    for space_id, (space, payload) in spaces.items():
+        if previous.get(space_id) == payload_hash(encode_json_payload(payload)):
+            continue
+        db.session.add(
+            XSpaceSnapshot(
+                space_id=space_id,
+                source=source,
+                state=payload.get("state"),
+                participant_count=payload.get("participant_count"),
+                subscriber_count=payload.get("subscriber_count"),
+                raw_space_data=payload,
+            )
+        )
+    return [space for space, _ in spaces.values()]
+
+
+def _trend_count(trend: Mapping[str, Any]) -> int | None:
+    count = trend.get("tweet_count")
+    return count if count is not None else trend.get("post_count")
 
 
 def _store_trend_snapshots(
@@ -349,6 +525,9 @@ def _store_trend_snapshots(
     source: str,
     woeid: int | None = None,
 ) -> None:
+    if woeid is not None:
+        _record_trend_appearances(trends, source, woeid)
+        return
     for trend in trends:
         trend_name = trend.get("trend_name")
         if not trend_name:
@@ -366,6 +545,71 @@ def _store_trend_snapshots(
         db.session.add(snapshot)
 
 
+def _record_trend_appearances(trends: list[Mapping[str, Any]], source: str, woeid: int) -> None:
+    """Fold a location's trend list into its appearances; snapshot only trends that moved.
+
+    A trend missing from the list closes its open appearance, so coming back
+    later starts a new one. Rank is the trend's 1-based position in the list.
+    Only appearances last ranked within the list's length are closed: a
+    shorter fetch (smaller ``max_trends``) says nothing about trends below it.
+    """
+    now = datetime.utcnow()
+    ranked: dict[str, tuple[int, Mapping[str, Any]]] = {}
+    for trend in trends:
+        name = trend.get("trend_name")
+        if name and str(name) not in ranked:
+            ranked[str(name)] = (len(ranked) + 1, trend)
+
+    open_rows = {
+        row.trend_name: row
+        for row in XTrendAppearance.query.filter(XTrendAppearance.woeid == woeid, XTrendAppearance.ended_at.is_(None))
+    }
+    depth = len(ranked)
+    for name, row in open_rows.items():
+        if name not in ranked and (row.last_rank or 0) <= depth:
+            row.ended_at = now
+
+    for name, (rank, trend) in ranked.items():
+        count = _trend_count(trend)
+        row = open_rows.get(name)
+        if row is None:
+            row = XTrendAppearance(woeid=woeid, trend_name=name, first_seen_at=now, observations=0, first_rank=rank)
+            db.session.add(row)
+            changed = True
+        else:
+            changed = (row.last_rank, row.last_post_count, row.category, row.trending_since) != (
+                rank,
+                count,
+                trend.get("category"),
+                trend.get("trending_since"),
+            )
+        row.last_seen_at = now
+        row.observations += 1
+        row.last_rank = rank
+        row.best_rank = min(rank, row.best_rank or rank)
+        row.last_post_count = count
+        if count is not None:
+            row.peak_post_count = max(count, row.peak_post_count or 0)
+        row.category = trend.get("category")
+        row.trending_since = trend.get("trending_since")
+        if changed:
+            db.session.add(
+                XTrendSnapshot(
+                    woeid=woeid,
+                    source=source,
+                    trend_name=name,
+                    tweet_count=trend.get("tweet_count"),
+                    post_count=trend.get("post_count"),
+                    category=trend.get("category"),
+                    trending_since=trend.get("trending_since"),
+                    raw_trend_data=trend,
+                    fetched_at=now,
+                    appearance=row,
+                    rank=rank,
+                )
+            )
+
+
 def _store_news_snapshots(
     stories: list[Mapping[str, Any]],
     source: str,
@@ -433,7 +677,7 @@ def upload_x_media_one_shot(
 
     files = {"media": (filename, file_bytes, media_type or "application/octet-stream")}
     response = call_x_api_with_refresh(
-        requests.post,
+        x_http.post,
         "https://api.x.com/2/media/upload",
         data=data,
         files=files,
@@ -480,7 +724,7 @@ def initialize_x_media_upload(
         data["additional_owners"] = ",".join(additional_owners)
 
     response = call_x_api_with_refresh(
-        requests.post,
+        x_http.post,
         "https://api.x.com/2/media/upload",
         data=data,
         timeout=30,
@@ -518,7 +762,7 @@ def append_x_media_upload(
     }
     files = {"media": ("chunk", chunk_bytes, "application/octet-stream")}
     response = call_x_api_with_refresh(
-        requests.post,
+        x_http.post,
         "https://api.x.com/2/media/upload",
         data=data,
         files=files,
@@ -547,7 +791,7 @@ def append_x_media_upload(
 
 def finalize_x_media_upload(media_id: str) -> Any:
     response = call_x_api_with_refresh(
-        requests.post,
+        x_http.post,
         "https://api.x.com/2/media/upload",
         data={"command": "FINALIZE", "media_id": str(media_id)},
         timeout=30,
@@ -575,7 +819,7 @@ def finalize_x_media_upload(media_id: str) -> Any:
 
 def get_x_media_upload_status(media_id: str) -> Any:
     response = call_x_api_with_refresh(
-        requests.get,
+        x_http.get,
         "https://api.x.com/2/media/upload",
         params={"command": "STATUS", "media_id": media_id},
         timeout=10,
@@ -603,37 +847,52 @@ def get_x_media_upload_status(media_id: str) -> Any:
 
 
 def _upsert_context_annotations(post_id: int, annotations: list[Mapping[str, Any]]) -> None:
-    for annotation in annotations:
+    _upsert_context_annotations_bulk([(post_id, annotation) for annotation in annotations])
+
+
+def _upsert_context_annotations_bulk(annotations: list[tuple[int, Mapping[str, Any]]]) -> None:
+    domains: dict[str, Mapping[str, Any]] = {}
+    entities: dict[str, Mapping[str, Any]] = {}
+    links: dict[tuple[int, str, str], None] = {}
+    for post_id, annotation in annotations:
         domain = annotation.get("domain") or {}
         entity = annotation.get("entity") or {}
         domain_id = domain.get("id")
         entity_id = entity.get("id")
         if not domain_id or not entity_id:
             continue
+        domains.setdefault(domain_id, {}).update(domain)
+        entities.setdefault(entity_id, {}).update(entity)
+        links[(post_id, domain_id, entity_id)] = None
+    if not links:
+        return
 
-        domain_record = db.session.get(AnnotationDomain, domain_id)
-        if domain_record is None:
-            domain_record = AnnotationDomain(id=domain_id)
-            db.session.add(domain_record)
-        domain_record.name = domain.get("name", domain_record.name)
-        domain_record.description = domain.get("description", domain_record.description)
-
-        entity_record = db.session.get(AnnotationEntity, entity_id)
-        if entity_record is None:
-            entity_record = AnnotationEntity(id=entity_id)
-            db.session.add(entity_record)
-        entity_record.name = entity.get("name", entity_record.name)
-        entity_record.description = entity.get("description", entity_record.description)
-
-        link = db.session.get(PostContextAnnotation, (post_id, domain_id, entity_id))
-        if link is None:
-            db.session.add(
-                PostContextAnnotation(
-                    post_id=post_id,
-                    domain_id=domain_id,
-                    entity_id=entity_id,
-                )
+    for model, payloads in ((AnnotationDomain, domains), (AnnotationEntity, entities)):
+        existing = _prefetch_rows(model, list(payloads), ["name", "description"])
+        rows = []
+        for key, payload in payloads.items():
+            current = existing.get(key, {})
+            rows.append(
+                {
+                    "id": key,
+                    "name": payload.get("name", current.get("name")),
+                    "description": payload.get("description", current.get("description")),
+                }
             )
+        _write_rows(model, rows)
+
+    link_rows = [
+        {"post_id": post_id, "domain_id": domain_id, "entity_id": entity_id}
+        for post_id, domain_id, entity_id in links
+    ]
+    insert = _upsert_insert()
+    if insert is not None:
+        db.session.execute(insert(PostContextAnnotation.__table__).on_conflict_do_nothing(), link_rows)
+        return
+    for values in link_rows:
+        key = (values["post_id"], values["domain_id"], values["entity_id"])
+        if db.session.get(PostContextAnnotation, key) is None:
+            db.session.add(PostContextAnnotation(**values))
 
 
 def _trim_response_body(body: str | None, limit: int = 200000) -> str | None:
@@ -650,22 +909,195 @@ def _log_api_request(
     response_headers: dict[str, Any] | None = None,
     commit: bool = False,
 ) -> ApiRequestLog:
-    record = ApiRequestLog(
-        user_id=session.get("user_id"),
-        method=method,
-        url=url,
-        status_code=status_code,
-        response_body=_trim_response_body(response_body),
-        response_headers=response_headers,
-    )
-    db.session.add(record)
-    db.session.flush()
-    session["x_last_api_log_id"] = record.id
+    user_id = get_current_identity()[0]
+    kind, units = billable_usage(method, url, status_code, response_body, response_headers)
+    record = api_log_writer.write(
+        {
+            "user_id": user_id,
+            "method": method,
+            "url": url,
+            "status_code": status_code,
+            "response_body": _trim_response_body(response_body),
+            "response_headers": response_headers,
+            "endpoint": endpoint_template(method, url),
+            "billable_kind": kind,
+            "billable_units": units,
+        }
+    )
+    budget_meter.record(user_id, kind, units, response_headers)
+    if has_request_context():
+        session["x_last_api_log_id"] = record.id
     if commit:
         db.session.commit()
     return record
 
 
+def get_api_request_log(log_id: int | None) -> ApiRequestLog | None:
+    """Load a logged response, including rows still waiting in the log writer."""
+    if not log_id:
+        return None
+    return api_log_writer.pending(log_id) or db.session.get(ApiRequestLog, log_id)
+
+
+def _json_payload(response: Any) -> Any:
+    if not response.headers.get("Content-Type", "").startswith("application/json"):
+        return None
+    try:
+        return response.json()
+    except ValueError:
+        return None
+
+
+def _get_in_id_batches(
+    url: str,
+    id_param: str,
+    ids: list[str],
+    params: Mapping[str, Any],
+    headers: Mapping[str, str],
+    timeout: int = 10,
+) -> list[Any]:
+    """GET an id-list endpoint in X_LOOKUP_BATCH_SIZE chunks, fanning out over a bounded pool.
+
+    Only the HTTP calls run on worker threads; responses come back in input order so the
+    caller can log and store them on the request's own session.
+    """
+    unique_ids = list(dict.fromkeys(ids))
+    batches = [
+        unique_ids[index:index + X_LOOKUP_BATCH_SIZE]
+        for index in range(0, len(unique_ids), X_LOOKUP_BATCH_SIZE)
+    ]
+
+    owner_user_id = get_current_identity()[0]
+
+    def fetch(batch: list[str]) -> Any:
+        with budget_meter.charge_to(owner_user_id):
+            return x_http.get(
+                url,
+                headers=dict(headers),
+                params={**params, id_param: ",".join(batch)},
+                timeout=timeout,
+            )
+
+    if len(batches) == 1:
+        return [fetch(batches[0])]
+
+    max_workers = current_app.config.get("X_LOOKUP_MAX_WORKERS", 4) if has_app_context() else 4
+    with ThreadPoolExecutor(max_workers=max(1, min(int(max_workers), len(batches)))) as executor:
+        return list(executor.map(fetch, batches))
+
+
+def _local_records(model: Any, *criteria: Any) -> list[Any]:
+    """Return rows matching ``criteria`` refreshed within X_LOCAL_FRESHNESS_MINUTES."""
+    minutes = float(current_app.config.get("X_LOCAL_FRESHNESS_MINUTES", 0) or 0) if has_app_context() else 0
+    if minutes <= 0:
+        return []
+    cutoff = datetime.utcnow() - timedelta(minutes=minutes)
+    return model.query.filter(*criteria, model.last_updated_at >= cutoff).all()
+
+
+def _serve_local(url: str, params: Mapping[str, Any], payload: dict[str, Any]) -> Any:
+    """Log and return a locally stored payload in place of an X API call."""
+    response = local_response(url, params, payload)
+    _log_api_request("GET", response.url, response.status_code, response.text, dict(response.headers))
+    db.session.commit()
+    return response
+
+
+def _log_batch_response(response: Any) -> Any:
+    _log_api_request(
+        "GET",
+        response.url,
+        response.status_code,
+        response.text,
+        dict(response.headers),
+    )
+    return _json_payload(response)
+
+
+def _batch_failure(index: int, response: Any, payload: Any) -> dict[str, Any] | None:
+    """An ``errors`` entry describing a batch X rejected, or None when it succeeded."""
+    status = getattr(response, "status_code", None)
+    # A 200 with only ``errors`` (every id not found) is a normal answer, not a failed batch.
+    if isinstance(payload, dict) and (status is None or status < 400):
+        return None
+    failure: dict[str, Any] = {"title": "Batch failed", "batch": index + 1, "status": status}
+    if isinstance(payload, dict):
+        failure["detail"] = payload.get("detail") or payload.get("title")
+        failure["body"] = payload
+    else:
+        failure["body"] = getattr(response, "text", None)
+    return failure
+
+
+def _merge_lookup_payloads(payloads: list[Any], responses: list[Any] | None = None) -> dict[str, Any]:
+    data: list[Any] = []
+    includes: dict[str, list[Any]] = {}
+    errors: list[Any] = []
+    failed = 0
+    seen_includes: dict[str, set[str]] = {}
+    for index, payload in enumerate(payloads):
+        failure = _batch_failure(index, responses[index] if responses else None, payload)
+        if failure is not None:
+            failed += 1
+            errors.append(failure)
+        if not isinstance(payload, dict):
+            continue
+        data.extend(payload.get("data", []) or [])
+        errors.extend(payload.get("errors", []) or [])
+        for key, items in (payload.get("includes") or {}).items():
+            bucket = includes.setdefault(key, [])
+            seen = seen_includes.setdefault(key, set())
+            for item in items or []:
+                item_key = str(item.get("id") or item.get("media_key") or "") if isinstance(item, dict) else ""
+                if item_key and item_key in seen:
+                    continue
+                if item_key:
+                    seen.add(item_key)
+                bucket.append(item)
+
+    merged: dict[str, Any] = {"data": data}
+    if includes:
+        merged["includes"] = includes
+    if errors:
+        merged["errors"] = errors
+    merged["meta"] = {"result_count": len(data), "batch_count": len(payloads), "failed_batch_count": failed}
+    if failed:
+        merged["error"] = f"{failed} of {len(payloads)} lookup batches failed; results are incomplete."
+    return merged
+
+
+def _finish_batched_lookup(
+    url: str,
+    responses: list[Any],
+    payloads: list[Any],
+    echo: bool = True,
+) -> Any:
+    """Commit stored rows and return the single response, or a merged payload for many batches."""
+    if len(responses) == 1:
+        response, payload = responses[0], payloads[0]
+        db.session.commit()
+        if echo:
+            if not payload or "data" not in payload:
+                print(response.text)
+            else:
+                print(json.dumps(payload, indent=4))
+        return response
+
+    merged = _merge_lookup_payloads(payloads, responses)
+    # Record the merged result so pages that render from x_last_api_log_id show every batch.
+    _log_api_request(
+        "GET",
+        f"{url} (batched x{len(responses)})",
+        None,
+        json.dumps(merged),
+        None,
+    )
+    db.session.commit()
+    if echo:
+        print(json.dumps(merged, indent=4))
+    return merged
+
+
 def get_api_request_history(limit: int = 100) -> list[dict[str, Any]]:
     logs = (
         ApiRequestLog.query.order_by(ApiRequestLog.created_at.desc())
@@ -694,42 +1126,79 @@ def get_api_request_history(limit: int = 100) -> list[dict[str, Any]]:
     ]
 
 
-def _upsert_x_user(payload: Mapping[str, Any]) -> XUser | None:
-    user_id = payload.get("id")
-    if not user_id:
-        return None
-    try:
-        user_id = int(user_id)
-    except (TypeError, ValueError):
-        return None
-
-    record = db.session.get(XUser, user_id)
-    if record is None:
-        record = XUser(id=user_id)
-        db.session.add(record)
+NEW_X_USER_DEFAULTS = {
+    "verified": False,
+    "followers_count": 0,
+    "following_count": 0,
+    "post_count": 0,
+    "listed_count": 0,
+    "like_count": 0,
+    "media_count": 0,
+}
 
-    record.username = payload.get("username", record.username)
-    record.name = payload.get("name", record.name)
-    record.created_at = _parse_iso8601(payload.get("created_at")) or record.created_at
-    record.description = payload.get("description")
-    record.location = payload.get("location")
-    record.url = payload.get("url")
-    record.profile_image_url = payload.get("profile_image_url")
-    record.verified = payload.get("verified", record.verified)
-    record.verified_type = payload.get("verified_type")
-    record.pinned_post_id = int(payload["pinned_tweet_id"]) if payload.get("pinned_tweet_id") else None
-    record.most_recent_post_id = int(payload["most_recent_tweet_id"]) if payload.get("most_recent_tweet_id") else None
 
+def _x_user_values(payload: Mapping[str, Any], current: Mapping[str, Any]) -> dict[str, Any]:
     metrics = payload.get("public_metrics") or {}
-    record.followers_count = metrics.get("followers_count", record.followers_count)
-    record.following_count = metrics.get("following_count", record.following_count)
-    record.post_count = metrics.get("tweet_count", record.post_count)
-    record.listed_count = metrics.get("listed_count", record.listed_count)
-    record.like_count = metrics.get("like_count", record.like_count)
-    record.media_count = metrics.get("media_count", record.media_count)
-    record.raw_profile_data = payload
+    return {
+        "id": current["id"],
+        "username": payload.get("username", current.get("username")),
+        "name": payload.get("name", current.get("name")),
+        "created_at": _parse_iso8601(payload.get("created_at")) or current.get("created_at"),
+        "description": payload.get("description"),
+        "location": payload.get("location"),
+        "url": payload.get("url"),
+        "profile_image_url": payload.get("profile_image_url"),
+        "verified": payload.get("verified", current.get("verified")),
+        "verified_type": payload.get("verified_type"),
+        "pinned_post_id": _coerce_int(payload.get("pinned_tweet_id")),
+        "most_recent_post_id": _coerce_int(payload.get("most_recent_tweet_id")),
+        "followers_count": metrics.get("followers_count", current.get("followers_count")),
+        "following_count": metrics.get("following_count", current.get("following_count")),
+        "post_count": metrics.get("tweet_count", current.get("post_count")),
+        "listed_count": metrics.get("listed_count", current.get("listed_count")),
+        "like_count": metrics.get("like_count", current.get("like_count")),
+        "media_count": metrics.get("media_count", current.get("media_count")),
+        "raw_profile_data": payload,
+    }
 
-    return record
+
+def _upsert_x_users(payloads: list[Mapping[str, Any]]) -> None:
+    """Upsert a page of user objects with one prefetch and one write."""
+    payloads = [payload for payload in payloads or [] if _coerce_int(payload.get("id"))]
+    if not payloads:
+        return
+
+    user_ids = list(dict.fromkeys(_coerce_int(payload["id"]) for payload in payloads))
+    existing = _prefetch_rows(XUser, user_ids, [column for column in XUser.__table__.c.keys() if column not in ("id", "last_updated_at")])
+
+    merged: dict[int, dict[str, Any]] = {}
+    with_metrics: set[int] = set()
+    for payload in payloads:
+        user_id = _coerce_int(payload["id"])
+        current = merged.get(user_id) or existing.get(user_id) or {"id": user_id, **NEW_X_USER_DEFAULTS}
+        merged[user_id] = _x_user_values(payload, current)
+        if payload.get("public_metrics"):
+            with_metrics.add(user_id)
+
+    rows = list(merged.values())
+    samples = _metric_samples(merged, existing, with_metrics, USER_METRIC_COLUMNS, "user_id")
+    _store_raw_payloads(rows, "raw_profile_data", "raw_profile_hash")
+    _write_rows(XUser, rows)
+    if samples:
+        db.session.execute(XUserMetricSample.__table__.insert(), samples)
+    if any(
+        user_id not in existing or (existing[user_id]["username"], existing[user_id]["name"]) != (row["username"], row["name"])
+        for user_id, row in merged.items()
+    ):
+        picker_cache.invalidate("users")
+
+
+def _upsert_x_user(payload: Mapping[str, Any]) -> XUser | None:
+    user_id = _coerce_int(payload.get("id"))
+    if user_id is None:
+        return None
+    _upsert_x_users([payload])
+    return db.session.get(XUser, user_id)
 
 
 def resolve_x_user_id(identifier: str | None) -> tuple[str | None, str | None]:
@@ -809,9 +1278,13 @@ def get_x_user_by_username(username: str) -> Any:
         "tweet.fields": ",".join(_filter_fields(TWEET_FIELDS)),
     }
 
+    local = [user.raw_profile_data for user in _local_records(XUser, db.func.lower(XUser.username) == username.lower())]
+    if local and local[0]:
+        return _serve_local(url, params, {"data": local[0]})
+
     headers = {"Authorization": f"Bearer {token}"}
 
-    response = requests.get(url, headers=headers, params=params, timeout=10)
+    response = x_http.get(url, headers=headers, params=params, timeout=10)
     _log_api_request(
         "GET",
         response.url,
@@ -828,8 +1301,7 @@ def get_x_user_by_username(username: str) -> Any:
     _upsert_x_user(payload["data"])
 
     includes = payload.get("includes", {})
-    for post in includes.get("tweets", []) or []:
-        _upsert_x_post(post)
+    _upsert_x_posts(includes.get("tweets", []))
 
     db.session.commit()
 
@@ -855,9 +1327,13 @@ def get_x_user_by_id(user_id: str) -> Any:
         "tweet.fields": ",".join(_filter_fields(TWEET_FIELDS)),
     }
 
+    local = [user.raw_profile_data for user in _local_records(XUser, XUser.id == _coerce_int(cleaned))]
+    if local and local[0]:
+        return _serve_local(url, params, {"data": local[0]})
+
     headers = {"Authorization": f"Bearer {token}"}
 
-    response = requests.get(url, headers=headers, params=params, timeout=10)
+    response = x_http.get(url, headers=headers, params=params, timeout=10)
     _log_api_request(
         "GET",
         response.url,
@@ -874,8 +1350,7 @@ def get_x_user_by_id(user_id: str) -> Any:
     _upsert_x_user(payload["data"])
 
     includes = payload.get("includes", {})
-    for post in includes.get("tweets", []) or []:
-        _upsert_x_post(post)
+    _upsert_x_posts(includes.get("tweets", []))
 
     db.session.commit()
 
@@ -885,7 +1360,7 @@ def get_x_user_by_id(user_id: str) -> Any:
 
 def get_my_x_user() -> Any:
     response = call_x_api_with_refresh(
-        requests.get,
+        x_http.get,
         "https://api.x.com/2/users/me",
         params={
             "user.fields": ",".join(_filter_fields(USER_FIELDS)),
@@ -929,8 +1404,7 @@ def get_my_x_user() -> Any:
     _upsert_x_user(payload["data"])
 
     includes = payload.get("includes", {})
-    for post in includes.get("tweets", []) or []:
-        _upsert_x_post(post)
+    _upsert_x_posts(includes.get("tweets", []))
 
     db.session.commit()
 
@@ -950,12 +1424,9 @@ def get_x_users_by_usernames(usernames: list[str] | str) -> Any:
     if not cleaned:
         print("Provide at least one username.")
         return None
-    if len(cleaned) > 100:
-        cleaned = cleaned[:100]
 
     url = "https://api.x.com/2/users/by"
     params = {
-        "usernames": ",".join(cleaned),
         "user.fields": ",".join(_filter_fields(USER_FIELDS)),
         "expansions": ",".join(_filter_fields(EXPANSIONS)),
         "tweet.fields": ",".join(_filter_fields(TWEET_FIELDS)),
@@ -963,31 +1434,16 @@ def get_x_users_by_usernames(usernames: list[str] | str) -> Any:
 
     headers = {"Authorization": f"Bearer {token}"}
 
-    response = requests.get(url, headers=headers, params=params, timeout=10)
-    _log_api_request(
-        "GET",
-        response.url,
-        response.status_code,
-        response.text,
-        dict(response.headers),
-    )
-    payload = response.json() if response.headers.get("Content-Type", "").startswith("application/json") else None
-    if not payload or "data" not in payload:
-        print(response.text)
-        db.session.commit()
-        return response
-
-    for user in payload.get("data", []) or []:
-        _upsert_x_user(user)
-
-    includes = payload.get("includes", {})
-    for post in includes.get("tweets", []) or []:
-        _upsert_x_post(post)
-
-    db.session.commit()
+    responses = _get_in_id_batches(url, "usernames", cleaned, params, headers)
+    payloads = [_log_batch_response(response) for response in responses]
+    for payload in payloads:
+        if not payload or "data" not in payload:
+            continue
+        _upsert_x_users(payload.get("data", []))
+        includes = payload.get("includes", {})
+        _upsert_x_posts(includes.get("tweets", []))
 
-    print(json.dumps(payload, indent=4))
-    return response
+    return _finish_batched_lookup(url, responses, payloads)
 
 
 def get_x_users_by_ids(user_ids: list[str] | str) -> Any:
@@ -1002,12 +1458,9 @@ def get_x_users_by_ids(user_ids: list[str] | str) -> Any:
     if not cleaned:
         print("Provide at least one user id.")
         return None
-    if len(cleaned) > 100:
-        cleaned = cleaned[:100]
 
     url = "https://api.x.com/2/users"
     params = {
-        "ids": ",".join(cleaned),
         "user.fields": ",".join(_filter_fields(USER_FIELDS)),
         "expansions": ",".join(_filter_fields(EXPANSIONS)),
         "tweet.fields": ",".join(_filter_fields(TWEET_FIELDS)),
@@ -1015,31 +1468,16 @@ def get_x_users_by_ids(user_ids: list[str] | str) -> Any:
 
     headers = {"Authorization": f"Bearer {token}"}
 
-    response = requests.get(url, headers=headers, params=params, timeout=10)
-    _log_api_request(
-        "GET",
-        response.url,
-        response.status_code,
-        response.text,
-        dict(response.headers),
-    )
-    payload = response.json() if response.headers.get("Content-Type", "").startswith("application/json") else None
-    if not payload or "data" not in payload:
-        print(response.text)
-        db.session.commit()
-        return response
-
-    for user in payload.get("data", []) or []:
-        _upsert_x_user(user)
-
-    includes = payload.get("includes", {})
-    for post in includes.get("tweets", []) or []:
-        _upsert_x_post(post)
-
-    db.session.commit()
+    responses = _get_in_id_batches(url, "ids", cleaned, params, headers)
+    payloads = [_log_batch_response(response) for response in responses]
+    for payload in payloads:
+        if not payload or "data" not in payload:
+            continue
+        _upsert_x_users(payload.get("data", []))
+        includes = payload.get("includes", {})
+        _upsert_x_posts(includes.get("tweets", []))
 
-    print(json.dumps(payload, indent=4))
-    return response
+    return _finish_batched_lookup(url, responses, payloads)
 
 
 def get_x_users_by_ids_with_app_token(user_ids: list[str] | str) -> Any:
@@ -1054,52 +1492,30 @@ def get_x_users_by_ids_with_app_token(user_ids: list[str] | str) -> Any:
     if not cleaned:
         print("Provide at least one user id.")
         return None
-    if len(cleaned) > 100:
-        cleaned = cleaned[:100]
 
+    url = "https://api.x.com/2/users"
     params = {
-        "ids": ",".join(cleaned),
         "user.fields": ",".join(_filter_fields(USER_FIELDS)),
         "expansions": ",".join(_filter_fields(EXPANSIONS)),
         "tweet.fields": ",".join(_filter_fields(TWEET_FIELDS)),
     }
 
     headers = {"Authorization": f"Bearer {token}"}
-    response = requests.get(
-        "https://api.x.com/2/users",
-        headers=headers,
-        params=params,
-        timeout=10,
-    )
-    _log_api_request(
-        "GET",
-        response.url,
-        response.status_code,
-        response.text,
-        dict(response.headers),
-    )
-    payload = response.json() if response.headers.get("Content-Type", "").startswith("application/json") else None
-    if not payload or "data" not in payload:
-        print(response.text)
-        db.session.commit()
-        return response
-
-    for user in payload.get("data", []) or []:
-        _upsert_x_user(user)
-
-    includes = payload.get("includes", {})
-    for post in includes.get("tweets", []) or []:
-        _upsert_x_post(post)
-
-    db.session.commit()
+    responses = _get_in_id_batches(url, "ids", cleaned, params, headers)
+    payloads = [_log_batch_response(response) for response in responses]
+    for payload in payloads:
+        if not payload or "data" not in payload:
+            continue
+        _upsert_x_users(payload.get("data", []))
+        includes = payload.get("includes", {})
+        _upsert_x_posts(includes.get("tweets", []))
 
-    print(json.dumps(payload, indent=4))
-    return response
+    return _finish_batched_lookup(url, responses, payloads)
 
 
 def get_x_users_search(query: str, max_results: int = 100, next_token: str | None = None) -> Any:
     response = call_x_api_with_refresh(
-        requests.get,
+        x_http.get,
         "https://api.x.com/2/users/search",
         params={
             "query": query,
@@ -1136,12 +1552,10 @@ def get_x_users_search(query: str, max_results: int = 100, next_token: str | Non
         db.session.commit()
         return response
 
-    for user in payload.get("data", []) or []:
-        _upsert_x_user(user)
+    _upsert_x_users(payload.get("data", []))
 
     includes = payload.get("includes", {})
-    for post in includes.get("tweets", []) or []:
-        _upsert_x_post(post)
+    _upsert_x_posts(includes.get("tweets", []))
 
     db.session.commit()
 
@@ -1149,7 +1563,7 @@ def get_x_users_search(query: str, max_results: int = 100, next_token: str | Non
     return response
 
 
-def get_x_spaces_by_ids(space_ids: list[str] | str) -> Any:
+def get_x_spaces_by_ids(space_ids: list[str] | str, use_local: bool = True) -> Any:
     token = get_app_var("X_BEARER_TOKEN")
     if not token:
         print("Missing X_BEARER_TOKEN; update .env or app_vars before calling.")
@@ -1161,42 +1575,30 @@ def get_x_spaces_by_ids(space_ids: list[str] | str) -> Any:
     if not cleaned:
         print("Provide at least one Space ID.")
         return None
-    if len(cleaned) > 100:
-        cleaned = cleaned[:100]
 
+    url = "https://api.x.com/2/spaces"
     params = {
-        "ids": ",".join(cleaned),
         "space.fields": ",".join(_filter_fields(SPACE_FIELDS)),
         "expansions": ",".join(SPACE_EXPANSIONS),
         "user.fields": ",".join(_filter_fields(USER_FIELDS)),
     }
 
-    headers = {"Authorization": f"Bearer {token}"}
-    response = requests.get(
-        "https://api.x.com/2/spaces",
-        headers=headers,
-        params=params,
-        timeout=10,
-    )
+    if use_local:
+        local = {space.id: space.raw_space_data for space in _local_records(XSpace, XSpace.id.in_(cleaned))}
+        if all(local.get(space_id) for space_id in cleaned):
+            return _serve_local(url, {**params, "ids": ",".join(cleaned)}, {"data": [local[space_id] for space_id in cleaned]})
 
-    _log_api_request(
-        "GET",
-        response.url,
-        response.status_code,
-        response.text,
-        dict(response.headers),
-    )
-    payload = response.json() if response.headers.get("Content-Type", "").startswith("application/json") else None
-    if payload and payload.get("data"):
-        for space_payload in payload.get("data", []) or []:
-            space = _upsert_x_space(space_payload)
-            if space:
-                _record_space_snapshot(space, space_payload, "spaces_by_ids")
+    headers = {"Authorization": f"Bearer {token}"}
+    responses = _get_in_id_batches(url, "ids", cleaned, params, headers)
+    payloads = [_log_batch_response(response) for response in responses]
+    for payload in payloads:
+        if not payload or not payload.get("data"):
+            continue
+        _record_space_snapshots(payload.get("data") or [], "spaces_by_ids")
         includes = payload.get("includes", {})
-        for user in includes.get("users", []) or []:
-            _upsert_x_user(user)
-        db.session.commit()
-    return response
+        _upsert_x_users(includes.get("users", []))
+
+    return _finish_batched_lookup(url, responses, payloads, echo=False)
 
 
 def get_x_spaces_by_creator_ids(user_ids: list[str] | str) -> Any:
@@ -1211,42 +1613,25 @@ def get_x_spaces_by_creator_ids(user_ids: list[str] | str) -> Any:
     if not cleaned:
         print("Provide at least one user id.")
         return None
-    if len(cleaned) > 100:
-        cleaned = cleaned[:100]
 
+    url = "https://api.x.com/2/spaces/by/creator_ids"
     params = {
-        "user_ids": ",".join(cleaned),
         "space.fields": ",".join(_filter_fields(SPACE_FIELDS)),
         "expansions": ",".join(SPACE_EXPANSIONS),
         "user.fields": ",".join(_filter_fields(USER_FIELDS)),
     }
 
     headers = {"Authorization": f"Bearer {token}"}
-    response = requests.get(
-        "https://api.x.com/2/spaces/by/creator_ids",
-        headers=headers,
-        params=params,
-        timeout=10,
-    )
-
-    _log_api_request(
-        "GET",
-        response.url,
-        response.status_code,
-        response.text,
-        dict(response.headers),
-    )
-    payload = response.json() if response.headers.get("Content-Type", "").startswith("application/json") else None
-    if payload and payload.get("data"):
-        for space_payload in payload.get("data", []) or []:
-            space = _upsert_x_space(space_payload)
-            if space:
-                _record_space_snapshot(space, space_payload, "spaces_by_creator_ids")
+    responses = _get_in_id_batches(url, "user_ids", cleaned, params, headers)
+    payloads = [_log_batch_response(response) for response in responses]
+    for payload in payloads:
+        if not payload or not payload.get("data"):
+            continue
+        _record_space_snapshots(payload.get("data") or [], "spaces_by_creator_ids")
         includes = payload.get("includes", {})
-        for user in includes.get("users", []) or []:
-            _upsert_x_user(user)
-        db.session.commit()
-    return response
+        _upsert_x_users(includes.get("users", []))
+
+    return _finish_batched_lookup(url, responses, payloads, echo=False)
 
 
 def get_x_spaces_search(query: str, state: str = "all", max_results: int = 100, next_token: str | None = None) -> Any:
@@ -1271,7 +1656,7 @@ def get_x_spaces_search(query: str, state: str = "all", max_results: int = 100,
         params["next_token"] = next_token
 
     headers = {"Authorization": f"Bearer {token}"}
-    response = requests.get(
+    response = x_http.get(
         "https://api.x.com/2/spaces/search",
         headers=headers,
         params=params,
@@ -1287,13 +1672,9 @@ def get_x_spaces_search(query: str, state: str = "all", max_results: int = 100,
     )
     payload = response.json() if response.headers.get("Content-Type", "").startswith("application/json") else None
     if payload and payload.get("data"):
-        for space_payload in payload.get("data", []) or []:
-            space = _upsert_x_space(space_payload)
-            if space:
-                _record_space_snapshot(space, space_payload, "spaces_search")
+        _record_space_snapshots(payload.get("data") or [], "spaces_search")
         includes = payload.get("includes", {})
-        for user in includes.get("users", []) or []:
-            _upsert_x_user(user)
+        _upsert_x_users(includes.get("users", []))
         db.session.commit()
     return response
 
@@ -1317,7 +1698,7 @@ def get_x_space_posts(space_id: str, max_results: int = 100) -> Any:
     }
 
     headers = {"Authorization": f"Bearer {token}"}
-    response = requests.get(
+    response = x_http.get(
         f"https://api.x.com/2/spaces/{cleaned}/tweets",
         headers=headers,
         params=params,
@@ -1333,11 +1714,9 @@ def get_x_space_posts(space_id: str, max_results: int = 100) -> Any:
     )
     payload = response.json() if response.headers.get("Content-Type", "").startswith("application/json") else None
     if payload and payload.get("data"):
-        for post in payload.get("data", []) or []:
-            _upsert_x_post(post)
+        _upsert_x_posts(payload.get("data", []))
         includes = payload.get("includes", {})
-        for user in includes.get("users", []) or []:
-            _upsert_x_user(user)
+        _upsert_x_users(includes.get("users", []))
         db.session.commit()
     return response
 
@@ -1365,7 +1744,7 @@ def get_x_muted_users(max_results: int = 100, pagination_token: str | None = Non
         return payload
 
     response = call_x_api_with_refresh(
-        requests.get,
+        x_http.get,
         f"https://api.x.com/2/users/{x_user_id}/muting",
         params={
             "max_results": max_results,
@@ -1399,8 +1778,7 @@ def get_x_muted_users(max_results: int = 100, pagination_token: str | None = Non
         db.session.commit()
         return response
 
-    for user in payload.get("data", []) or []:
-        _upsert_x_user(user)
+    _upsert_x_users(payload.get("data", []))
 
     db.session.commit()
 
@@ -1424,7 +1802,7 @@ def mute_x_user(target_user_id: str) -> Any:
         return payload
 
     response = call_x_api_with_refresh(
-        requests.post,
+        x_http.post,
         f"https://api.x.com/2/users/{x_user_id}/muting",
         json={"target_user_id": str(target_user_id)},
         timeout=10,
@@ -1469,7 +1847,7 @@ def unmute_x_user(target_user_id: str) -> Any:
         return payload
 
     response = call_x_api_with_refresh(
-        requests.delete,
+        x_http.delete,
         f"https://api.x.com/2/users/{x_user_id}/muting/{target_user_id}",
         timeout=10,
     )
@@ -1499,7 +1877,7 @@ def unmute_x_user(target_user_id: str) -> Any:
 
 def get_x_liked_posts(user_id: str, max_results: int = 100, pagination_token: str | None = None) -> Any:
     response = call_x_api_with_refresh(
-        requests.get,
+        x_http.get,
         f"https://api.x.com/2/users/{user_id}/liked_tweets",
         params={
             "max_results": max_results,
@@ -1533,12 +1911,8 @@ def get_x_liked_posts(user_id: str, max_results: int = 100, pagination_token: st
         db.session.commit()
         return response
 
-    for post in payload.get("data", []) or []:
-        _upsert_x_post(post)
-
     includes = payload.get("includes", {})
-    for post in includes.get("tweets", []) or []:
-        _upsert_x_post(post)
+    _upsert_x_posts([*_as_list(payload.get("data")), *(includes.get("tweets") or [])])
 
     db.session.commit()
 
@@ -1552,7 +1926,7 @@ def get_x_liking_users(
     pagination_token: str | None = None,
 ) -> Any:
     response = call_x_api_with_refresh(
-        requests.get,
+        x_http.get,
         f"https://api.x.com/2/tweets/{post_id}/liking_users",
         params={
             "max_results": max_results,
@@ -1586,8 +1960,7 @@ def get_x_liking_users(
         db.session.commit()
         return response
 
-    for user in payload.get("data", []) or []:
-        _upsert_x_user(user)
+    _upsert_x_users(payload.get("data", []))
 
     db.session.commit()
 
@@ -1611,7 +1984,7 @@ def like_x_post(post_id: str) -> Any:
         return payload
 
     response = call_x_api_with_refresh(
-        requests.post,
+        x_http.post,
         f"https://api.x.com/2/users/{x_user_id}/likes",
         json={"tweet_id": str(post_id)},
         timeout=10,
@@ -1656,7 +2029,7 @@ def unlike_x_post(post_id: str) -> Any:
         return payload
 
     response = call_x_api_with_refresh(
-        requests.delete,
+        x_http.delete,
         f"https://api.x.com/2/users/{x_user_id}/likes/{post_id}",
         timeout=10,
     )
@@ -1686,7 +2059,7 @@ def unlike_x_post(post_id: str) -> Any:
 
 def create_x_post(payload: Mapping[str, Any]) -> Any:
     response = call_x_api_with_refresh(
-        requests.post,
+        x_http.post,
         "https://api.x.com/2/tweets",
         json=payload,
         timeout=10,
@@ -1717,7 +2090,7 @@ def create_x_post(payload: Mapping[str, Any]) -> Any:
 
 def delete_x_post(post_id: str) -> Any:
     response = call_x_api_with_refresh(
-        requests.delete,
+        x_http.delete,
         f"https://api.x.com/2/tweets/{post_id}",
         timeout=10,
     )
@@ -1761,7 +2134,7 @@ def repost_x_post(post_id: str) -> Any:
         return payload
 
     response = call_x_api_with_refresh(
-        requests.post,
+        x_http.post,
         f"https://api.x.com/2/users/{x_user_id}/retweets",
         json={"tweet_id": str(post_id)},
         timeout=10,
@@ -1806,7 +2179,7 @@ def unrepost_x_post(post_id: str) -> Any:
         return payload
 
     response = call_x_api_with_refresh(
-        requests.delete,
+        x_http.delete,
         f"https://api.x.com/2/users/{x_user_id}/retweets/{post_id}",
         timeout=10,
     )
@@ -1839,7 +2212,7 @@ def get_x_reposts_of_me(
     pagination_token: str | None = None,
 ) -> Any:
     response = call_x_api_with_refresh(
-        requests.get,
+        x_http.get,
         "https://api.x.com/2/users/reposts_of_me",
         params={
             "max_results": max_results,
@@ -1911,7 +2284,7 @@ def get_x_quote_tweets(
     if exclude:
         params["exclude"] = ",".join(exclude)
 
-    response = requests.get(
+    response = x_http.get(
         f"https://api.x.com/2/tweets/{post_id}/quote_tweets",
         headers={"Authorization": f"Bearer {token}"},
         params=params,
@@ -1944,7 +2317,7 @@ def get_x_post_by_id(post_id: str) -> Any:
         print(payload["error"])
         return payload
 
-    response = requests.get(
+    response = x_http.get(
         f"https://api.x.com/2/tweets/{post_id}",
         headers={"Authorization": f"Bearer {token}"},
         params={
@@ -1977,45 +2350,39 @@ def get_x_post_by_id(post_id: str) -> Any:
     return response
 
 
-def get_x_posts_by_ids(post_ids: list[str]) -> Any:
+def get_x_posts_by_ids(post_ids: list[str] | str) -> Any:
     token = get_app_var("X_BEARER_TOKEN")
     if not token:
         payload = {"error": "Missing X_BEARER_TOKEN; update .env or app_vars before calling."}
         print(payload["error"])
         return payload
 
-    response = requests.get(
-        "https://api.x.com/2/tweets",
-        headers={"Authorization": f"Bearer {token}"},
-        params={
-            "ids": ",".join(post_ids),
-            "tweet.fields": ",".join(_filter_fields(TWEET_FIELDS)),
-            "expansions": ",".join(_filter_fields(TWEET_EXPANSIONS)),
-            "user.fields": ",".join(_filter_fields(USER_FIELDS)),
-            "media.fields": ",".join(_filter_fields(MEDIA_FIELDS)),
-            "poll.fields": ",".join(_filter_fields(POLL_FIELDS)),
-            "place.fields": ",".join(_filter_fields(PLACE_FIELDS)),
-        },
-        timeout=10,
-    )
-    _log_api_request(
-        "GET",
-        response.url,
-        response.status_code,
-        response.text,
-        dict(response.headers),
-    )
-    payload = response.json() if response.headers.get("Content-Type", "").startswith("application/json") else None
-    if not payload or "data" not in payload:
-        print(response.text)
-        db.session.commit()
-        return response
+    if isinstance(post_ids, str):
+        post_ids = [item.strip() for item in post_ids.split(",")]
+    cleaned = [str(item).strip() for item in post_ids if str(item).strip()]
+    if not cleaned:
+        print("Provide at least one post id.")
+        return None
 
-    _store_post_payload(payload)
-    db.session.commit()
+    url = "https://api.x.com/2/tweets"
+    params = {
+        "tweet.fields": ",".join(_filter_fields(TWEET_FIELDS)),
+        "expansions": ",".join(_filter_fields(TWEET_EXPANSIONS)),
+        "user.fields": ",".join(_filter_fields(USER_FIELDS)),
+        "media.fields": ",".join(_filter_fields(MEDIA_FIELDS)),
+        "poll.fields": ",".join(_filter_fields(POLL_FIELDS)),
+        "place.fields": ",".join(_filter_fields(PLACE_FIELDS)),
+    }
 
-    print(json.dumps(payload, indent=4))
-    return response
+    headers = {"Authorization": f"Bearer {token}"}
+    responses = _get_in_id_batches(url, "ids", cleaned, params, headers)
+    payloads = [_log_batch_response(response) for response in responses]
+    for payload in payloads:
+        if not payload or "data" not in payload:
+            continue
+        _store_post_payload(payload)
+
+    return _finish_batched_lookup(url, responses, payloads)
 
 
 def search_x_posts_recent(
@@ -2060,7 +2427,7 @@ def search_x_posts_recent(
     if sort_order:
         params["sort_order"] = sort_order
 
-    response = requests.get(
+    response = x_http.get(
         "https://api.x.com/2/tweets/search/recent",
         headers={"Authorization": f"Bearer {token}"},
         params=params,
@@ -2086,6 +2453,41 @@ def search_x_posts_recent(
     return response
 
 
+def search_local_posts(query: str, page: int = 1, per_page: int = 20, sort: str = "relevance") -> dict[str, Any]:
+    """Search stored posts through the local full-text index; never calls X."""
+    per_page = min(max(per_page, 1), 100)
+    page = max(page, 1)
+    found = post_search_index.search(query, page=page, per_page=per_page, sort=sort)
+    posts = {post.id: post for post in XPost.query.filter(XPost.id.in_(found["post_ids"])).all()} if found["post_ids"] else {}
+    results = []
+    for post_id in found["post_ids"]:
+        post = posts.get(post_id)
+        if post is None:
+            continue
+        results.append(
+            {
+                "id": str(post.id),
+                "text": post.text,
+                "author_id": str(post.author_id),
+                "username": post.author.username if post.author else None,
+                "created_at": post.created_at.isoformat() if post.created_at else None,
+                "lang": post.lang,
+                "like_count": post.like_count,
+                "repost_count": post.repost_count,
+                "reply_count": post.reply_count,
+            }
+        )
+    return {
+        "query": query,
+        "sort": sort,
+        "page": page,
+        "per_page": per_page,
+        "total": found["total"],
+        "pages": (found["total"] + per_page - 1) // per_page,
+        "results": results,
+    }
+
+
 def search_x_posts_all(
     query: str,
     max_results: int = 10,
@@ -2128,7 +2530,7 @@ def search_x_posts_all(
     if sort_order:
         params["sort_order"] = sort_order
 
-    response = requests.get(
+    response = x_http.get(
         "https://api.x.com/2/tweets/search/all",
         headers={"Authorization": f"Bearer {token}"},
         params=params,
@@ -2189,7 +2591,7 @@ def get_x_posts_counts_recent(
     if pagination_token:
         params["pagination_token"] = pagination_token
 
-    response = requests.get(
+    response = x_http.get(
         "https://api.x.com/2/tweets/counts/recent",
         headers={"Authorization": f"Bearer {token}"},
         params=params,
@@ -2241,7 +2643,7 @@ def get_x_posts_counts_all(
     if pagination_token:
         params["pagination_token"] = pagination_token
 
-    response = requests.get(
+    response = x_http.get(
         "https://api.x.com/2/tweets/counts/all",
         headers={"Authorization": f"Bearer {token}"},
         params=params,
@@ -2291,7 +2693,7 @@ def get_x_user_posts(
         params["exclude"] = ",".join(exclude)
 
     response = call_x_api_with_refresh(
-        requests.get,
+        x_http.get,
         f"https://api.x.com/2/users/{user_id}/tweets",
         params=params,
         timeout=10,
@@ -2358,7 +2760,7 @@ def get_x_user_mentions(
         params["end_time"] = end_time
 
     response = call_x_api_with_refresh(
-        requests.get,
+        x_http.get,
         f"https://api.x.com/2/users/{user_id}/mentions",
         params=params,
         timeout=10,
@@ -2428,7 +2830,7 @@ def get_x_home_timeline(
         params["exclude"] = ",".join(exclude)
 
     response = call_x_api_with_refresh(
-        requests.get,
+        x_http.get,
         f"https://api.x.com/2/users/{user_id}/timelines/reverse_chronological",
         params=params,
         timeout=10,
@@ -2467,7 +2869,7 @@ def get_x_home_timeline(
 
 def get_x_community_by_id(community_id: str) -> Any:
     response = call_x_api_with_refresh(
-        requests.get,
+        x_http.get,
         f"https://api.x.com/2/communities/{community_id}",
         params={"community.fields": ",".join(_filter_fields(COMMUNITY_FIELDS))},
         timeout=10,
@@ -2520,7 +2922,7 @@ def search_x_communities(
         params["pagination_token"] = pagination_token
 
     response = call_x_api_with_refresh(
-        requests.get,
+        x_http.get,
         "https://api.x.com/2/communities/search",
         params=params,
         timeout=10,
@@ -2562,7 +2964,7 @@ def get_x_trends_by_woeid(woeid: int, max_trends: int = 20) -> Any:
         print("Missing X_BEARER_TOKEN; update .env or app_vars before calling.")
         return None
 
-    response = requests.get(
+    response = x_http.get(
         f"https://api.x.com/2/trends/by/woeid/{woeid}",
         headers={"Authorization": f"Bearer {token}"},
         params={
@@ -2594,7 +2996,7 @@ def get_x_trends_by_woeid(woeid: int, max_trends: int = 20) -> Any:
 
 def get_x_personalized_trends() -> Any:
     response = call_x_api_with_refresh(
-        requests.get,
+        x_http.get,
         "https://api.x.com/2/users/personalized_trends",
         params={
             "personalized_trend.fields": ",".join(_filter_fields(PERSONALIZED_TREND_FIELDS)),
@@ -2647,7 +3049,7 @@ def _store_usage_snapshot(
     user_id: int | None = None,
 ) -> None:
     if user_id is None:
-        user_id = session.get("user_id")
+        user_id = get_current_identity()[0]
     if not user_id:
         return
     snapshot = XUsageSnapshot(
@@ -2663,6 +3065,66 @@ def _store_usage_snapshot(
         raw_usage_data=usage,
     )
     db.session.add(snapshot)
+    _store_usage_daily(_usage_daily_rows(usage, user_id))
+
+
+def _usage_daily_rows(usage: Mapping[str, Any], user_id: int) -> list[dict[str, Any]]:
+    """Flatten a usage payload's daily series into ``XUsageDaily`` rows."""
+    project = usage.get("daily_project_usage") or {}
+    project_id = str(project.get("project_id") or usage.get("project_id") or "")
+    series = [("", project.get("usage"))]
+    series += [
+        (str(app_usage.get("client_app_id") or ""), app_usage.get("usage"))
+        for app_usage in usage.get("daily_client_app_usage") or []
+        if isinstance(app_usage, Mapping) and app_usage.get("client_app_id")
+    ]
+    now = datetime.utcnow()
+    rows: dict[tuple[str, Any], dict[str, Any]] = {}
+    for client_app_id, points in series:
+        for point in points or []:
+            if not isinstance(point, Mapping):
+                continue
+            day = _parse_iso8601(point.get("date"))
+            if day is None:
+                continue
+            rows[(client_app_id, day.date())] = {
+                "user_id": user_id,
+                "project_id": project_id,
+                "client_app_id": client_app_id,
+                "day": day.date(),
+                "usage": _safe_int(point.get("usage")) or 0,
+                "updated_at": now,
+            }
+    return list(rows.values())
+
+
+def _store_usage_daily(rows: list[dict[str, Any]]) -> None:
+    """Upsert daily usage rows; a later snapshot overwrites the days it shares with earlier ones."""
+    if not rows:
+        return
+    insert = _upsert_insert()
+    if insert is None:
+        for values in rows:
+            record = XUsageDaily.query.filter_by(
+                user_id=values["user_id"],
+                project_id=values["project_id"],
+                client_app_id=values["client_app_id"],
+                day=values["day"],
+            ).first()
+            if record is None:
+                db.session.add(XUsageDaily(**values))
+            else:
+                record.usage = values["usage"]
+                record.updated_at = values["updated_at"]
+        return
+    stmt = insert(XUsageDaily.__table__)
+    db.session.execute(
+        stmt.on_conflict_do_update(
+            index_elements=["user_id", "project_id", "client_app_id", "day"],
+            set_={"usage": stmt.excluded.usage, "updated_at": stmt.excluded.updated_at},
+        ),
+        rows,
+    )
 
 
 def get_x_news_by_id(news_id: str) -> Any:
@@ -2672,7 +3134,7 @@ def get_x_news_by_id(news_id: str) -> Any:
         print(payload["error"])
         return payload
 
-    response = requests.get(
+    response = x_http.get(
         f"https://api.x.com/2/news/{news_id}",
         headers={"Authorization": f"Bearer {token}"},
         params={"news.fields": ",".join(_filter_fields(NEWS_FIELDS))},
@@ -2716,7 +3178,7 @@ def create_x_activity_subscription(
     if webhook_id:
         body["webhook_id"] = webhook_id
 
-    response = requests.post(
+    response = x_http.post(
         "https://api.x.com/2/activity/subscriptions",
         headers={"Authorization": f"Bearer {token}"},
         json=body,
@@ -2740,7 +3202,7 @@ def get_x_activity_subscriptions() -> Any:
         print(payload["error"])
         return payload
 
-    response = requests.get(
+    response = x_http.get(
         "https://api.x.com/2/activity/subscriptions",
         headers={"Authorization": f"Bearer {token}"},
         timeout=10,
@@ -2773,7 +3235,7 @@ def update_x_activity_subscription(
     if webhook_id:
         body["webhook_id"] = webhook_id
 
-    response = requests.put(
+    response = x_http.put(
         f"https://api.x.com/2/activity/subscriptions/{subscription_id}",
         headers={"Authorization": f"Bearer {token}"},
         json=body,
@@ -2797,7 +3259,7 @@ def delete_x_activity_subscription(subscription_id: str) -> Any:
         print(payload["error"])
         return payload
 
-    response = requests.delete(
+    response = x_http.delete(
         f"https://api.x.com/2/activity/subscriptions/{subscription_id}",
         headers={"Authorization": f"Bearer {token}"},
         timeout=10,
@@ -2820,7 +3282,7 @@ def get_x_usage_tweets(days: int = 1, hours: int | None = None) -> Any:
         print(payload["error"])
         return payload
 
-    response = requests.get(
+    response = x_http.get(
         "https://api.x.com/2/usage/tweets",
         headers={"Authorization": f"Bearer {token}"},
         params={
@@ -2860,7 +3322,7 @@ def search_x_news(
         print(payload["error"])
         return payload
 
-    response = requests.get(
+    response = x_http.get(
         "https://api.x.com/2/news/search",
         headers={"Authorization": f"Bearer {token}"},
         params={
@@ -2893,7 +3355,7 @@ def search_x_news(
 
 def get_x_list_by_id(list_id: str) -> Any:
     response = call_x_api_with_refresh(
-        requests.get,
+        x_http.get,
         f"https://api.x.com/2/lists/{list_id}",
         params={
             "list.fields": ",".join(_filter_fields(LIST_FIELDS)),
@@ -2928,8 +3390,7 @@ def get_x_list_by_id(list_id: str) -> Any:
         return response
 
     includes = payload.get("includes", {})
-    for user in includes.get("users", []) or []:
-        _upsert_x_user(user)
+    _upsert_x_users(includes.get("users", []))
 
     db.session.commit()
 
@@ -2943,7 +3404,7 @@ def get_x_user_followed_lists(
     pagination_token: str | None = None,
 ) -> Any:
     response = call_x_api_with_refresh(
-        requests.get,
+        x_http.get,
         f"https://api.x.com/2/users/{user_id}/followed_lists",
         params={
             "max_results": max_results,
@@ -2980,8 +3441,7 @@ def get_x_user_followed_lists(
         return response
 
     includes = payload.get("includes", {})
-    for user in includes.get("users", []) or []:
-        _upsert_x_user(user)
+    _upsert_x_users(includes.get("users", []))
 
     db.session.commit()
 
@@ -2995,7 +3455,7 @@ def get_x_user_owned_lists(
     pagination_token: str | None = None,
 ) -> Any:
     response = call_x_api_with_refresh(
-        requests.get,
+        x_http.get,
         f"https://api.x.com/2/users/{user_id}/owned_lists",
         params={
             "max_results": max_results,
@@ -3032,8 +3492,7 @@ def get_x_user_owned_lists(
         return response
 
     includes = payload.get("includes", {})
-    for user in includes.get("users", []) or []:
-        _upsert_x_user(user)
+    _upsert_x_users(includes.get("users", []))
 
     db.session.commit()
 
@@ -3047,7 +3506,7 @@ def get_x_user_list_memberships(
     pagination_token: str | None = None,
 ) -> Any:
     response = call_x_api_with_refresh(
-        requests.get,
+        x_http.get,
         f"https://api.x.com/2/users/{user_id}/list_memberships",
         params={
             "max_results": max_results,
@@ -3084,8 +3543,7 @@ def get_x_user_list_memberships(
         return response
 
     includes = payload.get("includes", {})
-    for user in includes.get("users", []) or []:
-        _upsert_x_user(user)
+    _upsert_x_users(includes.get("users", []))
 
     db.session.commit()
 
@@ -3099,7 +3557,7 @@ def get_x_list_tweets(
     pagination_token: str | None = None,
 ) -> Any:
     response = call_x_api_with_refresh(
-        requests.get,
+        x_http.get,
         f"https://api.x.com/2/lists/{list_id}/tweets",
         params={
             "max_results": max_results,
@@ -3135,14 +3593,9 @@ def get_x_list_tweets(
         db.session.commit()
         return response
 
-    for post in payload.get("data", []) or []:
-        _upsert_x_post(post)
-
     includes = payload.get("includes", {})
-    for post in includes.get("tweets", []) or []:
-        _upsert_x_post(post)
-    for user in includes.get("users", []) or []:
-        _upsert_x_user(user)
+    _upsert_x_posts([*_as_list(payload.get("data")), *(includes.get("tweets") or [])])
+    _upsert_x_users(includes.get("users", []))
 
     db.session.commit()
 
@@ -3156,7 +3609,7 @@ def get_x_list_followers(
     pagination_token: str | None = None,
 ) -> Any:
     response = call_x_api_with_refresh(
-        requests.get,
+        x_http.get,
         f"https://api.x.com/2/lists/{list_id}/followers",
         params={
             "max_results": max_results,
@@ -3190,8 +3643,7 @@ def get_x_list_followers(
         db.session.commit()
         return response
 
-    for user in payload.get("data", []) or []:
-        _upsert_x_user(user)
+    _upsert_x_users(payload.get("data", []))
 
     db.session.commit()
 
@@ -3205,7 +3657,7 @@ def get_x_list_members(
     pagination_token: str | None = None,
 ) -> Any:
     response = call_x_api_with_refresh(
-        requests.get,
+        x_http.get,
         f"https://api.x.com/2/lists/{list_id}/members",
         params={
             "max_results": max_results,
@@ -3239,8 +3691,7 @@ def get_x_list_members(
         db.session.commit()
         return response
 
-    for user in payload.get("data", []) or []:
-        _upsert_x_user(user)
+    _upsert_x_users(payload.get("data", []))
 
     db.session.commit()
 
@@ -3255,7 +3706,7 @@ def create_x_list(name: str, description: str | None = None, private: bool = Fal
     payload["private"] = bool(private)
 
     response = call_x_api_with_refresh(
-        requests.post,
+        x_http.post,
         "https://api.x.com/2/lists",
         json=payload,
         timeout=10,
@@ -3299,7 +3750,7 @@ def update_x_list(
         payload["private"] = bool(private)
 
     response = call_x_api_with_refresh(
-        requests.put,
+        x_http.put,
         f"https://api.x.com/2/lists/{list_id}",
         json=payload,
         timeout=10,
@@ -3330,7 +3781,7 @@ def update_x_list(
 
 def delete_x_list(list_id: str) -> Any:
     response = call_x_api_with_refresh(
-        requests.delete,
+        x_http.delete,
         f"https://api.x.com/2/lists/{list_id}",
         timeout=10,
     )
@@ -3374,7 +3825,7 @@ def follow_x_list(list_id: str) -> Any:
         return payload
 
     response = call_x_api_with_refresh(
-        requests.post,
+        x_http.post,
         f"https://api.x.com/2/users/{x_user_id}/followed_lists",
         json={"list_id": str(list_id)},
         timeout=10,
@@ -3419,7 +3870,7 @@ def unfollow_x_list(list_id: str) -> Any:
         return payload
 
     response = call_x_api_with_refresh(
-        requests.delete,
+        x_http.delete,
         f"https://api.x.com/2/users/{x_user_id}/followed_lists/{list_id}",
         timeout=10,
     )
@@ -3449,7 +3900,7 @@ def unfollow_x_list(list_id: str) -> Any:
 
 def add_x_list_member(list_id: str, user_id: str) -> Any:
     response = call_x_api_with_refresh(
-        requests.post,
+        x_http.post,
         f"https://api.x.com/2/lists/{list_id}/members",
         json={"user_id": str(user_id)},
         timeout=10,
@@ -3480,7 +3931,7 @@ def add_x_list_member(list_id: str, user_id: str) -> Any:
 
 def remove_x_list_member(list_id: str, user_id: str) -> Any:
     response = call_x_api_with_refresh(
-        requests.delete,
+        x_http.delete,
         f"https://api.x.com/2/lists/{list_id}/members/{user_id}",
         timeout=10,
     )
@@ -3510,7 +3961,7 @@ def remove_x_list_member(list_id: str, user_id: str) -> Any:
 
 def get_x_user_pinned_lists(user_id: str) -> Any:
     response = call_x_api_with_refresh(
-        requests.get,
+        x_http.get,
         f"https://api.x.com/2/users/{user_id}/pinned_lists",
         params={
             "list.fields": ",".join(_filter_fields(LIST_FIELDS)),
@@ -3545,8 +3996,7 @@ def get_x_user_pinned_lists(user_id: str) -> Any:
         return response
 
     includes = payload.get("includes", {})
-    for user in includes.get("users", []) or []:
-        _upsert_x_user(user)
+    _upsert_x_users(includes.get("users", []))
 
     db.session.commit()
 
@@ -3570,7 +4020,7 @@ def pin_x_list(list_id: str) -> Any:
         return payload
 
     response = call_x_api_with_refresh(
-        requests.post,
+        x_http.post,
         f"https://api.x.com/2/users/{x_user_id}/pinned_lists",
         json={"list_id": str(list_id)},
         timeout=10,
@@ -3615,7 +4065,7 @@ def unpin_x_list(list_id: str) -> Any:
         return payload
 
     response = call_x_api_with_refresh(
-        requests.delete,
+        x_http.delete,
         f"https://api.x.com/2/users/{x_user_id}/pinned_lists/{list_id}",
         timeout=10,
     )
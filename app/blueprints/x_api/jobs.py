@@ -0,0 +1,176 @@
+from typing import Any
+
+from app.blueprints.x_api.helpers import (
+    X_LOOKUP_BATCH_SIZE,
+    _json_payload,
+    get_x_spaces_by_ids,
+    get_x_users_by_ids,
+    get_x_users_by_ids_with_app_token,
+    get_x_users_by_usernames,
+    search_x_posts_all,
+    search_x_posts_recent,
+)
+from app.blueprints.x_api.media_upload import MediaUploadEngine
+from app.blueprints.x_api.pagination import XPaginator
+from app.blueprints.x_api.spaces_poller import is_space_id
+from app.blueprints.x_api.trend_collector import collect_trends
+from app.extensions import db
+from app.models import XApiJob, XMediaUpload, XSpace
+from app.services.jobs import job_handler, report_progress
+
+SEARCH_FETCHERS = {"recent": search_x_posts_recent, "all": search_x_posts_all}
+
+# Job kinds users may queue directly through POST /x/jobs.
+USER_JOB_KINDS = {"users_lookup", "search_crawl", "space_poll", "space_refresh_users"}
+
+
+def _positive_int(value: Any) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool) and value > 0
+
+
+def _id_list(value: Any) -> bool:
+    return isinstance(value, list) and bool(value) and all(isinstance(item, (str, int)) and str(item).strip() for item in value)
+
+
+def job_params_error(kind: str, params: dict[str, Any]) -> str | None:
+    """Why ``params`` cannot run as a ``kind`` job, or None when they can."""
+    if kind == "users_lookup":
+        if not (_id_list(params.get("usernames")) or _id_list(params.get("ids"))):
+            return "users_lookup needs a non-empty usernames or ids list."
+    elif kind == "search_crawl":
+        if not isinstance(params.get("query"), str) or not params["query"].strip():
+            return "search_crawl needs a query."
+        if params.get("archive", "recent") not in SEARCH_FETCHERS:
+            return f"archive must be one of {sorted(SEARCH_FETCHERS)}."
+        for key in ("max_results", "max_pages", "max_items"):
+            if params.get(key) is not None and not _positive_int(params[key]):
+                return f"{key} must be a positive integer."
+    elif kind in ("space_poll", "space_refresh_users"):
+        if not isinstance(params.get("space_id"), str) or not is_space_id(params["space_id"]):
+            return f"{kind} needs a space_id of 1-13 letters and digits."
+    return None
+
+
+def _check_response(response: Any) -> dict[str, Any]:
+    """Raise for failed helper responses so the queue retries them."""
+    if response is None:
+        raise RuntimeError("Unable to call X API; check your credentials.")
+    if isinstance(response, dict):
+        if response.get("error"):
+            raise RuntimeError(response["error"])
+        return response
+    if response.status_code >= 400:
+        raise RuntimeError(f"X API returned status {response.status_code}.")
+    payload = _json_payload(response)
+    return payload if isinstance(payload, dict) else {}
+
+
+def space_user_ids(space: XSpace) -> list[str]:
+    raw = space.raw_space_data or {}
+    ids = set()
+    if raw.get("creator_id"):
+        ids.add(str(raw["creator_id"]))
+    for key in ("host_ids", "speaker_ids", "invited_user_ids"):
+        for value in raw.get(key, []) or []:
+            if value:
+                ids.add(str(value))
+    return sorted(ids)
+
+
+@job_handler("media_upload")
+def run_media_upload(job: XApiJob) -> dict[str, Any]:
+    params = job.params or {}
+    upload = db.session.get(XMediaUpload, params["upload_id"])
+    if upload is None:
+        return {"status": "missing"}
+
+    def on_progress(done: int, total: int) -> None:
+        report_progress(job, done, total)
+
+    # Retries resume from the segments already acknowledged, so only the first attempt may restart.
+    restart = bool(params.get("restart")) and job.attempts <= 1
+    engine = MediaUploadEngine.from_config()
+    engine.on_progress = on_progress
+    # Jobs queued before the flag was stored on the upload still carry it in their params.
+    engine.run(upload, restart=restart, shared=params.get("shared"))
+    if upload.status == "failed":
+        raise RuntimeError(upload.error_message or "Upload failed.")
+    return {"status": upload.status, "media_id": upload.media_id}
+
+
+@job_handler("space_poll")
+def run_space_poll(job: XApiJob) -> dict[str, Any]:
+    space_id = job.params["space_id"]
+    payload = _check_response(get_x_spaces_by_ids([space_id], use_local=False))
+    return {"space_id": space_id, "found": bool(payload.get("data"))}
+
+
+@job_handler("trends_collect", max_attempts=1)
+def run_trends_collect(job: XApiJob) -> dict[str, Any]:
+    # One cycle per job; the next scheduled cycle picks up anything deferred or failed.
+    report = collect_trends((job.params or {}).get("woeids") or None)
+    if report.get("error"):
+        raise RuntimeError(report["error"])
+    return report
+
+
+@job_handler("space_refresh_users")
+def run_space_refresh_users(job: XApiJob) -> dict[str, Any]:
+    space_id = job.params["space_id"]
+    space = XSpace.query.filter_by(id=space_id).first()
+    if space is None:
+        return {"space_id": space_id, "users": 0}
+    ids = space_user_ids(space)
+    if ids:
+        _check_response(get_x_users_by_ids_with_app_token(ids))
+    return {"space_id": space_id, "users": len(ids)}
+
+
+@job_handler("users_lookup")
+def run_users_lookup(job: XApiJob) -> dict[str, Any]:
+    params = job.params or {}
+    if params.get("usernames"):
+        fetch, values = get_x_users_by_usernames, list(params["usernames"])
+    else:
+        fetch, values = get_x_users_by_ids, [str(value) for value in params.get("ids") or []]
+    # Resume after the last batch a previous attempt finished.
+    checkpoint = job.result or {}
+    start = checkpoint.get("next_index", 0)
+    found = checkpoint.get("found", 0)
+    for index in range(start, len(values), X_LOOKUP_BATCH_SIZE):
+        payload = _check_response(fetch(values[index:index + X_LOOKUP_BATCH_SIZE]))
+        found += len(payload.get("data") or [])
+        done = min(index + X_LOOKUP_BATCH_SIZE, len(values))
+        report_progress(job, done, len(values), result={"next_index": done, "found": found})
+    return {"requested": len(values), "found": found}
+
+
+@job_handler("search_crawl")
+def run_search_crawl(job: XApiJob) -> dict[str, Any]:
+    params = job.params or {}
+    # A retry continues from the cursor the previous attempt saved.
+    checkpoint = job.result or {}
+    items = checkpoint.get("items", 0)
+    pages = checkpoint.get("pages", 0)
+    max_items = params.get("max_items")
+    max_pages = params.get("max_pages")
+    paginator = XPaginator(
+        SEARCH_FETCHERS[params.get("archive", "recent")],
+        params["query"],
+        max_results=params.get("max_results", 100),
+        max_pages=max_pages - pages if max_pages else None,
+        max_items=max_items - items if max_items else None,
+        since_id=params.get("since_id"),
+        cursor=checkpoint.get("cursor", params.get("cursor")),
+    )
+    for page in paginator.pages():
+        items += len(page["data"])
+        report_progress(
+            job,
+            items,
+            max_items,
+            result={"cursor": paginator.cursor, "items": items, "pages": pages + paginator.pages_fetched},
+        )
+    if paginator.error:
+        raise RuntimeError(f"Search stopped on error: {paginator.error}")
+    return {"cursor": paginator.cursor, "items": items, "pages": pages + paginator.pages_fetched}
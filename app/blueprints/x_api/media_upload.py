@@ -0,0 +1,246 @@
+import logging
+import math
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable
+
+import requests
+from flask import current_app
+
+from app.blueprints.auth.token_helpers import get_current_user_token, refresh_user_token
+from app.blueprints.x_api.helpers import _json_payload, _log_api_request, finalize_x_media_upload, initialize_x_media_upload
+from app.extensions import db
+from app.models import XMediaUpload
+from app.services.blob_store import media_store
+from app.services.http_client import x_http
+
+logger = logging.getLogger(__name__)
+
+MEDIA_UPLOAD_URL = "https://api.x.com/2/media/upload"
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+def parse_media_response(response: Any) -> tuple[dict, int | None]:
+    if isinstance(response, dict):
+        return response, None
+    payload = _json_payload(response)
+    if not isinstance(payload, dict):
+        payload = {"raw": response.text}
+    return payload, response.status_code
+
+
+def apply_media_response(upload: XMediaUpload, response: Any) -> None:
+    """Record the final upload (or FINALIZE) response on ``upload``."""
+    payload, status_code = parse_media_response(response) if response is not None else ({}, None)
+    upload.raw_response = payload
+    if payload.get("data"):
+        upload.media_id = payload["data"].get("id") or upload.media_id
+        upload.media_key = payload["data"].get("media_key") or upload.media_key
+        processing = payload["data"].get("processing_info") or {}
+        if processing.get("state") in {"pending", "in_progress"}:
+            upload.status = "processing"
+        elif upload.status not in {"failed"}:
+            upload.status = "uploaded"
+    if status_code and status_code >= 400:
+        upload.status = "failed"
+        upload.error_message = f"Upload failed with status {status_code}."
+    if payload.get("error"):
+        upload.status = "failed"
+        upload.error_message = payload.get("error")
+
+
+def _post_segment(
+    media_id: str,
+    segment_index: int,
+    blob_hash: str,
+    chunk_size: int,
+    headers: dict[str, str],
+    delay: float = 0,
+) -> requests.Response:
+    # Runs on a worker thread: read one segment from disk and send it, nothing else.
+    if delay:
+        time.sleep(delay)
+    with media_store.open(blob_hash) as handle:
+        handle.seek(segment_index * chunk_size)
+        chunk = handle.read(chunk_size)
+    return x_http.post(
+        MEDIA_UPLOAD_URL,
+        data={"command": "APPEND", "media_id": str(media_id), "segment_index": str(segment_index)},
+        files={"media": ("chunk", chunk, "application/octet-stream")},
+        headers=headers,
+        timeout=60,
+    )
+
+
+class MediaUploadEngine:
+    """Chunked INIT/APPEND/FINALIZE upload that streams from the media store.
+
+    APPENDs run concurrently and each finished segment is saved on the
+    ``XMediaUpload`` row, so calling ``run`` again after a crash only sends the
+    segments X has not acknowledged yet.
+    """
+
+    def __init__(self, chunk_size: int = 4 * 1024 * 1024, max_workers: int = 4, max_retries: int = 3) -> None:
+        self.chunk_size = chunk_size
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.on_progress: Callable[[int, int], None] | None = None
+
+    @classmethod
+    def from_config(cls) -> "MediaUploadEngine":
+        config = current_app.config
+        return cls(
+            chunk_size=int(config.get("X_MEDIA_CHUNK_SIZE", 4 * 1024 * 1024)),
+            max_workers=int(config.get("X_MEDIA_UPLOAD_WORKERS", 4)),
+            max_retries=int(config.get("X_MEDIA_SEGMENT_RETRIES", 3)),
+        )
+
+    def run(self, upload: XMediaUpload, restart: bool = False, shared: bool | None = None) -> XMediaUpload:
+        """Upload the missing segments; ``shared`` overrides (and updates) the flag stored on ``upload``."""
+        if shared is not None:
+            upload.shared = shared
+        if not upload.blob_hash or not media_store.exists(upload.blob_hash):
+            return self._fail(upload, "The stored file for this upload is missing.")
+
+        if restart or not upload.media_id or not upload.segment_count:
+            if not self._init(upload, bool(upload.shared)):
+                return upload
+
+        upload.status = "uploading"
+        upload.error_message = None
+        db.session.commit()
+        completed = set(upload.completed_segments or [])
+        pending = [index for index in range(upload.segment_count) if index not in completed]
+        if pending and not self._append(upload, pending):
+            return upload
+
+        response = finalize_x_media_upload(str(upload.media_id))
+        apply_media_response(upload, response)
+        db.session.commit()
+        return upload
+
+    def _init(self, upload: XMediaUpload, shared: bool) -> bool:
+        response = initialize_x_media_upload(
+            total_bytes=upload.stored_size,
+            media_type=upload.media_type or upload.content_type,
+            media_category=upload.media_category,
+            shared=shared,
+        )
+        payload, status_code = parse_media_response(response)
+        upload.raw_response = payload
+        media_id = (payload.get("data") or {}).get("id")
+        if status_code and status_code >= 400:
+            self._fail(upload, f"INIT failed with status {status_code}.")
+            return False
+        if payload.get("error") or not media_id:
+            self._fail(upload, payload.get("error") or "INIT failed.")
+            return False
+
+        upload.media_id = str(media_id)
+        upload.chunk_size = self.chunk_size
+        upload.segment_count = max(1, math.ceil(upload.stored_size / self.chunk_size))
+        upload.completed_segments = []
+        upload.bytes_uploaded = 0
+        db.session.commit()
+        return True
+
+    def _append(self, upload: XMediaUpload, pending: list[int]) -> bool:
+        token_info = get_current_user_token()
+        if not token_info:
+            self._fail(upload, "No X account linked yet.")
+            return False
+        headers = {"Authorization": f"Bearer {token_info['access_token']}"}
+
+        completed = set(upload.completed_segments or [])
+        attempts = {index: 0 for index in pending}
+        sent_with: dict[Any, str] = {}
+        refreshed = False
+        error = None
+
+        # Workers only do HTTP; logging and progress writes stay on this thread's session.
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+
+            def submit(index: int, delay: float = 0):
+                future = executor.submit(
+                    _post_segment, upload.media_id, index, upload.blob_hash, upload.chunk_size, dict(headers), delay
+                )
+                sent_with[future] = headers["Authorization"]
+                return future
+
+            futures = {submit(index): index for index in pending}
+            while futures:
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index = futures.pop(future)
+                    authorization = sent_with.pop(future, None)
+                    if future.cancelled():
+                        continue
+                    try:
+                        response = future.result()
+                    except requests.RequestException as exc:
+                        response = None
+                        failure = f"APPEND {index} failed: {exc}"
+                    else:
+                        _log_api_request("POST", response.url, response.status_code, response.text, dict(response.headers))
+                        failure = f"APPEND {index} failed with status {response.status_code}."
+
+                    if response is not None and response.status_code < 400:
+                        completed.add(index)
+                        upload.completed_segments = sorted(completed)
+                        upload.bytes_uploaded = sum(
+                            min(upload.chunk_size, upload.stored_size - done * upload.chunk_size) for done in completed
+                        )
+                        db.session.commit()
+                        if self.on_progress:
+                            self.on_progress(len(completed), upload.segment_count)
+                        continue
+
+                    if error:
+                        continue
+                    if response is not None and response.status_code == 401:
+                        # Segments in flight when the token expired were sent with the old one; resend
+                        # them with the refreshed token. Only a 401 on the current token refreshes.
+                        if authorization != headers["Authorization"]:
+                            futures[submit(index)] = index
+                            continue
+                        if not refreshed:
+                            refreshed = True
+                            token_info = refresh_user_token(token_info)
+                            if token_info:
+                                headers["Authorization"] = f"Bearer {token_info['access_token']}"
+                                futures[submit(index)] = index
+                                continue
+                    retryable = response is None or response.status_code in RETRYABLE_STATUS_CODES
+                    if retryable and attempts[index] < self.max_retries:
+                        attempts[index] += 1
+                        futures[submit(index, delay=2 ** attempts[index])] = index
+                        continue
+                    error = failure
+                    for other in futures:
+                        other.cancel()
+
+        if error:
+            self._fail(upload, error)
+            return False
+        return True
+
+    def _fail(self, upload: XMediaUpload, message: str) -> XMediaUpload:
+        upload.status = "failed"
+        upload.error_message = message
+        db.session.commit()
+        return upload
+
+
+def start_media_upload(upload: XMediaUpload, restart: bool = False) -> bool:
+    """Queue the chunked upload for a job worker; False if it is already queued or running.
+
+    The job INITs with the ``shared`` flag stored on ``upload``.
+    """
+    from app.services.jobs import job_queue
+
+    _, created = job_queue.enqueue(
+        "media_upload",
+        {"upload_id": upload.id, "restart": restart},
+        dedupe_key=f"media_upload:{upload.id}",
+    )
+    return created
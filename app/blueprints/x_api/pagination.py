@@ -0,0 +1,171 @@
+import inspect
+from typing import Any, Callable, Iterator
+
+from app.blueprints.x_api.helpers import (
+    _json_payload,
+    get_x_home_timeline,
+    get_x_liked_posts,
+    get_x_list_followers,
+    get_x_list_members,
+    get_x_muted_users,
+    get_x_user_mentions,
+    get_x_user_posts,
+    get_x_users_search,
+    search_x_posts_all,
+    search_x_posts_recent,
+)
+
+# Name of the keyword each helper uses to request the next page.
+PAGE_TOKEN_PARAMS: dict[Callable[..., Any], str] = {
+    search_x_posts_recent: "next_token",
+    search_x_posts_all: "next_token",
+    get_x_user_posts: "pagination_token",
+    get_x_user_mentions: "pagination_token",
+    get_x_home_timeline: "pagination_token",
+    get_x_liked_posts: "pagination_token",
+    get_x_list_members: "pagination_token",
+    get_x_list_followers: "pagination_token",
+    get_x_muted_users: "pagination_token",
+    get_x_users_search: "next_token",
+}
+
+# Helpers whose records come newest first by id, so ``since_id`` marks where to stop.
+CHRONOLOGICAL_HELPERS = {
+    search_x_posts_recent,
+    search_x_posts_all,
+    get_x_user_posts,
+    get_x_user_mentions,
+    get_x_home_timeline,
+}
+
+
+def _record_id(record: Any) -> int | None:
+    if not isinstance(record, dict):
+        return None
+    try:
+        return int(record.get("id"))
+    except (TypeError, ValueError):
+        return None
+
+
+class XPaginator:
+    """Lazily walk a paginated X API helper one page at a time.
+
+    ``cursor`` always holds the token of the next page to fetch, so a crawl can be
+    stopped at any point and resumed later with ``XPaginator(..., cursor=saved)``.
+    Cursors are page-granular: resuming re-fetches the page after the last one
+    that was fully yielded.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[..., Any],
+        *args: Any,
+        max_pages: int | None = None,
+        max_items: int | None = None,
+        cursor: str | None = None,
+        since_id: str | int | None = None,
+        **kwargs: Any,
+    ) -> None:
+        if fetch not in PAGE_TOKEN_PARAMS:
+            raise ValueError(f"{getattr(fetch, '__name__', fetch)} is not a paginated X API helper.")
+        if since_id and fetch not in CHRONOLOGICAL_HELPERS:
+            name = getattr(fetch, "__name__", fetch)
+            raise ValueError(f"{name} returns records out of id order; since_id is not supported.")
+        self.fetch = fetch
+        self.args = args
+        self.kwargs = kwargs
+        self.token_param = PAGE_TOKEN_PARAMS[fetch]
+        self.max_pages = max_pages
+        self.max_items = max_items
+        self.cursor = cursor
+        self.since_id = int(since_id) if since_id else None
+        self.pages_fetched = 0
+        self.items_yielded = 0
+        self.exhausted = False
+        self.error: Any = None
+
+        accepted = inspect.signature(fetch).parameters
+        if self.since_id and "since_id" in accepted and "since_id" not in kwargs:
+            self.kwargs["since_id"] = str(self.since_id)
+
+    def _limit_reached(self) -> bool:
+        if self.max_pages is not None and self.pages_fetched >= self.max_pages:
+            return True
+        if self.max_items is not None and self.items_yielded >= self.max_items:
+            return True
+        return False
+
+    def _fetch_page(self) -> dict[str, Any] | None:
+        kwargs = dict(self.kwargs)
+        if self.cursor:
+            kwargs[self.token_param] = self.cursor
+        response = self.fetch(*self.args, **kwargs)
+        self.pages_fetched += 1
+
+        if response is None:
+            self.error = {"error": "Unable to call X API; check your credentials."}
+            return None
+        if isinstance(response, dict):
+            if response.get("error"):
+                self.error = response
+                return None
+            return response
+        payload = _json_payload(response)
+        if response.status_code >= 400 or not isinstance(payload, dict):
+            self.error = {"status_code": response.status_code, "body": payload or response.text}
+            return None
+        return payload
+
+    def pages(self) -> Iterator[dict[str, Any]]:
+        """Yield raw page payloads, trimmed to ``max_items`` and ``since_id``."""
+        while not self.exhausted and not self._limit_reached():
+            page_token = self.cursor
+            payload = self._fetch_page()
+            if payload is None:
+                self.exhausted = True
+                return
+
+            records = payload.get("data") or []
+            if not isinstance(records, list):
+                records = [records]
+            kept = []
+            reached_since_id = False
+            truncated = False
+            for record in records:
+                record_id = _record_id(record)
+                if self.since_id and record_id is not None and record_id <= self.since_id:
+                    reached_since_id = True
+                    break
+                if self.max_items is not None and self.items_yielded + len(kept) >= self.max_items:
+                    truncated = True
+                    break
+                kept.append(record)
+
+            next_token = (payload.get("meta") or {}).get("next_token")
+            if reached_since_id or not next_token:
+                self.exhausted = True
+                self.cursor = None
+            else:
+                # A partially yielded page is fetched again on resume.
+                self.cursor = page_token if truncated else next_token
+
+            if kept or not self.exhausted:
+                self.items_yielded += len(kept)
+                yield {**payload, "data": kept}
+
+    def items(self) -> Iterator[Any]:
+        """Yield individual records across pages."""
+        for page in self.pages():
+            yield from page["data"]
+
+    def __iter__(self) -> Iterator[dict[str, Any]]:
+        return self.pages()
+
+
+def iter_x_pages(fetch: Callable[..., Any], *args: Any, **kwargs: Any) -> Iterator[dict[str, Any]]:
+    return XPaginator(fetch, *args, **kwargs).pages()
+
+
+def iter_x_items(fetch: Callable[..., Any], *args: Any, **kwargs: Any) -> Iterator[Any]:
+    return XPaginator(fetch, *args, **kwargs).items()
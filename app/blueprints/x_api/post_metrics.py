@@ -0,0 +1,99 @@
+from datetime import datetime, timedelta
+from typing import Any
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import aliased
+
+from app.blueprints.x_api.helpers import POST_METRIC_COLUMNS
+from app.extensions import db
+from app.models import XPost, XPostMetricSample
+from app.services.timeseries import rollup_series
+
+# Longest look-back the metric routes accept, in hours.
+MAX_WINDOW_HOURS = 24 * 366
+
+
+def post_metric_series(post_id: int, bucket: str = "hour", since: datetime | None = None) -> list[dict[str, Any]]:
+    """A post's metrics per ``bucket`` period, gap-filled, with per-period deltas."""
+    return rollup_series(XPostMetricSample, "post_id", post_id, POST_METRIC_COLUMNS, bucket, since)
+
+
+def post_metric_velocity(post_id: int, hours: float = 24) -> dict[str, Any]:
+    """Growth per hour of each metric over the last ``hours``, from the samples in that window."""
+    since = datetime.utcnow() - timedelta(hours=hours)
+    columns = [getattr(XPostMetricSample, column) for column in POST_METRIC_COLUMNS]
+    baseline = db.session.execute(
+        select(XPostMetricSample.sampled_at, *columns)
+        .where(XPostMetricSample.post_id == post_id, XPostMetricSample.sampled_at < since)
+        .order_by(XPostMetricSample.sampled_at.desc())
+        .limit(1)
+    ).first()
+    window = db.session.execute(
+        select(XPostMetricSample.sampled_at, *columns)
+        .where(XPostMetricSample.post_id == post_id, XPostMetricSample.sampled_at >= since)
+        .order_by(XPostMetricSample.sampled_at)
+    ).all()
+    if baseline is not None:
+        window.insert(0, baseline)
+    if len(window) < 2:
+        return {"post_id": str(post_id), "hours": hours, "samples": len(window), "per_hour": {}}
+    first, last = window[0], window[-1]
+    elapsed = max((last[0] - first[0]).total_seconds() / 3600, 1 / 60)
+    return {
+        "post_id": str(post_id),
+        "hours": hours,
+        "samples": len(window),
+        "from": first[0].isoformat(),
+        "to": last[0].isoformat(),
+        "per_hour": {
+            column: round(((last[index + 1] or 0) - (first[index + 1] or 0)) / elapsed, 2)
+            for index, column in enumerate(POST_METRIC_COLUMNS)
+        },
+    }
+
+
+def fastest_growing_posts(metric: str = "like_count", hours: float = 24, limit: int = 20) -> list[dict[str, Any]]:
+    """Posts whose ``metric`` grew most over the last ``hours``.
+
+    Only posts with a sample in the window changed at all. Growth is their
+    latest sample minus the last sample before the window (or the first one
+    inside it for posts first seen in the window).
+    """
+    if metric not in POST_METRIC_COLUMNS:
+        raise ValueError(f"Unknown metric: {metric}")
+    if not 0 < hours <= MAX_WINDOW_HOURS:
+        raise ValueError(f"hours must be between 0 and {MAX_WINDOW_HOURS}.")
+    since = datetime.utcnow() - timedelta(hours=hours)
+    window = (
+        select(
+            XPostMetricSample.post_id,
+            func.max(XPostMetricSample.id).label("latest_id"),
+            func.min(XPostMetricSample.id).label("first_id"),
+        )
+        .where(XPostMetricSample.sampled_at >= since)
+        .group_by(XPostMetricSample.post_id)
+        .subquery()
+    )
+    before = (
+        select(XPostMetricSample.post_id, func.max(XPostMetricSample.id).label("baseline_id"))
+        .where(XPostMetricSample.sampled_at < since, XPostMetricSample.post_id.in_(select(window.c.post_id)))
+        .group_by(XPostMetricSample.post_id)
+        .subquery()
+    )
+    latest = aliased(XPostMetricSample)
+    baseline = aliased(XPostMetricSample)
+    current = getattr(latest, metric)
+    growth = (func.coalesce(current, 0) - func.coalesce(getattr(baseline, metric), 0)).label("growth")
+    rows = db.session.execute(
+        select(window.c.post_id, growth, current, XPost.text)
+        .join(latest, latest.id == window.c.latest_id)
+        .outerjoin(before, before.c.post_id == window.c.post_id)
+        .join(baseline, baseline.id == func.coalesce(before.c.baseline_id, window.c.first_id))
+        .join(XPost, XPost.id == window.c.post_id)
+        .order_by(growth.desc())
+        .limit(limit)
+    ).all()
+    return [
+        {"post_id": str(post_id), "growth": growth or 0, metric: current, "text": text}
+        for post_id, growth, current, text in rows
+    ]
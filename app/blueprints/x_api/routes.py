@@ -1,11 +1,11 @@
 import io
+from datetime import datetime, timedelta, timezone
 from typing import Any
 from urllib.parse import urlencode
 
 import json
 
-from flask import Blueprint, current_app, flash, jsonify, redirect, render_template, request, send_file, session, url_for
-import requests
+from flask import Blueprint, abort, current_app, flash, jsonify, redirect, render_template, request, send_file, session, url_for
 
 from app.blueprints.auth.decorators import login_required
 from app.blueprints.auth.token_helpers import call_x_api_with_refresh
@@ -41,6 +41,7 @@ from app.blueprints.x_api.helpers import (
     delete_x_list,
     follow_x_list,
     get_api_request_history,
+    get_api_request_log,
     get_x_community_by_id,
     get_my_x_user,
     get_x_list_by_id,
@@ -54,7 +55,6 @@ from app.blueprints.x_api.helpers import (
     get_x_space_posts,
     get_x_spaces_search,
     get_x_muted_users,
-    get_x_users_by_ids_with_app_token,
     get_x_user_by_id,
     get_x_user_followed_lists,
     get_x_user_list_memberships,
@@ -78,9 +78,6 @@ from app.blueprints.x_api.helpers import (
     get_x_reposts_of_me,
     get_x_user_mentions,
     get_x_user_posts,
-    initialize_x_media_upload,
-    append_x_media_upload,
-    finalize_x_media_upload,
     upload_x_media_one_shot,
     get_x_usage_tweets,
     search_x_news,
@@ -91,6 +88,7 @@ from app.blueprints.x_api.helpers import (
     resolve_x_user_id,
     resolve_x_post_id,
     search_x_communities,
+    search_local_posts,
     search_x_posts_all,
     search_x_posts_recent,
     unmute_x_user,
@@ -102,10 +100,30 @@ from app.blueprints.x_api.helpers import (
     repost_x_post,
     update_x_activity_subscription,
 )
+from app.blueprints.x_api.jobs import USER_JOB_KINDS, job_params_error
+from app.blueprints.x_api.media_upload import apply_media_response, start_media_upload
+from app.blueprints.x_api.post_metrics import (
+    MAX_WINDOW_HOURS,
+    fastest_growing_posts,
+    post_metric_series,
+    post_metric_velocity,
+)
+from app.blueprints.x_api.spaces_poller import is_space_id, spaces_poller
+from app.blueprints.x_api.tables import table_page
+from app.blueprints.x_api.threads import build_thread
+from app.blueprints.x_api.trend_collector import COMMON_WOEIDS, configured_woeids
+from app.blueprints.x_api.trend_timeline import trend_movers, trend_rank_series, trend_timeline, trend_woeids
+from app.blueprints.x_api.usage_stats import app_shares, cap_projection, usage_summary
+from app.blueprints.x_api.user_metrics import MAX_WINDOW_DAYS, local_user_ids, user_growth, user_metric_series
 from app.extensions import db
-from app.models import ApiRequestLog, UserOAuthToken, XMediaUpload, XNewsStorySnapshot, XPost, XSpace, XTrendSnapshot, XUsageSnapshot, XUser
+from app.services.blob_store import media_store
+from app.services.budget import budget_meter
+from app.services.http_client import x_http
+from app.services.jobs import job_queue, serialize_job
+from app.services.payload_store import payload_store
+from app.services.pickers import picker_cache
+from app.models import User, UserOAuthToken, XApiJob, XMediaUpload, XNewsStorySnapshot, XSpace, XUsageSnapshot, XUser
 from app.models import UserLinkedAccount
-from sqlalchemy import String, or_, cast
 
 bp = Blueprint("x_api", __name__, url_prefix="/x")
 bp.cli.add_command(x_api_cli)
@@ -115,7 +133,7 @@ bp.cli.add_command(x_api_cli)
 @login_required
 def index():
     response = call_x_api_with_refresh(
-        requests.get,
+        x_http.get,
         f"{current_app.config['X_API_BASE_URL']}/users/me",
         timeout=10,
         params={"user.fields": "id,name,username,created_at"},
@@ -139,6 +157,51 @@ def index():
     )
 
 
+@bp.route("/users/<int:user_id>/metrics")
+@login_required
+def user_metrics(user_id: int):
+    bucket = request.args.get("bucket", "day")
+    if bucket not in {"hour", "day"}:
+        return jsonify({"error": "bucket must be hour or day."}), 400
+    days = request.args.get("days", 90, type=float)
+    if not 0 < days <= MAX_WINDOW_DAYS:
+        return jsonify({"error": f"days must be between 0 and {MAX_WINDOW_DAYS}."}), 400
+    return jsonify({
+        "user_id": str(user_id),
+        "bucket": bucket,
+        "series": user_metric_series(user_id, bucket, since=datetime.utcnow() - timedelta(days=days)),
+    })
+
+
+@bp.route("/users/growth")
+@login_required
+def users_growth():
+    def split(name: str) -> list[str]:
+        return [value.strip() for value in request.args.get(name, "").split(",") if value.strip()]
+
+    user_ids = local_user_ids(split("ids"), split("usernames"))
+    if not user_ids:
+        return jsonify({"error": "Provide ids or usernames of stored users."}), 400
+    def utc(value: str) -> datetime:
+        # Samples are stored as naive UTC; convert offsets instead of dropping them.
+        parsed = datetime.fromisoformat(value)
+        return parsed.astimezone(timezone.utc).replace(tzinfo=None) if parsed.tzinfo else parsed
+
+    days = request.args.get("days", 30, type=float)
+    if not 0 < days <= MAX_WINDOW_DAYS:
+        return jsonify({"error": f"days must be between 0 and {MAX_WINDOW_DAYS}."}), 400
+    try:
+        end = utc(request.args["end"]) if request.args.get("end") else datetime.utcnow()
+        start = utc(request.args["start"]) if request.args.get("start") else end - timedelta(days=days)
+    except ValueError:
+        return jsonify({"error": "start and end must be ISO 8601 timestamps."}), 400
+    return jsonify({
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "users": user_growth(user_ids, start, end),
+    })
+
+
 @bp.route("/users", methods=["GET", "POST"])
 @login_required
 def users():
@@ -159,7 +222,7 @@ def users():
     log_id = session.get("x_user_lookup_log_id")
     token_scope = None
     if log_id:
-        log = ApiRequestLog.query.get(log_id)
+        log = get_api_request_log(log_id)
         if log and log.response_body:
             body = log.response_body
             try:
@@ -353,7 +416,7 @@ def users():
         error=error,
         curl_preview=curl_preview,
         token_scope=token_scope,
-        existing_users=XUser.query.order_by(XUser.username.asc()).limit(200).all(),
+        existing_users=picker_cache.users(),
     )
 
 
@@ -364,6 +427,12 @@ def history():
     return render_template("x_api/history.html", logs=logs)
 
 
+@bp.route("/client-stats")
+@login_required
+def client_stats():
+    return jsonify(x_http.stats())
+
+
 @bp.route("/activity", methods=["GET", "POST"])
 @login_required
 def activity():
@@ -386,7 +455,7 @@ def activity():
     log_id = session.get("x_activity_lookup_log_id")
 
     if log_id:
-        log = ApiRequestLog.query.get(log_id)
+        log = get_api_request_log(log_id)
         if log and log.response_body:
             body = log.response_body
             try:
@@ -612,10 +681,75 @@ def activity():
         known_limit=known_limit,
         curl_preview=curl_preview,
         event_types=ACTIVITY_EVENT_TYPES,
-        existing_users=XUser.query.order_by(XUser.username.asc()).limit(200).all(),
+        existing_users=picker_cache.users(),
     )
 
 
+@bp.route("/posts/local-search")
+@login_required
+def posts_local_search():
+    query = request.args.get("q", "").strip()
+    if not query:
+        return jsonify({"error": "Missing q."}), 400
+    sort = request.args.get("sort", "relevance")
+    if sort not in {"relevance", "recent"}:
+        return jsonify({"error": "sort must be relevance or recent."}), 400
+    return jsonify(
+        search_local_posts(
+            query,
+            page=request.args.get("page", 1, type=int),
+            per_page=request.args.get("per_page", 20, type=int),
+            sort=sort,
+        )
+    )
+
+
+@bp.route("/posts/<int:post_id>/thread")
+@login_required
+def post_thread(post_id: int):
+    flags = {"1", "true", "yes", "on"}
+    return jsonify(
+        build_thread(
+            post_id,
+            nested=request.args.get("format", "nested") != "flat",
+            fetch_missing=request.args.get("fetch_missing", "1").lower() in flags,
+            fetch_replies=request.args.get("fetch_replies", "0").lower() in flags,
+        )
+    )
+
+
+@bp.route("/posts/<int:post_id>/metrics")
+@login_required
+def post_metrics(post_id: int):
+    bucket = request.args.get("bucket", "hour")
+    if bucket not in {"hour", "day"}:
+        return jsonify({"error": "bucket must be hour or day."}), 400
+    hours = request.args.get("hours", 24 * 7, type=float)
+    if not 0 < hours <= MAX_WINDOW_HOURS:
+        return jsonify({"error": f"hours must be between 0 and {MAX_WINDOW_HOURS}."}), 400
+    return jsonify({
+        "post_id": str(post_id),
+        "bucket": bucket,
+        "series": post_metric_series(post_id, bucket, since=datetime.utcnow() - timedelta(hours=hours)),
+        "velocity": post_metric_velocity(post_id, hours=min(hours, 24)),
+    })
+
+
+@bp.route("/posts/metrics/fastest")
+@login_required
+def posts_fastest_growing():
+    metric = request.args.get("metric", "like_count")
+    try:
+        posts = fastest_growing_posts(
+            metric,
+            hours=request.args.get("hours", 24, type=float),
+            limit=min(request.args.get("limit", 20, type=int), 100),
+        )
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+    return jsonify({"metric": metric, "posts": posts})
+
+
 @bp.route("/posts", methods=["GET", "POST"])
 @login_required
 def posts():
@@ -718,7 +852,7 @@ def posts():
     log_id = session.get("x_posts_lookup_log_id")
 
     if log_id:
-        log = ApiRequestLog.query.get(log_id)
+        log = get_api_request_log(log_id)
         if log and log.response_body:
             body = log.response_body
             try:
@@ -1471,8 +1605,8 @@ def posts():
         error=error,
         known_limit=known_limit,
         curl_preview=curl_preview,
-        existing_users=XUser.query.order_by(XUser.username.asc()).limit(200).all(),
-        existing_posts=XPost.query.order_by(XPost.created_at.desc()).limit(200).all(),
+        existing_users=picker_cache.users(),
+        existing_posts=picker_cache.posts(),
         media_uploads=XMediaUpload.query.filter_by(user_id=session.get("user_id")).order_by(XMediaUpload.created_at.desc()).limit(200).all(),
         tweet_fields=_filter_fields(TWEET_FIELDS),
         user_fields=_filter_fields(USER_FIELDS),
@@ -1504,7 +1638,7 @@ def likes():
     token_scope = None
 
     if log_id:
-        log = ApiRequestLog.query.get(log_id)
+        log = get_api_request_log(log_id)
         if log and log.response_body:
             body = log.response_body
             try:
@@ -1722,8 +1856,8 @@ def likes():
         curl_preview=curl_preview,
         known_limit=known_limit,
         token_scope=token_scope,
-        existing_users=XUser.query.order_by(XUser.username.asc()).limit(200).all(),
-        existing_posts=XPost.query.order_by(XPost.created_at.desc()).limit(200).all(),
+        existing_users=picker_cache.users(),
+        existing_posts=picker_cache.posts(),
     )
 
 
@@ -1742,7 +1876,7 @@ def communities():
     log_id = session.get("x_communities_lookup_log_id")
 
     if log_id:
-        log = ApiRequestLog.query.get(log_id)
+        log = get_api_request_log(log_id)
         if log and log.response_body:
             body = log.response_body
             try:
@@ -1897,6 +2031,49 @@ def communities():
     )
 
 
+@bp.route("/trends/collect", methods=["POST"])
+@login_required
+def trends_collect():
+    payload = request.get_json(silent=True) or {}
+    allowed = configured_woeids()
+    woeids = sorted({int(woeid) for woeid in payload.get("woeids") or [] if str(woeid).isdigit()} or set(allowed))
+    user = db.session.get(User, session["user_id"])
+    outside = [woeid for woeid in woeids if woeid not in allowed]
+    if outside and not (user and user.is_admin):
+        return jsonify({"error": f"Only configured WOEIDs can be collected: {outside} are not in X_TRENDS_WOEIDS."}), 403
+    job, _ = job_queue.enqueue(
+        "trends_collect", {"woeids": woeids}, dedupe_key=f"trends_collect:{','.join(map(str, woeids))}"
+    )
+    return _job_accepted(job)
+
+
+@bp.route("/trends/timeline")
+@login_required
+def trends_timeline():
+    woeid = request.args.get("woeid", type=int)
+    if woeid is None:
+        return jsonify({"error": "Provide a woeid."}), 400
+    hours = request.args.get("hours", 24, type=float)
+    return jsonify({"woeid": woeid, "hours": hours, "trends": trend_timeline(woeid, hours=hours)})
+
+
+@bp.route("/trends/movers")
+@login_required
+def trends_movers():
+    woeid = request.args.get("woeid", type=int)
+    if woeid is None:
+        return jsonify({"error": "Provide a woeid."}), 400
+    return jsonify(
+        trend_movers(woeid, hours=request.args.get("hours", 6, type=float), limit=request.args.get("limit", 10, type=int))
+    )
+
+
+@bp.route("/trends/appearances/<int:appearance_id>/ranks")
+@login_required
+def trend_appearance_ranks(appearance_id: int):
+    return jsonify({"appearance_id": appearance_id, "ranks": trend_rank_series(appearance_id)})
+
+
 @bp.route("/trends", methods=["GET", "POST"])
 @login_required
 def trends():
@@ -1916,7 +2093,7 @@ def trends():
     log_id = session.get("x_trends_lookup_log_id")
 
     if log_id:
-        log = ApiRequestLog.query.get(log_id)
+        log = get_api_request_log(log_id)
         if log and log.response_body:
             body = log.response_body
             try:
@@ -1940,31 +2117,8 @@ def trends():
                 except json.JSONDecodeError:
                     pass
 
-    existing_woeids = (
-        XTrendSnapshot.query.with_entities(XTrendSnapshot.woeid)
-        .filter(XTrendSnapshot.woeid.isnot(None))
-        .distinct()
-        .order_by(XTrendSnapshot.woeid.asc())
-        .limit(200)
-        .all()
-    )
-    known_woeids = [row.woeid for row in existing_woeids if row.woeid is not None]
-    common_woeids = [
-        (1, "Worldwide"),
-        (23424977, "United States"),
-        (23424775, "Canada"),
-        (23424856, "United Kingdom"),
-        (23424848, "Spain"),
-        (23424829, "Germany"),
-        (23424803, "India"),
-        (23424747, "Brazil"),
-        (23424900, "Mexico"),
-        (23424868, "Australia"),
-        (23424853, "France"),
-        (23424846, "South Korea"),
-        (23424852, "Italy"),
-        (23424860, "Indonesia"),
-    ]
+    known_woeids = sorted(set(trend_woeids()) | set(configured_woeids()))[:200]
+    common_woeids = COMMON_WOEIDS
 
     if request.method == "POST":
         known_limit = None
@@ -2115,7 +2269,7 @@ def news():
     log_id = session.get("x_news_lookup_log_id")
 
     if log_id:
-        log = ApiRequestLog.query.get(log_id)
+        log = get_api_request_log(log_id)
         if log and log.response_body:
             body = log.response_body
             try:
@@ -2284,14 +2438,28 @@ def news():
 @login_required
 def media_file(upload_id: int):
     upload = XMediaUpload.query.filter_by(id=upload_id, user_id=session.get("user_id")).first()
-    if not upload or not upload.file_blob:
+    if not upload or not upload.has_file:
         return jsonify({"error": "Media not found."}), 404
-    return send_file(
-        io.BytesIO(upload.file_blob),
-        mimetype=upload.content_type or "application/octet-stream",
-        as_attachment=False,
-        download_name=upload.filename or f"media-{upload.id}",
-    )
+
+    try:
+        if upload.blob_hash:
+            # Content-addressed blobs never change, so the hash is a strong ETag.
+            source = media_store.local_path(upload.blob_hash) or media_store.open(upload.blob_hash)
+            etag = upload.blob_hash
+        else:
+            source = io.BytesIO(upload.file_blob)
+            etag = True
+        return send_file(
+            source,
+            mimetype=upload.content_type or "application/octet-stream",
+            as_attachment=False,
+            download_name=upload.filename or f"media-{upload.id}",
+            conditional=True,
+            etag=etag,
+            max_age=3600,
+        )
+    except FileNotFoundError:
+        abort(404)
 
 
 @bp.route("/media", methods=["GET", "POST"])
@@ -2310,7 +2478,7 @@ def media():
         session.pop("x_media_known_limit", None)
         session.pop("x_media_lookup_curl", None)
     if log_id:
-        log = ApiRequestLog.query.get(log_id)
+        log = get_api_request_log(log_id)
         if log and log.response_body:
             body = log.response_body
             try:
@@ -2355,6 +2523,7 @@ def media():
         action = request.form.get("media_action")
         response = None
         curl_preview = None
+        upload_started = False
         if action == "status":
             media_id = request.form.get("media_id", "").strip()
             if not media_id:
@@ -2374,7 +2543,6 @@ def media():
                 flash(error, "warning")
             else:
                 filename = upload_file.filename
-                original_bytes = upload_file.read()
                 content_type = upload_file.mimetype or "application/octet-stream"
                 media_category = request.form.get("media_category", "tweet_image").strip()
                 media_type = request.form.get("media_type", "").strip() or content_type
@@ -2391,7 +2559,6 @@ def media():
                 height = parse_int(request.form.get("resize_height", "").strip())
                 quality = parse_int(request.form.get("quality", "").strip())
 
-                processed_bytes = original_bytes
                 processed_format = None
                 stored_content_type = content_type
                 stored_width = None
@@ -2399,6 +2566,7 @@ def media():
                 is_image = content_type.startswith("image/")
                 is_gif = content_type == "image/gif"
                 if is_image and not is_gif:
+                    original_bytes = upload_file.read()
                     processed_bytes, processed_format, stored_content_type, stored_width, stored_height = _process_image_bytes(
                         original_bytes,
                         output_format,
@@ -2406,9 +2574,16 @@ def media():
                         height,
                         quality,
                     )
+                    blob_hash = media_store.put(processed_bytes)
+                    file_size = len(original_bytes)
+                    stored_size = len(processed_bytes)
+                else:
+                    # Videos and GIFs are copied to disk without being read into memory.
+                    blob_hash, file_size = media_store.put_file(upload_file.stream)
+                    stored_size = file_size
 
                 upload_mode = "oneshot"
-                if content_type.startswith("video/") or is_gif or len(processed_bytes) > 5 * 1024 * 1024:
+                if content_type.startswith("video/") or is_gif or stored_size > 5 * 1024 * 1024:
                     upload_mode = "chunked"
 
                 record = XMediaUpload(
@@ -2421,23 +2596,26 @@ def media():
                     output_format=processed_format,
                     width=stored_width,
                     height=stored_height,
-                    file_size=len(original_bytes),
-                    stored_size=len(processed_bytes),
+                    file_size=file_size,
+                    stored_size=stored_size,
                     upload_mode=upload_mode,
+                    shared=shared,
                     status="pending",
+                    blob_hash=blob_hash,
                 )
                 db.session.add(record)
-                db.session.flush()
+                db.session.commit()
 
                 if upload_mode == "oneshot":
                     flash("Upload started.", "info")
-                    response = upload_x_media_one_shot(
-                        processed_bytes,
-                        filename=filename,
-                        media_category=media_category,
-                        media_type=media_type,
-                        shared=shared,
-                    )
+                    with media_store.open(blob_hash) as handle:
+                        response = upload_x_media_one_shot(
+                            handle.read(),
+                            filename=filename,
+                            media_category=media_category,
+                            media_type=media_type,
+                            shared=shared,
+                        )
                     curl_parts = [
                         'curl -X POST "https://api.x.com/2/media/upload"',
                         '-H "Authorization: Bearer <token>"',
@@ -2450,106 +2628,50 @@ def media():
                     if shared:
                         curl_parts.append('-F "shared=true"')
                     curl_preview = " \\\n  ".join(curl_parts)
-                else:
-                    flash("Chunked upload started.", "info")
-                    init_response = initialize_x_media_upload(
-                        total_bytes=len(processed_bytes),
-                        media_type=media_type,
-                        media_category=media_category,
-                        shared=shared,
-                    )
-                    init_payload, init_status = parse_response(init_response)
-                    record.raw_response = init_payload
-                    media_id_value = (init_payload.get("data") or {}).get("id")
-                    if init_status and init_status >= 400:
-                        record.status = "failed"
-                        record.error_message = f"INIT failed with status {init_status}."
-                        response = init_response
-                    elif init_payload.get("error") or not media_id_value:
-                        record.status = "failed"
-                        record.error_message = init_payload.get("error") or "INIT failed."
-                        response = init_response
+                    apply_media_response(record, response)
+                    db.session.commit()
+                    if record.status == "failed":
+                        error = record.error_message or "Upload failed."
+                        flash(error, "warning")
                     else:
-                        chunk_size = 2 * 1024 * 1024
-                        for index in range(0, len(processed_bytes), chunk_size):
-                            chunk = processed_bytes[index:index + chunk_size]
-                            segment_index = index // chunk_size
-                            append_response = append_x_media_upload(
-                                media_id=str(media_id_value),
-                                segment_index=segment_index,
-                                chunk_bytes=chunk,
-                            )
-                            append_payload, append_status = parse_response(append_response)
-                            if append_status and append_status >= 400:
-                                record.status = "failed"
-                                record.error_message = f"APPEND failed with status {append_status}."
-                                response = append_response
-                                break
-                            if append_payload.get("error"):
-                                record.status = "failed"
-                                record.error_message = append_payload.get("error")
-                                response = append_response
-                                break
-                        if record.status != "failed":
-                            finalize_response = finalize_x_media_upload(str(media_id_value))
-                            finalize_payload, finalize_status = parse_response(finalize_response)
-                            record.raw_response = finalize_payload
-                            response = finalize_response
-                            if finalize_status and finalize_status >= 400:
-                                record.status = "failed"
-                                record.error_message = f"FINALIZE failed with status {finalize_status}."
-                            elif finalize_payload.get("error"):
-                                record.status = "failed"
-                                record.error_message = finalize_payload.get("error")
-                            else:
-                                record.status = "uploaded"
-
+                        flash("Upload complete.", "success")
+                else:
+                    upload_started = start_media_upload(record)
+                    flash("Chunked upload started in the background; refresh to follow its progress.", "info")
                     curl_preview = (
                         'curl -X POST "https://api.x.com/2/media/upload" '
                         '-H "Authorization: Bearer <token>" '
                         '-H "Content-Type: multipart/form-data" '
                         f'-F "command=INIT" -F "media_type={media_type}" '
-                        f'-F "total_bytes={len(processed_bytes)}" '
+                        f'-F "total_bytes={stored_size}" '
                         + (f'-F "media_category={media_category}" ' if media_category else "")
                     ).strip()
 
-                payload, status_code = parse_response(response) if response is not None else ({}, None)
-                record.raw_response = payload
-                if payload.get("data"):
-                    record.media_id = payload["data"].get("id") or record.media_id
-                    record.media_key = payload["data"].get("media_key") or record.media_key
-                    processing = payload["data"].get("processing_info") or {}
-                    if processing.get("state") in {"pending", "in_progress"}:
-                        record.status = "processing"
-                    elif record.status not in {"failed"}:
-                        record.status = "uploaded"
-                if status_code and status_code >= 400:
-                    record.status = "failed"
-                    record.error_message = f"Upload failed with status {status_code}."
-                if payload.get("error"):
-                    record.status = "failed"
-                    record.error_message = payload.get("error")
-                if record.status not in {"failed"} and payload.get("data"):
-                    record.file_blob = processed_bytes
-
-                db.session.commit()
                 recent_uploads = (
                     XMediaUpload.query.filter_by(user_id=session.get("user_id"))
                     .order_by(XMediaUpload.created_at.desc())
                     .limit(50)
                     .all()
                 )
-
-                if record.status == "failed":
-                    error = record.error_message or "Upload failed."
-                    flash(error, "warning")
-                else:
-                    flash("Upload complete.", "success")
+        elif action == "resume":
+            upload = XMediaUpload.query.filter_by(
+                id=request.form.get("upload_id", type=int),
+                user_id=session.get("user_id"),
+            ).first()
+            if not upload or upload.upload_mode != "chunked" or upload.status not in {"failed", "uploading", "pending"}:
+                error = "That upload cannot be resumed."
+                flash(error, "warning")
+            elif start_media_upload(upload, restart=request.form.get("restart") == "on"):
+                upload_started = True
+                flash("Upload resumed in the background; refresh to follow its progress.", "info")
+            else:
+                upload_started = True
+                flash("That upload is already running.", "info")
         else:
             error = "Please select a media action to run."
             flash(error, "warning")
 
-        if response is None and error is None:
+        if response is None and error is None and not upload_started:
             error = "Unable to call X API; check your credentials."
             result = None
             flash("Lookup failed. Check your credentials.", "danger")
@@ -2600,7 +2722,7 @@ def usage():
         session.pop("x_usage_known_limit", None)
         session.pop("x_usage_lookup_curl", None)
     if log_id:
-        log = ApiRequestLog.query.get(log_id)
+        log = get_api_request_log(log_id)
         if log and log.response_body:
             body = log.response_body
             try:
@@ -2704,66 +2826,58 @@ def usage():
         known_limit=known_limit,
         curl_preview=curl_preview,
         snapshots=snapshots,
+        budget=budget_meter.usage(session.get("user_id")),
+        projection=budget_meter.projection(session.get("user_id")),
+        endpoint_usage=budget_meter.endpoint_usage(limit=10),
+        cap_projection=cap_projection(session.get("user_id")),
+        app_shares=app_shares(session.get("user_id")),
     )
 
 
 @bp.route("/usage/data")
 @login_required
 def usage_data():
-    draw = request.args.get("draw", type=int, default=1)
-    start = request.args.get("start", type=int, default=0)
-    length = request.args.get("length", type=int, default=10)
-    search_value = request.args.get("search[value]", type=str, default="").strip()
-    order_column = request.args.get("order[0][column]", type=int, default=0)
-    order_dir = request.args.get("order[0][dir]", type=str, default="desc")
-
-    query = XUsageSnapshot.query.filter_by(user_id=session.get("user_id"))
-    total_count = query.count()
-
-    if search_value:
-        like_value = f"%{search_value}%"
-        query = query.filter(
-            or_(
-                cast(XUsageSnapshot.project_id, String).ilike(like_value),
-                cast(XUsageSnapshot.project_usage, String).ilike(like_value),
-                cast(XUsageSnapshot.project_cap, String).ilike(like_value),
-                cast(XUsageSnapshot.days, String).ilike(like_value),
-            )
-        )
+    return jsonify(table_page("usage", request.args, session.get("user_id")))
 
-    filtered_count = query.count()
 
-    columns = [
-        XUsageSnapshot.created_at,
-        XUsageSnapshot.days,
-        XUsageSnapshot.project_usage,
-        XUsageSnapshot.project_cap,
-        XUsageSnapshot.project_id,
-    ]
-    sort_column = columns[order_column] if order_column < len(columns) else XUsageSnapshot.created_at
-    if order_dir == "asc":
-        query = query.order_by(sort_column.asc())
+@bp.route("/pickers/<kind>")
+@login_required
+def picker_options(kind: str):
+    query = request.args.get("q", "").strip()
+    limit = max(1, min(request.args.get("limit", 20, type=int), 50))
+    if kind == "users":
+        results = picker_cache.search_users(query, limit) if query else picker_cache.users()[:limit]
+    elif kind == "posts":
+        results = picker_cache.search_posts(query, limit) if query else picker_cache.posts()[:limit]
     else:
-        query = query.order_by(sort_column.desc())
+        return jsonify({"error": "Unknown picker."}), 404
+    return jsonify({"results": results})
 
-    rows = query.offset(start).limit(length).all()
 
-    data = []
-    for row in rows:
-        data.append({
-            "created_at": row.created_at.isoformat() if row.created_at else "",
-            "days": row.days,
-            "project_usage": row.project_usage,
-            "project_cap": row.project_cap,
-            "project_id": row.project_id,
-            "id": row.id,
-        })
+@bp.route("/tables/<name>")
+@login_required
+def table_data(name: str):
+    page = table_page(name, request.args, session.get("user_id"))
+    if page is None:
+        return jsonify({"error": "Unknown table."}), 404
+    return jsonify(page)
+
+
+@bp.route("/usage/summary")
+@login_required
+def usage_rollup():
+    days = max(1, min(request.args.get("days", 30, type=int), 366))
+    return jsonify(usage_summary(session.get("user_id"), days))
 
+
+@bp.route("/usage/budget")
+@login_required
+def usage_budget():
+    user_id = session.get("user_id")
     return jsonify({
-        "draw": draw,
-        "recordsTotal": total_count,
-        "recordsFiltered": filtered_count,
-        "data": data,
+        **budget_meter.usage(user_id),
+        "projection": budget_meter.projection(user_id),
+        "endpoints": budget_meter.endpoint_usage(),
     })
 
 
@@ -2789,6 +2903,8 @@ def usage_snapshot(snapshot_id: int):
 @bp.route("/spaces", methods=["GET", "POST"])
 @login_required
 def spaces():
+    # Resume following tracked spaces after a restart.
+    spaces_poller.start()
     space_search_query = ""
     space_search_state = ""
     space_search_max_results = ""
@@ -2807,7 +2923,7 @@ def spaces():
     def load_logged_result() -> dict | None:
         if not log_id:
             return None
-        log = ApiRequestLog.query.get(log_id)
+        log = get_api_request_log(log_id)
         if not log or not log.response_body:
             return None
         body = log.response_body
@@ -2836,8 +2952,7 @@ def spaces():
     if log_id:
         result = load_logged_result()
 
-    existing_users = XUser.query.order_by(XUser.username.asc()).limit(200).all()
-    known_users_by_id = {str(user.id): user for user in existing_users}
+    known_users_by_id = {}
 
     if request.method == "POST":
         space_search_query = request.form.get("space_search_query", "").strip()
@@ -2956,9 +3071,26 @@ def spaces():
             if not space_poll_id:
                 error = "Please provide a Space ID to poll."
                 flash(error, "warning")
+            elif not is_space_id(space_poll_id):
+                error = "Space IDs are 1-13 letters and digits."
+                if request.headers.get("X-Requested-With") == "fetch":
+                    return jsonify({"error": error}), 400
+                flash(error, "warning")
+            elif request.headers.get("X-Requested-With") == "fetch":
+                # Tracked spaces are kept fresh by the shared poller; only the first look needs a lookup.
+                spaces_poller.track([space_poll_id])
+                detail = _build_space_detail(space_poll_id)
+                if detail and detail["space"]:
+                    return jsonify(detail)
+                job, _ = job_queue.enqueue(
+                    "space_poll",
+                    {"space_id": space_poll_id},
+                    dedupe_key=f"space_poll:{space_poll_id}",
+                )
+                return _job_accepted(job)
             else:
                 flash("Space poll started.", "info")
-                response = get_x_spaces_by_ids([space_poll_id])
+                response = get_x_spaces_by_ids([space_poll_id], use_local=False)
                 params = {
                     "ids": "SPACE_ID",
                     "space.fields": ",".join(_filter_fields(SPACE_FIELDS)),
@@ -3049,6 +3181,9 @@ def spaces():
         .all()
     )
 
+    # Decode every listed Space's raw payload with one blob query.
+    payload_store.prefetch(space.raw_space_hash for space in [*upcoming_spaces, *ended_spaces])
+
     def serialize_space(space: XSpace) -> dict:
         snapshots = []
         for snapshot in sorted(space.snapshots, key=lambda item: item.fetched_at or 0):
@@ -3092,8 +3227,11 @@ def spaces():
             if space_id:
                 space_ids.append(str(space_id))
         if creator_ids:
-            for user in XUser.query.filter(XUser.id.in_(creator_ids)).all():
-                known_users_by_id[str(user.id)] = user
+            creators = db.session.execute(
+                db.select(XUser.id, XUser.username, XUser.name).where(XUser.id.in_(creator_ids))
+            ).all()
+            for user_id, username, name in creators:
+                known_users_by_id[str(user_id)] = {"id": str(user_id), "username": username, "name": name}
         if space_ids:
             for space in XSpace.query.filter(XSpace.id.in_(space_ids)).all():
                 space_snapshots_by_id[space.id] = [
@@ -3120,7 +3258,7 @@ def spaces():
         error=error,
         curl_preview=curl_preview,
         known_users_by_id=known_users_by_id,
-        existing_users=existing_users,
+        existing_users=picker_cache.users(),
         upcoming_spaces=upcoming_spaces_payload,
         ended_spaces=ended_spaces_payload,
         space_snapshots_by_id=space_snapshots_by_id,
@@ -3167,6 +3305,8 @@ def _build_space_detail(space_id: str) -> dict | None:
         "space": raw,
         "snapshots": snapshots,
         "users": users,
+        "tracked": space.poll_tracked,
+        "poll_interval": space.poll_interval if space.poll_tracked else None,
     }
 
 
@@ -3179,26 +3319,72 @@ def space_detail(space_id: str):
     return jsonify(detail)
 
 
+@bp.route("/spaces/<space_id>/track", methods=["POST", "DELETE"])
+@login_required
+def space_track(space_id: str):
+    if not is_space_id(space_id):
+        return jsonify({"error": "Space IDs are 1-13 letters and digits."}), 400
+    if request.method == "DELETE":
+        return jsonify({"space_id": space_id, "tracked": False, "stopped": spaces_poller.untrack([space_id])})
+    tracked = spaces_poller.track([space_id])
+    return jsonify({"space_id": space_id, "tracked": space_id in tracked})
+
+
+@bp.route("/spaces/poller", methods=["GET"])
+@login_required
+def spaces_poller_status():
+    spaces_poller.start()
+    return jsonify(spaces_poller.status())
+
+
 @bp.route("/spaces/<space_id>/refresh-users", methods=["POST"])
 @login_required
 def space_refresh_users(space_id: str):
     space = XSpace.query.filter_by(id=space_id).first()
     if not space:
         return jsonify({"error": "Space not found."}), 404
-    raw = space.raw_space_data or {}
-    ids = set()
-    if raw.get("creator_id"):
-        ids.add(str(raw["creator_id"]))
-    for key in ("host_ids", "speaker_ids", "invited_user_ids"):
-        for value in raw.get(key, []) or []:
-            if value:
-                ids.add(str(value))
-    if ids:
-        get_x_users_by_ids_with_app_token(list(ids))
-    detail = _build_space_detail(space_id)
-    if not detail:
-        return jsonify({"error": "Space not found."}), 404
-    return jsonify(detail)
+    job, _ = job_queue.enqueue(
+        "space_refresh_users",
+        {"space_id": space_id},
+        dedupe_key=f"space_refresh_users:{space_id}",
+    )
+    return _job_accepted(job)
+
+
+def _job_accepted(job: XApiJob):
+    return jsonify({"job": serialize_job(job), "status_url": url_for("x_api.job_status", job_id=job.id)}), 202
+
+
+@bp.route("/jobs", methods=["GET", "POST"])
+@login_required
+def jobs():
+    if request.method == "POST":
+        payload = request.get_json(silent=True) or {}
+        kind = payload.get("kind")
+        params = payload.get("params")
+        if kind not in USER_JOB_KINDS or not isinstance(params, dict):
+            return jsonify({"error": f"kind must be one of {sorted(USER_JOB_KINDS)} and params an object."}), 400
+        params_error = job_params_error(kind, params)
+        if params_error:
+            return jsonify({"error": params_error}), 400
+        job, _ = job_queue.enqueue(kind, params)
+        return _job_accepted(job)
+
+    query = XApiJob.query.filter_by(user_id=session.get("user_id"))
+    status = request.args.get("status")
+    if status:
+        query = query.filter_by(status=status)
+    recent = query.order_by(XApiJob.id.desc()).limit(min(request.args.get("limit", 50, type=int), 200)).all()
+    return jsonify({"jobs": [serialize_job(job) for job in recent]})
+
+
+@bp.route("/jobs/<int:job_id>")
+@login_required
+def job_status(job_id: int):
+    job = XApiJob.query.filter_by(id=job_id, user_id=session.get("user_id")).first()
+    if not job:
+        return jsonify({"error": "Job not found."}), 404
+    return jsonify(serialize_job(job))
 
 
 @bp.route("/lists", methods=["GET", "POST"])
@@ -3254,7 +3440,7 @@ def lists():
     token_scope = None
 
     if log_id:
-        log = ApiRequestLog.query.get(log_id)
+        log = get_api_request_log(log_id)
         if log and log.response_body:
             body = log.response_body
             try:
@@ -3788,5 +3974,5 @@ def lists():
         known_limit=known_limit,
         curl_preview=curl_preview,
         token_scope=token_scope,
-        existing_users=XUser.query.order_by(XUser.username.asc()).limit(200).all(),
+        existing_users=picker_cache.users(),
     )
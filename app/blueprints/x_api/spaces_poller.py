@@ -0,0 +1,255 @@
+import logging
+import os
+import re
+import threading
+from datetime import datetime, timedelta
+from typing import Any
+
+import requests
+from sqlalchemy import func, select, update
+
+from app.blueprints.x_api.helpers import _json_payload, get_x_spaces_by_ids
+from app.extensions import db
+from app.models import XSpace
+
+logger = logging.getLogger(__name__)
+
+# States worth following; "unknown" covers ids tracked before their first lookup.
+POLLED_STATES = ("live", "scheduled", "unknown")
+BATCH_SIZE = 100
+# One malformed id makes X reject the whole ids= lookup, so ids are checked before tracking.
+SPACE_ID_PATTERN = re.compile(r"^[A-Za-z0-9]{1,13}$")
+
+
+def is_space_id(value: str) -> bool:
+    return bool(SPACE_ID_PATTERN.match(str(value)))
+
+
+def next_interval(interval: int, changed: bool, minimum: int, maximum: int) -> int:
+    """Halve the interval while the audience is moving; back off gradually while it is stable."""
+    if changed:
+        return max(minimum, interval // 2)
+    return min(maximum, max(minimum, int(interval * 1.5)))
+
+
+def _not_found_ids(response: Any) -> set[str]:
+    payload = response if isinstance(response, dict) else _json_payload(response) if response is not None else None
+    if not isinstance(payload, dict):
+        return set()
+    return {
+        str(error.get("resource_id") or error.get("value"))
+        for error in payload.get("errors") or []
+        if isinstance(error, dict) and str(error.get("type", "")).endswith("resource-not-found")
+    }
+
+
+def _lookup_failed(response: Any) -> bool:
+    """Whether a lookup got no real answer from X (error, non-2xx, local refusal or a failed batch)."""
+    if response is None:
+        return True
+    if isinstance(response, dict):
+        return bool(response.get("error"))
+    return response.status_code >= 400
+
+
+class SpacesPoller:
+    """One polling loop for every tracked live or scheduled Space.
+
+    Pages ask for a space to be tracked instead of polling X themselves. Due
+    spaces are claimed by moving ``next_poll_at`` forward in one UPDATE, so the
+    loop can run in several processes without polling a space twice.
+    """
+
+    def __init__(self) -> None:
+        self.embedded = True
+        self.min_interval = 15
+        self.max_interval = 300
+        self._app = None
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._pid: int | None = None
+
+    def init_app(self, app) -> None:
+        self._app = app
+        self.embedded = app.config.get("X_SPACES_POLLER_EMBEDDED", self.embedded)
+        self.min_interval = int(app.config.get("X_SPACES_POLL_MIN_SECONDS", self.min_interval))
+        self.max_interval = max(self.min_interval, int(app.config.get("X_SPACES_POLL_MAX_SECONDS", self.max_interval)))
+
+    def track(self, space_ids: list[str]) -> list[str]:
+        """Start following ``space_ids``; returns the ids now tracked (ended spaces and malformed ids are skipped)."""
+        space_ids = list(dict.fromkeys(str(space_id).strip() for space_id in space_ids if is_space_id(str(space_id).strip())))
+        if not space_ids:
+            return []
+        known = set(db.session.execute(select(XSpace.id).where(XSpace.id.in_(space_ids))).scalars())
+        for space_id in space_ids:
+            if space_id not in known:
+                db.session.add(XSpace(id=space_id, state="unknown"))
+        db.session.flush()
+        tracked = db.session.execute(
+            update(XSpace)
+            .where(XSpace.id.in_(space_ids), XSpace.state.in_(POLLED_STATES), XSpace.poll_tracked.is_(False))
+            .values(poll_tracked=True, poll_interval=self.min_interval, next_poll_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        if tracked.rowcount:
+            self.start()
+        return db.session.execute(
+            select(XSpace.id).where(XSpace.id.in_(space_ids), XSpace.poll_tracked.is_(True))
+        ).scalars().all()
+
+    def untrack(self, space_ids: list[str]) -> int:
+        stopped = db.session.execute(
+            update(XSpace)
+            .where(XSpace.id.in_(space_ids), XSpace.poll_tracked.is_(True))
+            .values(poll_tracked=False, next_poll_at=None)
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        return stopped.rowcount
+
+    def claim(self, limit: int = BATCH_SIZE) -> list[str]:
+        """Lease up to ``limit`` due spaces to this loop until their next poll is due anyway."""
+        now = datetime.utcnow()
+        due = db.session.execute(
+            select(XSpace.id)
+            .where(XSpace.poll_tracked.is_(True), XSpace.next_poll_at <= now)
+            .order_by(XSpace.next_poll_at)
+            .limit(limit)
+        ).scalars().all()
+        if not due:
+            return []
+        claimed = db.session.execute(
+            update(XSpace)
+            .where(XSpace.id.in_(due), XSpace.poll_tracked.is_(True), XSpace.next_poll_at <= now)
+            .values(next_poll_at=now + timedelta(seconds=self.max_interval))
+            .returning(XSpace.id)
+            .execution_options(synchronize_session=False)
+        ).scalars().all()
+        db.session.commit()
+        return claimed
+
+    def poll_batch(self, space_ids: list[str]) -> dict[str, int]:
+        """Fetch claimed spaces in one lookup and reschedule each from how its audience moved."""
+        before = dict(
+            db.session.execute(select(XSpace.id, XSpace.participant_count).where(XSpace.id.in_(space_ids))).all()
+        )
+        try:
+            response = get_x_spaces_by_ids(space_ids, use_local=False)
+        except requests.RequestException:
+            logger.warning("Spaces lookup for %s ids failed.", len(space_ids), exc_info=True)
+            response = None
+        now = datetime.utcnow()
+        counts = {"polled": len(space_ids), "changed": 0, "ended": 0, "failed": 0}
+        if _lookup_failed(response):
+            # Nothing was learned about these spaces; try again soon without touching their state.
+            db.session.rollback()
+            db.session.execute(
+                update(XSpace)
+                .where(XSpace.id.in_(space_ids), XSpace.poll_tracked.is_(True))
+                .values(next_poll_at=now + timedelta(seconds=self.min_interval))
+                .execution_options(synchronize_session=False)
+            )
+            db.session.commit()
+            counts["failed"] = len(space_ids)
+            return counts
+        missing = _not_found_ids(response)
+        for space in db.session.execute(select(XSpace).where(XSpace.id.in_(space_ids))).scalars():
+            # After a successful lookup, a placeholder still "unknown" was not returned by X;
+            # stop following it rather than retrying forever.
+            if space.state not in POLLED_STATES or space.id in missing or space.state == "unknown":
+                space.poll_tracked = False
+                space.next_poll_at = None
+                counts["ended"] += 1
+                continue
+            changed = space.participant_count != before.get(space.id)
+            counts["changed"] += changed
+            space.poll_interval = next_interval(
+                space.poll_interval or self.min_interval, changed, self.min_interval, self.max_interval
+            )
+            space.next_poll_at = now + timedelta(seconds=space.poll_interval)
+        db.session.commit()
+        return counts
+
+    def poll_due(self) -> dict[str, int]:
+        """Poll every space that is due, ``BATCH_SIZE`` per X call."""
+        totals = {"polled": 0, "changed": 0, "ended": 0, "failed": 0}
+        while True:
+            batch = self.claim()
+            if not batch:
+                return totals
+            for key, value in self.poll_batch(batch).items():
+                totals[key] += value
+
+    def seconds_until_due(self) -> float | None:
+        next_due = db.session.execute(
+            select(func.min(XSpace.next_poll_at)).where(XSpace.poll_tracked.is_(True))
+        ).scalar()
+        if next_due is None:
+            return None
+        return max(0.0, (next_due - datetime.utcnow()).total_seconds())
+
+    def status(self) -> dict[str, Any]:
+        rows = db.session.execute(
+            select(XSpace.id, XSpace.state, XSpace.participant_count, XSpace.poll_interval, XSpace.next_poll_at)
+            .where(XSpace.poll_tracked.is_(True))
+            .order_by(XSpace.next_poll_at)
+        ).all()
+        return {
+            "min_interval": self.min_interval,
+            "max_interval": self.max_interval,
+            "tracked": [
+                {
+                    "space_id": space_id,
+                    "state": state,
+                    "participant_count": participants,
+                    "interval": interval,
+                    "next_poll_at": next_poll_at.isoformat() if next_poll_at else None,
+                }
+                for space_id, state, participants, interval, next_poll_at in rows
+            ],
+        }
+
+    def run(self, once: bool = False, stop: threading.Event | None = None) -> int:
+        """Poll until stopped (or until nothing is due with ``once``); returns spaces polled."""
+        polled = 0
+        while stop is None or not stop.is_set():
+            polled += self.poll_due()["polled"]
+            wait = self.seconds_until_due()
+            db.session.remove()
+            if once:
+                break
+            self._wake.wait(self.max_interval if wait is None else min(wait, self.max_interval))
+            self._wake.clear()
+        return polled
+
+    def start(self) -> None:
+        """Make sure this process runs the loop (when embedded) and let it look for due spaces."""
+        if self.embedded:
+            self._ensure_thread()
+        self._wake.set()
+
+    def _ensure_thread(self) -> None:
+        pid = os.getpid()
+        if self._thread is not None and self._pid == pid:
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == pid:
+                return
+            self._pid = pid
+            self._thread = threading.Thread(target=self._run_embedded, name="x-spaces-poller", daemon=True)
+            self._thread.start()
+
+    def _run_embedded(self) -> None:
+        with self._app.app_context():
+            while True:
+                try:
+                    self.run()
+                except Exception:
+                    logger.exception("Spaces poller crashed; restarting.")
+                    db.session.remove()
+                    self._wake.wait(self.min_interval)
+
+
+spaces_poller = SpacesPoller()
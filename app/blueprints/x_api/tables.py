@@ -0,0 +1,418 @@
+import base64
+import json
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import Any, Callable, Mapping
+
+from flask import current_app
+from sqlalchemy import func, or_, select, text, tuple_
+from werkzeug.datastructures import MultiDict
+
+from app.extensions import db
+from app.models import (
+    ApiRequestLog,
+    XMediaUpload,
+    XNewsStorySnapshot,
+    XPost,
+    XSpace,
+    XTrendSnapshot,
+    XUsageSnapshot,
+    XUser,
+)
+from app.services.pickers import prefix_range
+from app.services.post_search import post_search_index
+
+MAX_PAGE_LENGTH = 500
+# Unscoped, unfiltered PostgreSQL tables above this size report the planner's row estimate.
+ESTIMATE_ABOVE = 100_000
+
+
+class _LruCache:
+    """A small thread-safe LRU map whose entries optionally expire after ``ttl`` seconds."""
+
+    def __init__(self, max_size: int, ttl: float | None = None) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        self._items: OrderedDict[Any, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Any) -> Any:
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            if self.ttl is not None and item[0] + self.ttl <= time.monotonic():
+                del self._items[key]
+                return None
+            self._items.move_to_end(key)
+            return item[1]
+
+    def set(self, key: Any, value: Any) -> None:
+        with self._lock:
+            self._items[key] = (time.monotonic(), value)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+
+_cursors = _LruCache(4096)
+_counts = _LruCache(1024)
+
+
+def _iso(value: Any) -> Any:
+    return value.isoformat() if isinstance(value, (datetime, date)) else value
+
+
+def encode_cursor(sort_value: Any, key: Any) -> str:
+    value = {"dt": sort_value.isoformat()} if isinstance(sort_value, datetime) else sort_value
+    raw = json.dumps([value, key], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[Any, Any] | None:
+    try:
+        value, key = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if isinstance(value, dict) and "dt" in value:
+            value = datetime.fromisoformat(value["dt"])
+    except (ValueError, TypeError):
+        return None
+    return value, key
+
+
+def _matches_type(value: Any, column: Any) -> bool:
+    """Whether a decoded cursor ``value`` can be compared with ``column`` (bool is not an int here)."""
+    python_type = column.type.python_type
+    return isinstance(value, python_type) and not (python_type is int and isinstance(value, bool))
+
+
+@dataclass
+class TableSpec:
+    """How one stored entity is listed, sorted, searched and filtered.
+
+    ``sortable`` columns must be indexed and NOT NULL; the primary key is
+    appended to every sort so the (value, id) pair seeks to a unique row.
+    """
+
+    model: Any
+    serialize: Callable[[Any], dict[str, Any]]
+    sortable: Mapping[str, Any]
+    default_sort: str
+    search: Callable[[str], list[Any]]
+    filters: Mapping[str, Any] = field(default_factory=dict)
+    scope_column: Any = None
+
+
+def _search_users(value: str) -> list[Any]:
+    criteria = [prefix_range(func.lower(XUser.username), value.lstrip("@").lower())]
+    if value.isdigit():
+        criteria.append(XUser.id == int(value))
+    return criteria
+
+
+def _search_posts(value: str) -> list[Any]:
+    if value.isdigit():
+        return [XPost.id == int(value), XPost.author_id == int(value)]
+    matches = post_search_index.matching_ids(value)
+    if matches is None:
+        return [XPost.text.contains(value, autoescape=True)]
+    return [XPost.id.in_(matches)]
+
+
+def _search_spaces(value: str) -> list[Any]:
+    criteria = [prefix_range(XSpace.id, value), XSpace.state == value.lower()]
+    if value.isdigit():
+        criteria.append(XSpace.creator_id == int(value))
+    return criteria
+
+
+def _search_trends(value: str) -> list[Any]:
+    criteria = [prefix_range(XTrendSnapshot.trend_name, value)]
+    if value.isdigit():
+        criteria.append(XTrendSnapshot.woeid == int(value))
+    return criteria
+
+
+def _search_news(value: str) -> list[Any]:
+    return [prefix_range(XNewsStorySnapshot.news_id, value), XNewsStorySnapshot.source == value]
+
+
+def _search_media(value: str) -> list[Any]:
+    # Scoped to one user's uploads, so unindexed columns only scan that user's rows.
+    criteria = [XMediaUpload.filename.startswith(value, autoescape=True), XMediaUpload.status == value]
+    if value.isdigit():
+        criteria += [XMediaUpload.id == int(value), XMediaUpload.media_id == value]
+    return criteria
+
+
+def _search_logs(value: str) -> list[Any]:
+    criteria = [prefix_range(ApiRequestLog.endpoint, value), ApiRequestLog.method == value.upper()]
+    if value.isdigit():
+        criteria += [ApiRequestLog.id == int(value), ApiRequestLog.status_code == int(value)]
+    return criteria
+
+
+def _search_usage(value: str) -> list[Any]:
+    criteria = [XUsageSnapshot.project_id.startswith(value, autoescape=True)]
+    if value.isdigit():
+        number = int(value)
+        criteria += [
+            XUsageSnapshot.project_usage == number,
+            XUsageSnapshot.project_cap == number,
+            XUsageSnapshot.days == number,
+        ]
+    return criteria
+
+
+TABLES: dict[str, TableSpec] = {
+    "users": TableSpec(
+        model=XUser,
+        serialize=lambda row: {
+            "id": str(row.id),
+            "username": row.username,
+            "name": row.name,
+            "verified": bool(row.verified),
+            "followers_count": row.followers_count,
+            "following_count": row.following_count,
+            "post_count": row.post_count,
+            "created_at": _iso(row.created_at),
+        },
+        sortable={"id": XUser.id, "username": XUser.username},
+        default_sort="username",
+        search=_search_users,
+    ),
+    "posts": TableSpec(
+        model=XPost,
+        serialize=lambda row: {
+            "id": str(row.id),
+            "author_id": str(row.author_id),
+            "text": row.text,
+            "lang": row.lang,
+            "like_count": row.like_count,
+            "repost_count": row.repost_count,
+            "reply_count": row.reply_count,
+            "created_at": _iso(row.created_at),
+        },
+        sortable={"id": XPost.id, "created_at": XPost.created_at},
+        default_sort="created_at",
+        search=_search_posts,
+        filters={"author_id": XPost.author_id, "conversation_id": XPost.conversation_id},
+    ),
+    "spaces": TableSpec(
+        model=XSpace,
+        serialize=lambda row: {
+            "id": row.id,
+            "state": row.state,
+            "title": row.title,
+            "creator_id": str(row.creator_id) if row.creator_id else None,
+            "participant_count": row.participant_count,
+            "scheduled_start": _iso(row.scheduled_start),
+            "started_at": _iso(row.started_at),
+            "tracked": bool(row.poll_tracked),
+        },
+        sortable={"id": XSpace.id, "state": XSpace.state},
+        default_sort="id",
+        search=_search_spaces,
+        filters={"state": XSpace.state, "creator_id": XSpace.creator_id},
+    ),
+    "trends": TableSpec(
+        model=XTrendSnapshot,
+        serialize=lambda row: {
+            "id": row.id,
+            "woeid": row.woeid,
+            "source": row.source,
+            "trend_name": row.trend_name,
+            "rank": row.rank,
+            "post_count": row.tweet_count if row.tweet_count is not None else row.post_count,
+            "category": row.category,
+            "fetched_at": _iso(row.fetched_at),
+        },
+        sortable={"id": XTrendSnapshot.id, "fetched_at": XTrendSnapshot.fetched_at, "trend_name": XTrendSnapshot.trend_name},
+        default_sort="fetched_at",
+        search=_search_trends,
+        filters={"woeid": XTrendSnapshot.woeid, "source": XTrendSnapshot.source},
+    ),
+    "news": TableSpec(
+        model=XNewsStorySnapshot,
+        serialize=lambda row: {
+            "id": row.id,
+            "news_id": row.news_id,
+            "source": row.source,
+            "name": row.name,
+            "category": row.category,
+            "last_updated_at": _iso(row.last_updated_at),
+            "fetched_at": _iso(row.fetched_at),
+        },
+        sortable={"id": XNewsStorySnapshot.id, "fetched_at": XNewsStorySnapshot.fetched_at, "news_id": XNewsStorySnapshot.news_id},
+        default_sort="fetched_at",
+        search=_search_news,
+        filters={"news_id": XNewsStorySnapshot.news_id, "source": XNewsStorySnapshot.source},
+    ),
+    "media": TableSpec(
+        model=XMediaUpload,
+        serialize=lambda row: {
+            "id": row.id,
+            "filename": row.filename,
+            "media_category": row.media_category,
+            "status": row.status,
+            "media_id": row.media_id,
+            "file_size": row.file_size,
+            "created_at": _iso(row.created_at),
+        },
+        sortable={"id": XMediaUpload.id, "created_at": XMediaUpload.created_at},
+        default_sort="created_at",
+        search=_search_media,
+        scope_column=XMediaUpload.user_id,
+    ),
+    "logs": TableSpec(
+        model=ApiRequestLog,
+        serialize=lambda row: {
+            "id": row.id,
+            "user_id": row.user_id,
+            "method": row.method,
+            "url": row.url,
+            "endpoint": row.endpoint,
+            "status_code": row.status_code,
+            "billable_units": row.billable_units,
+            "created_at": _iso(row.created_at),
+        },
+        sortable={"id": ApiRequestLog.id, "created_at": ApiRequestLog.created_at},
+        default_sort="created_at",
+        search=_search_logs,
+        filters={"endpoint": ApiRequestLog.endpoint},
+        scope_column=ApiRequestLog.user_id,
+    ),
+    "usage": TableSpec(
+        model=XUsageSnapshot,
+        serialize=lambda row: {
+            "created_at": row.created_at.isoformat() if row.created_at else "",
+            "days": row.days,
+            "project_usage": row.project_usage,
+            "project_cap": row.project_cap,
+            "project_id": row.project_id,
+            "id": row.id,
+        },
+        sortable={"id": XUsageSnapshot.id, "created_at": XUsageSnapshot.created_at},
+        default_sort="created_at",
+        search=_search_usage,
+        scope_column=XUsageSnapshot.user_id,
+    ),
+}
+
+
+def _count(spec: TableSpec, query: Any, cache_key: tuple, estimate: bool) -> tuple[int, bool]:
+    """Row count of ``query``, cached for X_TABLE_COUNT_TTL seconds; large bare tables are estimated."""
+    cached = _counts.get(cache_key)
+    if cached is not None:
+        return cached
+    counted = None
+    bind = db.session.get_bind()
+    if estimate and bind.dialect.name == "postgresql":
+        approx = db.session.execute(
+            text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:name)"),
+            {"name": spec.model.__tablename__},
+        ).scalar()
+        if approx is not None and approx >= ESTIMATE_ABOVE:
+            counted = (int(approx), True)
+    if counted is None:
+        counted = (db.session.scalar(select(func.count()).select_from(query.subquery())) or 0, False)
+    _counts.ttl = float(current_app.config.get("X_TABLE_COUNT_TTL", 60))
+    _counts.set(cache_key, counted)
+    return counted
+
+
+def _sort(spec: TableSpec, args: Mapping[str, Any]) -> tuple[str, bool]:
+    """Sort column and direction from ``sort``/``dir`` or DataTables ``order[0]`` parameters."""
+    name = args.get("sort")
+    if name is None and args.get("order[0][column]") is not None:
+        name = args.get(f"columns[{args.get('order[0][column]')}][data]")
+    direction = args.get("dir") or args.get("order[0][dir]") or "desc"
+    if name not in spec.sortable:
+        name = spec.default_sort
+    return name, direction != "asc"
+
+
+def table_page(name: str, args: MultiDict[str, str], user_id: int | None) -> dict[str, Any] | None:
+    """One page of table ``name`` in the DataTables server-side response shape; None for unknown tables.
+
+    Pages are read by seeking past the last (sort value, id) pair instead of
+    OFFSET: either from an explicit ``cursor`` or, for DataTables' ``start``,
+    from the cursor remembered when the previous page was served. Jumping to
+    an arbitrary page falls back to OFFSET once. A cursor whose values do not
+    match the sort and key column types is ignored.
+    """
+    spec = TABLES.get(name)
+    if spec is None:
+        return None
+    model = spec.model
+    pk = getattr(model, model.__mapper__.primary_key[0].key)
+    draw = args.get("draw", type=int, default=1)
+    start = max(0, args.get("start", type=int, default=0))
+    length = max(1, min(args.get("length", type=int, default=25), MAX_PAGE_LENGTH))
+    search_value = str(args.get("search[value]") or args.get("q") or "").strip()
+    sort_name, descending = _sort(spec, args)
+    sort_column = spec.sortable[sort_name]
+    by_key = sort_column.key == pk.key
+
+    query = select(model)
+    if spec.scope_column is not None:
+        query = query.where(spec.scope_column == user_id)
+    scoped = query
+    filters = []
+    for key, column in spec.filters.items():
+        value = args.get(f"filter[{key}]")
+        if value in (None, ""):
+            continue
+        if column.type.python_type is int:
+            if not str(value).isdigit():
+                continue
+            value = int(value)
+        filters.append((key, value))
+        query = query.where(column == value)
+    if search_value:
+        query = query.where(or_(*spec.search(search_value)))
+    filtered = bool(filters or search_value)
+
+    scope_key = (name, user_id if spec.scope_column is not None else None)
+    total, estimated = _count(spec, scoped, scope_key, estimate=spec.scope_column is None)
+    filtered_total = total
+    if filtered:
+        filtered_total, _ = _count(spec, query, (*scope_key, tuple(filters), search_value), estimate=False)
+
+    page_key = (*scope_key, tuple(filters), search_value, sort_name, descending)
+    cursor = decode_cursor(args["cursor"]) if args.get("cursor") else _cursors.get((*page_key, start)) if start else None
+    if cursor is not None and not (_matches_type(cursor[1], pk) and (by_key or _matches_type(cursor[0], sort_column))):
+        cursor = None
+    if cursor is not None:
+        value, key = cursor
+        if by_key:
+            query = query.where(pk < key if descending else pk > key)
+        elif descending:
+            query = query.where(tuple_(sort_column, pk) < tuple_(value, key))
+        else:
+            query = query.where(tuple_(sort_column, pk) > tuple_(value, key))
+    elif start:
+        query = query.offset(start)
+
+    order = [sort_column.desc(), pk.desc()] if descending else [sort_column.asc(), pk.asc()]
+    if by_key:
+        order = order[:1]
+    rows = db.session.execute(query.order_by(*order).limit(length)).scalars().all()
+
+    next_cursor = None
+    if len(rows) == length:
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, sort_column.key), getattr(last, pk.key))
+        _cursors.set((*page_key, start + length), decode_cursor(next_cursor))
+    return {
+        "draw": draw,
+        "recordsTotal": total,
+        "recordsFiltered": filtered_total,
+        "estimated": estimated and not filtered,
+        "sort": sort_name,
+        "dir": "desc" if descending else "asc",
+        "next_cursor": next_cursor,
+        "data": [spec.serialize(row) for row in rows],
+    }
@@ -0,0 +1,177 @@
+from typing import Any
+
+from sqlalchemy import exists, literal, select
+from sqlalchemy.orm import aliased
+
+from app.blueprints.x_api.helpers import get_x_posts_by_ids, search_x_posts_recent
+from app.blueprints.x_api.pagination import XPaginator
+from app.extensions import db
+from app.models import XPost, XUser
+
+# Guards the recursive query against reply cycles in bad data.
+MAX_THREAD_DEPTH = 1000
+
+
+def resolve_conversation_id(post_id: int) -> int:
+    """Map any stored post to its conversation; unknown ids are taken as conversation ids."""
+    conversation_id = db.session.execute(
+        select(XPost.conversation_id).where(XPost.id == post_id)
+    ).scalar()
+    return conversation_id or post_id
+
+
+def load_thread_rows(conversation_id: int) -> list[dict[str, Any]]:
+    """Load every stored post of a conversation, with its depth, in one recursive query.
+
+    The walk starts at posts of the conversation whose parent is not stored (the
+    root, plus orphans below a missing ancestor) and follows replies down.
+    """
+    parent = aliased(XPost)
+    anchor = select(
+        XPost.id.label("id"),
+        XPost.in_reply_to_post_id.label("parent_id"),
+        literal(0).label("depth"),
+    ).where(
+        XPost.conversation_id == conversation_id,
+        ~exists().where(parent.id == XPost.in_reply_to_post_id),
+    )
+    tree = anchor.cte("thread", recursive=True)
+    reply = aliased(XPost)
+    tree = tree.union_all(
+        select(reply.id, reply.in_reply_to_post_id, tree.c.depth + 1)
+        .join(tree, reply.in_reply_to_post_id == tree.c.id)
+        .where(tree.c.depth < MAX_THREAD_DEPTH)
+    )
+    query = (
+        select(
+            tree.c.id,
+            tree.c.parent_id,
+            tree.c.depth,
+            XPost.text,
+            XPost.author_id,
+            XUser.username,
+            XPost.created_at,
+            XPost.like_count,
+            XPost.reply_count,
+            XPost.repost_count,
+            XPost.quote_count,
+        )
+        .join(XPost, XPost.id == tree.c.id)
+        .outerjoin(XUser, XUser.id == XPost.author_id)
+    )
+    rows: dict[int, dict[str, Any]] = {}
+    for row in db.session.execute(query).mappings():
+        # A post reachable twice (bad data) keeps its shallowest position.
+        if row["id"] not in rows or row["depth"] < rows[row["id"]]["depth"]:
+            rows[row["id"]] = dict(row)
+    return list(rows.values())
+
+
+def missing_ancestors(conversation_id: int, rows: list[dict[str, Any]]) -> list[int]:
+    """Ids of parents (and the root) the stored thread refers to but does not contain."""
+    stored = {row["id"] for row in rows}
+    missing = {row["parent_id"] for row in rows if row["parent_id"] and row["parent_id"] not in stored}
+    if conversation_id not in stored:
+        missing.add(conversation_id)
+    return sorted(missing)
+
+
+def _node(row: dict[str, Any], stored: set[int]) -> dict[str, Any]:
+    return {
+        "id": str(row["id"]),
+        "parent_id": str(row["parent_id"]) if row["parent_id"] else None,
+        "depth": row["depth"],
+        "text": row["text"],
+        "author_id": str(row["author_id"]),
+        "username": row["username"],
+        "created_at": row["created_at"].isoformat() if row["created_at"] else None,
+        "like_count": row["like_count"],
+        "reply_count": row["reply_count"],
+        "repost_count": row["repost_count"],
+        "quote_count": row["quote_count"],
+        "missing_parent": bool(row["parent_id"]) and row["parent_id"] not in stored,
+    }
+
+
+def arrange_thread(conversation_id: int, rows: list[dict[str, Any]], nested: bool = True) -> list[dict[str, Any]]:
+    """Order a thread depth-first (root, then replies oldest first).
+
+    Returns the top-level nodes with ``replies`` when ``nested``, otherwise every
+    node in reading order with its ``position``.
+    """
+    stored = {row["id"] for row in rows}
+    nodes = {row["id"]: _node(row, stored) for row in rows}
+    children: dict[int | None, list[int]] = {}
+    for row in rows:
+        parent_id = row["parent_id"] if row["parent_id"] in stored else None
+        children.setdefault(parent_id, []).append(row["id"])
+    for siblings in children.values():
+        # Post ids are time-ordered, so this is also chronological.
+        siblings.sort()
+    top = sorted(children.get(None, []), key=lambda post_id: (post_id != conversation_id, post_id))
+
+    flat: list[dict[str, Any]] = []
+    stack = list(reversed(top))
+    while stack:
+        post_id = stack.pop()
+        node = nodes[post_id]
+        node["position"] = len(flat)
+        flat.append(node)
+        stack.extend(reversed(children.get(post_id, [])))
+    if not nested:
+        return flat
+    for post_id, node in nodes.items():
+        node["replies"] = [nodes[child] for child in children.get(post_id, [])]
+    return [nodes[post_id] for post_id in top]
+
+
+def build_thread(
+    post_id: int,
+    nested: bool = True,
+    fetch_missing: bool = True,
+    fetch_replies: bool = False,
+    max_rounds: int = 5,
+    max_reply_pages: int = 5,
+) -> dict[str, Any]:
+    """Assemble the conversation containing ``post_id`` from the local database.
+
+    With ``fetch_missing``, ancestors the thread refers to but we have not stored
+    are fetched in batches through ``get_x_posts_by_ids`` (one round per missing
+    level, at most ``max_rounds``). With ``fetch_replies``, recent replies are
+    pulled first through a ``conversation_id:`` search.
+    """
+    conversation_id = resolve_conversation_id(post_id)
+    fetched = 0
+    if fetch_replies:
+        paginator = XPaginator(
+            search_x_posts_recent,
+            f"conversation_id:{conversation_id}",
+            max_results=100,
+            max_pages=max_reply_pages,
+        )
+        for page in paginator.pages():
+            fetched += len(page["data"])
+
+    rows = load_thread_rows(conversation_id)
+    missing = missing_ancestors(conversation_id, rows)
+    attempted: set[int] = set()
+    rounds = 0
+    while fetch_missing and rounds < max_rounds:
+        batch = [post for post in missing if post not in attempted]
+        if not batch:
+            break
+        attempted.update(batch)
+        rounds += 1
+        get_x_posts_by_ids([str(post) for post in batch])
+        rows = load_thread_rows(conversation_id)
+        fetched += len({row["id"] for row in rows} & set(batch))
+        missing = missing_ancestors(conversation_id, rows)
+
+    return {
+        "conversation_id": str(conversation_id),
+        "size": len(rows),
+        "max_depth": max((row["depth"] for row in rows), default=0),
+        "missing_ancestors": [str(post) for post in missing],
+        "fetched": fetched,
+        "posts": arrange_thread(conversation_id, rows, nested=nested),
+    }
@@ -0,0 +1,165 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+from flask import current_app
+from sqlalchemy import func, select
+
+from app.blueprints.auth.token_helpers import get_current_identity
+from app.blueprints.x_api.helpers import TREND_FIELDS, _filter_fields, _json_payload, _log_api_request, _store_trend_snapshots
+from app.extensions import db
+from app.models import XTrendAppearance
+from app.services.budget import budget_meter
+from app.services.http_client import x_http
+from app.services.rate_limits import endpoint_template, token_key
+from app.utils.encrypt_decrypt import get_app_var
+
+logger = logging.getLogger(__name__)
+
+TRENDS_URL = "https://api.x.com/2/trends/by/woeid/{woeid}"
+
+COMMON_WOEIDS = [
+    (1, "Worldwide"),
+    (23424977, "United States"),
+    (23424775, "Canada"),
+    (23424856, "United Kingdom"),
+    (23424848, "Spain"),
+    (23424829, "Germany"),
+    (23424803, "India"),
+    (23424747, "Brazil"),
+    (23424900, "Mexico"),
+    (23424868, "Australia"),
+    (23424853, "France"),
+    (23424846, "South Korea"),
+    (23424852, "Italy"),
+    (23424860, "Indonesia"),
+]
+
+
+def parse_woeids(value: str | None) -> list[int]:
+    return list(dict.fromkeys(int(item) for item in (value or "").split(",") if item.strip().isdigit()))
+
+
+def configured_woeids() -> list[int]:
+    return parse_woeids(current_app.config.get("X_TRENDS_WOEIDS", "1"))
+
+
+def _stalest_first(woeids: list[int]) -> list[int]:
+    """Order locations by when their trends were last seen, never-collected ones first."""
+    last_seen = dict(
+        db.session.execute(
+            select(XTrendAppearance.woeid, func.max(XTrendAppearance.last_seen_at))
+            .where(XTrendAppearance.woeid.in_(woeids))
+            .group_by(XTrendAppearance.woeid)
+        ).all()
+    )
+    return sorted(woeids, key=lambda woeid: (woeid in last_seen, last_seen.get(woeid) or 0))
+
+
+def _calls_available(headers: dict[str, str]) -> int | None:
+    """Calls left in the trends rate-limit window, or None when X has not reported one yet."""
+    key = (endpoint_template("GET", TRENDS_URL.format(woeid=1)), token_key(headers))
+    state = x_http.rate_limits.get(key)
+    if state is None or state.reset_at <= time.time():
+        return None
+    return state.remaining
+
+
+def collect_trends(woeids: list[int] | None = None, max_trends: int | None = None) -> dict[str, Any]:
+    """Fetch trends for ``woeids`` concurrently and store them in one transaction.
+
+    Locations that do not fit in what is left of the rate-limit window are
+    deferred (stalest locations go first, so they are collected next cycle).
+    Returns the cycle's call counts and latencies.
+    """
+    config = current_app.config
+    woeids = woeids or configured_woeids()
+    max_trends = max_trends or int(config.get("X_TRENDS_MAX_TRENDS", 20))
+    started = time.monotonic()
+    report: dict[str, Any] = {"woeids": len(woeids), "calls": 0, "succeeded": 0, "failed": 0, "deferred": [], "trends": 0}
+
+    token = get_app_var("X_BEARER_TOKEN")
+    if not token:
+        return {**report, "error": "Missing X_BEARER_TOKEN; update .env or app_vars before calling."}
+    headers = {"Authorization": f"Bearer {token}"}
+    params = {"max_trends": max_trends, "trend.fields": ",".join(_filter_fields(TREND_FIELDS))}
+
+    ordered = _stalest_first(woeids)
+    available = _calls_available(headers)
+    if available is not None and available < len(ordered):
+        ordered, report["deferred"] = ordered[:available], ordered[available:]
+
+    owner_user_id = get_current_identity()[0]
+
+    def fetch(woeid: int) -> tuple[Any, Exception | None, float]:
+        # A timeout or connection error for one location must not fail the cycle.
+        call_started = time.monotonic()
+        response, error = None, None
+        try:
+            with budget_meter.charge_to(owner_user_id):
+                response = x_http.get(TRENDS_URL.format(woeid=woeid), headers=headers, params=params, timeout=10)
+        except Exception as exc:
+            error = exc
+        return response, error, time.monotonic() - call_started
+
+    workers = max(1, min(int(config.get("X_TRENDS_COLLECTOR_WORKERS", 4)), len(ordered) or 1))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(fetch, ordered))
+    fetched = time.monotonic()
+
+    latencies = {}
+    for woeid, (response, error, elapsed) in zip(ordered, results):
+        report["calls"] += 1
+        latencies[str(woeid)] = round(elapsed * 1000)
+        if error is not None:
+            logger.warning("Trends request for WOEID %s failed: %s", woeid, error)
+            report["failed"] += 1
+            continue
+        _log_api_request("GET", response.url, response.status_code, response.text, dict(response.headers))
+        payload = _json_payload(response)
+        if response.status_code >= 400 or not isinstance(payload, dict) or "data" not in payload:
+            report["failed"] += 1
+            continue
+        trends = payload.get("data") or []
+        _store_trend_snapshots(trends, "woeid", woeid=woeid)
+        report["succeeded"] += 1
+        report["trends"] += len(trends)
+    db.session.commit()
+
+    finished = time.monotonic()
+    report.update(
+        {
+            "fetch_ms": round((fetched - started) * 1000),
+            "store_ms": round((finished - fetched) * 1000),
+            "cycle_ms": round((finished - started) * 1000),
+            "call_ms": latencies,
+        }
+    )
+    return report
+
+
+def run_collector(
+    woeids: list[int] | None = None,
+    interval: float | None = None,
+    once: bool = False,
+    on_cycle: Callable[[dict[str, Any]], None] | None = None,
+) -> int:
+    """Collect every ``interval`` seconds (X_TRENDS_INTERVAL_SECONDS); returns cycles run."""
+    interval = interval or float(current_app.config.get("X_TRENDS_INTERVAL_SECONDS", 900))
+    cycles = 0
+    while True:
+        try:
+            report = collect_trends(woeids)
+        except Exception:
+            logger.exception("Trend collection cycle failed.")
+            db.session.rollback()
+            report = None
+        cycles += 1
+        if on_cycle and report is not None:
+            on_cycle(report)
+        db.session.remove()
+        if once:
+            return cycles
+        elapsed = (report or {}).get("cycle_ms", 0) / 1000
+        time.sleep(max(0.0, interval - elapsed))
@@ -0,0 +1,109 @@
+from datetime import datetime, timedelta
+from typing import Any
+
+from sqlalchemy import func, or_, select
+
+from app.extensions import db
+from app.models import XTrendAppearance, XTrendSnapshot
+
+
+def _iso(value: datetime | None) -> str | None:
+    return value.isoformat() if value else None
+
+
+def serialize_appearance(row: XTrendAppearance) -> dict[str, Any]:
+    return {
+        "id": row.id,
+        "woeid": row.woeid,
+        "trend_name": row.trend_name,
+        "category": row.category,
+        "first_seen_at": _iso(row.first_seen_at),
+        "last_seen_at": _iso(row.last_seen_at),
+        "ended_at": _iso(row.ended_at),
+        "open": row.ended_at is None,
+        "observations": row.observations,
+        "first_rank": row.first_rank,
+        "best_rank": row.best_rank,
+        "rank": row.last_rank,
+        "peak_post_count": row.peak_post_count,
+        "post_count": row.last_post_count,
+    }
+
+
+def trend_woeids() -> list[int]:
+    """Locations with a stored trend timeline."""
+    return db.session.execute(
+        select(XTrendAppearance.woeid).distinct().order_by(XTrendAppearance.woeid)
+    ).scalars().all()
+
+
+def trend_timeline(woeid: int, hours: float = 24, limit: int = 100) -> list[dict[str, Any]]:
+    """Appearances in ``woeid`` that were on the list during the last ``hours``, current ones first."""
+    since = datetime.utcnow() - timedelta(hours=hours)
+    rows = db.session.execute(
+        select(XTrendAppearance)
+        .where(XTrendAppearance.woeid == woeid, XTrendAppearance.last_seen_at >= since)
+        .order_by(XTrendAppearance.ended_at.isnot(None), XTrendAppearance.last_rank, XTrendAppearance.last_seen_at.desc())
+        .limit(limit)
+    ).scalars()
+    return [serialize_appearance(row) for row in rows]
+
+
+def trend_rank_series(appearance_id: int) -> list[dict[str, Any]]:
+    """Rank and post count of one appearance each time they changed."""
+    rows = db.session.execute(
+        select(XTrendSnapshot.fetched_at, XTrendSnapshot.rank, XTrendSnapshot.tweet_count, XTrendSnapshot.post_count)
+        .where(XTrendSnapshot.appearance_id == appearance_id)
+        .order_by(XTrendSnapshot.fetched_at, XTrendSnapshot.id)
+    ).all()
+    return [
+        {"at": _iso(at), "rank": rank, "post_count": tweet_count if tweet_count is not None else post_count}
+        for at, rank, tweet_count, post_count in rows
+    ]
+
+
+def trend_movers(woeid: int, hours: float = 6, limit: int = 10) -> dict[str, Any]:
+    """Trends in ``woeid`` that climbed, fell, entered or left the list over the last ``hours``.
+
+    The earlier rank of each current trend is its last snapshot at or before the
+    cutoff; only those snapshots and the open appearances are read.
+    """
+    cutoff = datetime.utcnow() - timedelta(hours=hours)
+    rows = db.session.execute(
+        select(XTrendAppearance).where(
+            XTrendAppearance.woeid == woeid,
+            or_(XTrendAppearance.ended_at.is_(None), XTrendAppearance.ended_at >= cutoff),
+        )
+    ).scalars().all()
+    current = [row for row in rows if row.ended_at is None]
+    baseline_ids = (
+        select(func.max(XTrendSnapshot.id))
+        .where(
+            XTrendSnapshot.appearance_id.in_([row.id for row in current]),
+            XTrendSnapshot.fetched_at <= cutoff,
+        )
+        .group_by(XTrendSnapshot.appearance_id)
+    )
+    baselines = dict(
+        db.session.execute(
+            select(XTrendSnapshot.appearance_id, XTrendSnapshot.rank).where(XTrendSnapshot.id.in_(baseline_ids))
+        ).all()
+    )
+
+    moved = []
+    entered = []
+    for row in current:
+        before = baselines.get(row.id)
+        if before is None or row.first_seen_at > cutoff:
+            entered.append(serialize_appearance(row))
+        elif before != row.last_rank:
+            moved.append({**serialize_appearance(row), "previous_rank": before, "change": before - row.last_rank})
+    left = [serialize_appearance(row) for row in rows if row.ended_at is not None]
+    return {
+        "woeid": woeid,
+        "hours": hours,
+        "rising": sorted((row for row in moved if row["change"] > 0), key=lambda row: -row["change"])[:limit],
+        "falling": sorted((row for row in moved if row["change"] < 0), key=lambda row: row["change"])[:limit],
+        "entered": sorted(entered, key=lambda row: row["rank"] or 0)[:limit],
+        "left": sorted(left, key=lambda row: row["best_rank"] or 0)[:limit],
+    }
@@ -0,0 +1,114 @@
+import math
+from calendar import monthrange
+from datetime import date, datetime, timedelta
+from typing import Any
+
+from sqlalchemy import func, select
+
+from app.extensions import db
+from app.models import XUsageDaily, XUsageSnapshot
+from app.services.budget import next_reset
+
+
+def cycle_start(today: date, reset_day: int | None) -> date:
+    """First day of the billing cycle containing ``today``."""
+    reset_on = next_reset(today, reset_day)
+    year, month = (reset_on.year - 1, 12) if reset_on.month == 1 else (reset_on.year, reset_on.month - 1)
+    return date(year, month, min(reset_day or 1, monthrange(year, month)[1]))
+
+
+def daily_usage(user_id: int, days: int = 30, client_app_id: str = "") -> list[dict[str, Any]]:
+    """Posts consumed per day over the last ``days`` (the project total unless ``client_app_id``)."""
+    since = datetime.utcnow().date() - timedelta(days=days - 1)
+    rows = db.session.execute(
+        select(XUsageDaily.day, func.sum(XUsageDaily.usage))
+        .where(XUsageDaily.user_id == user_id, XUsageDaily.client_app_id == client_app_id, XUsageDaily.day >= since)
+        .group_by(XUsageDaily.day)
+        .order_by(XUsageDaily.day)
+    ).all()
+    return [{"day": day.isoformat(), "usage": int(usage or 0)} for day, usage in rows]
+
+
+def burn_rate(user_id: int, days: int = 7) -> float:
+    """Average posts consumed per day over the last ``days`` complete days."""
+    today = datetime.utcnow().date()
+    total = db.session.scalar(
+        select(func.coalesce(func.sum(XUsageDaily.usage), 0)).where(
+            XUsageDaily.user_id == user_id,
+            XUsageDaily.client_app_id == "",
+            XUsageDaily.day >= today - timedelta(days=days),
+            XUsageDaily.day < today,
+        )
+    )
+    return round(int(total or 0) / days, 1) if days else 0.0
+
+
+def app_shares(user_id: int, days: int = 30) -> list[dict[str, Any]]:
+    """Each client app's share of the posts consumed over the last ``days``."""
+    since = datetime.utcnow().date() - timedelta(days=days - 1)
+    usage = func.sum(XUsageDaily.usage).label("usage")
+    rows = db.session.execute(
+        select(XUsageDaily.client_app_id, usage)
+        .where(XUsageDaily.user_id == user_id, XUsageDaily.client_app_id != "", XUsageDaily.day >= since)
+        .group_by(XUsageDaily.client_app_id)
+        .order_by(usage.desc())
+    ).all()
+    total = sum(int(value or 0) for _, value in rows)
+    return [
+        {
+            "client_app_id": client_app_id,
+            "usage": int(value or 0),
+            "share_percent": round(int(value or 0) / total * 100, 1) if total else 0.0,
+        }
+        for client_app_id, value in rows
+    ]
+
+
+def cap_projection(user_id: int, rate_days: int = 7) -> dict[str, Any] | None:
+    """Cycle usage so far, burn rate and the date the project cap would be reached at that rate."""
+    snapshot = db.session.execute(
+        select(XUsageSnapshot.project_cap, XUsageSnapshot.cap_reset_day)
+        .where(XUsageSnapshot.user_id == user_id, XUsageSnapshot.project_cap.isnot(None))
+        .order_by(XUsageSnapshot.created_at.desc())
+        .limit(1)
+    ).first()
+    if snapshot is None:
+        return None
+    project_cap, reset_day = snapshot
+    today = datetime.utcnow().date()
+    start = cycle_start(today, reset_day)
+    used = int(
+        db.session.scalar(
+            select(func.coalesce(func.sum(XUsageDaily.usage), 0)).where(
+                XUsageDaily.user_id == user_id, XUsageDaily.client_app_id == "", XUsageDaily.day >= start
+            )
+        )
+        or 0
+    )
+    rate = burn_rate(user_id, rate_days)
+    reset_on = next_reset(today, reset_day)
+    remaining = max(0, project_cap - used)
+    cap_on = None
+    if used >= project_cap:
+        cap_on = today
+    elif rate > 0:
+        cap_on = today + timedelta(days=math.ceil(remaining / rate))
+    return {
+        "project_cap": project_cap,
+        "cycle_start": start.isoformat(),
+        "reset_on": reset_on.isoformat(),
+        "cycle_usage": used,
+        "remaining": remaining,
+        "burn_rate": rate,
+        "cap_on": cap_on.isoformat() if cap_on else None,
+        "cap_before_reset": cap_on is not None and cap_on < reset_on,
+    }
+
+
+def usage_summary(user_id: int, days: int = 30) -> dict[str, Any]:
+    return {
+        "days": daily_usage(user_id, days),
+        "burn_rate": burn_rate(user_id),
+        "projection": cap_projection(user_id),
+        "apps": app_shares(user_id, days),
+    }
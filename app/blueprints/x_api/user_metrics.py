@@ -0,0 +1,104 @@
+from datetime import datetime, timedelta
+from typing import Any
+
+from flask import current_app
+from sqlalchemy import func, select
+
+from app.blueprints.x_api.helpers import USER_METRIC_COLUMNS
+from app.extensions import db
+from app.models import XUser, XUserMetricSample
+from app.services.timeseries import downsample, rollup_series
+
+# Longest look-back the user metric routes accept, in days.
+MAX_WINDOW_DAYS = 3660
+
+
+def user_metric_series(user_id: int, bucket: str = "day", since: datetime | None = None) -> list[dict[str, Any]]:
+    """A user's follower, following, post and listed counts per ``bucket`` period.
+
+    Accounts whose counts did not change since ``since`` still get a flat series
+    carried forward from their last earlier sample.
+    """
+    return rollup_series(XUserMetricSample, "user_id", user_id, USER_METRIC_COLUMNS, bucket, since)
+
+
+def _latest_samples(user_ids: list[int], at: datetime) -> dict[int, Any]:
+    """Latest sample per user at or before ``at``; an indexed range scan per user."""
+    latest = (
+        select(func.max(XUserMetricSample.id))
+        .where(XUserMetricSample.user_id.in_(user_ids), XUserMetricSample.sampled_at <= at)
+        .group_by(XUserMetricSample.user_id)
+    )
+    rows = db.session.execute(select(XUserMetricSample).where(XUserMetricSample.id.in_(latest))).scalars()
+    return {row.user_id: row for row in rows}
+
+
+def _earliest_samples(user_ids: list[int], start: datetime, end: datetime) -> dict[int, Any]:
+    earliest = (
+        select(func.min(XUserMetricSample.id))
+        .where(
+            XUserMetricSample.user_id.in_(user_ids),
+            XUserMetricSample.sampled_at > start,
+            XUserMetricSample.sampled_at <= end,
+        )
+        .group_by(XUserMetricSample.user_id)
+    )
+    rows = db.session.execute(select(XUserMetricSample).where(XUserMetricSample.id.in_(earliest))).scalars()
+    return {row.user_id: row for row in rows}
+
+
+def local_user_ids(ids: list[str], usernames: list[str]) -> list[int]:
+    """Numeric ids plus the ids of stored users matching ``usernames`` (no X calls)."""
+    resolved = [int(value) for value in ids if str(value).isdigit()]
+    names = [name.lstrip("@").lower() for name in usernames if name.strip()]
+    if names:
+        resolved += db.session.execute(
+            select(XUser.id).where(func.lower(XUser.username).in_(names))
+        ).scalars().all()
+    return resolved
+
+
+def user_growth(user_ids: list[int], start: datetime, end: datetime | None = None) -> list[dict[str, Any]]:
+    """Change in each user's counts between ``start`` and ``end`` (now by default).
+
+    The baseline is the last sample at or before ``start``; users first seen
+    inside the window are measured from their first sample instead.
+    """
+    end = end or datetime.utcnow()
+    user_ids = list(dict.fromkeys(user_ids))
+    if not user_ids:
+        return []
+    baselines = _latest_samples(user_ids, start)
+    missing = [user_id for user_id in user_ids if user_id not in baselines]
+    if missing:
+        baselines.update(_earliest_samples(missing, start, end))
+    finals = _latest_samples(user_ids, end)
+    usernames = dict(db.session.execute(select(XUser.id, XUser.username).where(XUser.id.in_(user_ids))).all())
+
+    results = []
+    for user_id in user_ids:
+        before, after = baselines.get(user_id), finals.get(user_id)
+        entry: dict[str, Any] = {"user_id": str(user_id), "username": usernames.get(user_id)}
+        if before is None or after is None:
+            results.append({**entry, "samples": False})
+            continue
+        entry.update({"samples": True, "from": before.sampled_at.isoformat(), "to": after.sampled_at.isoformat()})
+        for column in USER_METRIC_COLUMNS:
+            old, new = getattr(before, column) or 0, getattr(after, column) or 0
+            entry[column] = new
+            entry[f"{column}_change"] = new - old
+            entry[f"{column}_change_pct"] = round((new - old) / old * 100, 2) if old else None
+        results.append(entry)
+    return results
+
+
+def downsample_user_metrics(raw_days: float | None = None, hourly_days: float | None = None) -> int:
+    """Thin old samples: one per hour after ``raw_days``, one per day after ``hourly_days``."""
+    config = current_app.config
+    raw_days = raw_days if raw_days is not None else float(config.get("X_USER_METRICS_RAW_DAYS", 7))
+    hourly_days = hourly_days if hourly_days is not None else float(config.get("X_USER_METRICS_HOURLY_DAYS", 90))
+    now = datetime.utcnow()
+    deleted = downsample(XUserMetricSample, "user_id", now - timedelta(days=raw_days), "hour")
+    deleted += downsample(XUserMetricSample, "user_id", now - timedelta(days=hourly_days), "day")
+    db.session.commit()
+    return deleted
@@ -20,5 +20,57 @@ class Config:
     X_APP_NAME = os.getenv("X_APP_NAME")
     X_REDIRECT_URI = os.getenv("X_REDIRECT_URI")
     X_ADMIN_USERNAMES = os.getenv("X_ADMIN_USERNAMES", "")
+    X_HTTP_POOL_CONNECTIONS = int(os.getenv("X_HTTP_POOL_CONNECTIONS", "10"))
+    X_HTTP_POOL_MAXSIZE = int(os.getenv("X_HTTP_POOL_MAXSIZE", "20"))
+    X_HTTP_POOL_BLOCK = os.getenv("X_HTTP_POOL_BLOCK", "false").lower() == "true"
+    X_LOOKUP_MAX_WORKERS = int(os.getenv("X_LOOKUP_MAX_WORKERS", "4"))
+    X_RATE_LIMIT_ENABLED = os.getenv("X_RATE_LIMIT_ENABLED", "true").lower() == "true"
+    X_RATE_LIMIT_MAX_WAIT = int(os.getenv("X_RATE_LIMIT_MAX_WAIT", "60"))
+    X_RATE_LIMIT_RETRIES = int(os.getenv("X_RATE_LIMIT_RETRIES", "1"))
+    X_COALESCE_ENABLED = os.getenv("X_COALESCE_ENABLED", "true").lower() == "true"
+    X_RESPONSE_CACHE_ENABLED = os.getenv("X_RESPONSE_CACHE_ENABLED", "false").lower() == "true"
+    X_RESPONSE_CACHE_SIZE = int(os.getenv("X_RESPONSE_CACHE_SIZE", "1000"))
+    X_RESPONSE_CACHE_TTLS = os.getenv("X_RESPONSE_CACHE_TTLS")
+    X_LOCAL_FRESHNESS_MINUTES = float(os.getenv("X_LOCAL_FRESHNESS_MINUTES", "0"))
+    X_USER_METRICS_RAW_DAYS = float(os.getenv("X_USER_METRICS_RAW_DAYS", "7"))
+    X_USER_METRICS_HOURLY_DAYS = float(os.getenv("X_USER_METRICS_HOURLY_DAYS", "90"))
+    X_BUDGET_MODE = os.getenv("X_BUDGET_MODE", "reject").lower()
+    X_BUDGET_DAILY_READS = int(os.getenv("X_BUDGET_DAILY_READS", "0"))
+    X_BUDGET_DAILY_WRITES = int(os.getenv("X_BUDGET_DAILY_WRITES", "0"))
+    X_BUDGET_USER_DAILY_READS = int(os.getenv("X_BUDGET_USER_DAILY_READS", "0"))
+    X_BUDGET_USER_DAILY_WRITES = int(os.getenv("X_BUDGET_USER_DAILY_WRITES", "0"))
+    X_BUDGET_THROTTLE_AT = float(os.getenv("X_BUDGET_THROTTLE_AT", "0.8"))
+    X_BUDGET_MAX_WAIT = float(os.getenv("X_BUDGET_MAX_WAIT", "60"))
+    X_BUDGET_REFRESH_SECONDS = float(os.getenv("X_BUDGET_REFRESH_SECONDS", "60"))
+    X_LOG_ASYNC = os.getenv("X_LOG_ASYNC", "true").lower() == "true"
+    X_LOG_QUEUE_SIZE = int(os.getenv("X_LOG_QUEUE_SIZE", "1000"))
+    X_LOG_BATCH_SIZE = int(os.getenv("X_LOG_BATCH_SIZE", "100"))
+    X_LOG_FLUSH_INTERVAL = float(os.getenv("X_LOG_FLUSH_INTERVAL", "1.0"))
+    X_LOG_OVERFLOW = os.getenv("X_LOG_OVERFLOW", "spill")
+    X_LOG_ID_BLOCK_SIZE = int(os.getenv("X_LOG_ID_BLOCK_SIZE", "100"))
+    X_PAYLOAD_CODEC = os.getenv("X_PAYLOAD_CODEC")
+    X_PAYLOAD_CACHE_SIZE = int(os.getenv("X_PAYLOAD_CACHE_SIZE", "512"))
+    X_MEDIA_STORE = os.getenv("X_MEDIA_STORE", "local")
+    X_MEDIA_STORE_PATH = os.getenv("X_MEDIA_STORE_PATH")
+    X_MEDIA_CHUNK_SIZE = int(os.getenv("X_MEDIA_CHUNK_SIZE", str(4 * 1024 * 1024)))
+    X_MEDIA_UPLOAD_WORKERS = int(os.getenv("X_MEDIA_UPLOAD_WORKERS", "4"))
+    X_MEDIA_SEGMENT_RETRIES = int(os.getenv("X_MEDIA_SEGMENT_RETRIES", "3"))
+    X_JOBS_EMBEDDED_WORKER = os.getenv("X_JOBS_EMBEDDED_WORKER", "true").lower() == "true"
+    X_JOBS_POLL_INTERVAL = float(os.getenv("X_JOBS_POLL_INTERVAL", "2.0"))
+    X_JOBS_MAX_ATTEMPTS = int(os.getenv("X_JOBS_MAX_ATTEMPTS", "3"))
+    X_JOBS_RETRY_BACKOFF = float(os.getenv("X_JOBS_RETRY_BACKOFF", "30"))
+    X_JOBS_STALE_AFTER = int(os.getenv("X_JOBS_STALE_AFTER", "900"))
+    X_SPACES_POLLER_EMBEDDED = os.getenv("X_SPACES_POLLER_EMBEDDED", "true").lower() == "true"
+    X_SPACES_POLL_MIN_SECONDS = int(os.getenv("X_SPACES_POLL_MIN_SECONDS", "15"))
+    X_SPACES_POLL_MAX_SECONDS = int(os.getenv("X_SPACES_POLL_MAX_SECONDS", "300"))
+    X_TRENDS_WOEIDS = os.getenv("X_TRENDS_WOEIDS", "1")
+    X_TRENDS_INTERVAL_SECONDS = float(os.getenv("X_TRENDS_INTERVAL_SECONDS", "900"))
+    X_TRENDS_MAX_TRENDS = int(os.getenv("X_TRENDS_MAX_TRENDS", "20"))
+    X_TRENDS_COLLECTOR_WORKERS = int(os.getenv("X_TRENDS_COLLECTOR_WORKERS", "4"))
+    X_TABLE_COUNT_TTL = float(os.getenv("X_TABLE_COUNT_TTL", "60"))
+    X_PICKER_CACHE_TTL = float(os.getenv("X_PICKER_CACHE_TTL", "60"))
+    X_APP_VAR_CACHE_TTL = float(os.getenv("X_APP_VAR_CACHE_TTL", "60"))
+    X_TOKEN_CACHE_TTL = float(os.getenv("X_TOKEN_CACHE_TTL", "300"))
+    X_TOKEN_REFRESH_AHEAD = float(os.getenv("X_TOKEN_REFRESH_AHEAD", "300"))
     VERSION = os.getenv("VERSION", "0.1.0")
     PORT = os.getenv("PORT", "5000")
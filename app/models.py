@@ -1,10 +1,48 @@
 from datetime import datetime
 
 from sqlalchemy import JSON
+from sqlalchemy.orm import deferred
 
 from app.extensions import db
 
 
+class PayloadField:
+    """Expose a payload stored in ``payload_blobs`` through its hash column."""
+
+    def __init__(self, hash_attr: str, kind: str = "json") -> None:
+        self.hash_attr = hash_attr
+        self.kind = kind
+
+    def __get__(self, obj, owner=None):
+        if obj is None:
+            return self
+        from app.services.payload_store import payload_store
+
+        digest = getattr(obj, self.hash_attr)
+        if self.kind == "text":
+            return payload_store.load_text(digest)
+        return payload_store.load_json(digest)
+
+    def __set__(self, obj, value) -> None:
+        from app.services.payload_store import encode_json_payload, encode_text_payload, payload_store
+
+        if value is None:
+            setattr(obj, self.hash_attr, None)
+            return
+        data = encode_text_payload(value) if self.kind == "text" else encode_json_payload(value)
+        setattr(obj, self.hash_attr, payload_store.put(data))
+
+
+class PayloadBlob(db.Model):
+    __tablename__ = "payload_blobs"
+
+    hash = db.Column(db.String(64), primary_key=True)
+    codec = db.Column(db.String(10), nullable=False)
+    size = db.Column(db.Integer, nullable=False)
+    data = db.Column(db.LargeBinary, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+
 class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), unique=True, nullable=False)
@@ -64,9 +102,23 @@ class ApiRequestLog(db.Model):
     method = db.Column(db.String(10), nullable=False)
     url = db.Column(db.Text, nullable=False)
     status_code = db.Column(db.Integer)
-    response_body = db.Column(db.Text)
+    response_body_hash = db.Column(db.String(64))
     response_headers = db.Column(JSON)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    endpoint = db.Column(db.String(120), index=True)
+    billable_kind = db.Column(db.String(10))
+    billable_units = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+
+    response_body = PayloadField("response_body_hash", kind="text")
+
+
+class IdSequence(db.Model):
+    """Hands out primary keys in blocks for rows that are inserted asynchronously."""
+
+    __tablename__ = "id_sequences"
+
+    name = db.Column(db.String(64), primary_key=True)
+    next_value = db.Column(db.BigInteger, nullable=False)
 
 
 class XUser(db.Model):
@@ -93,7 +145,7 @@ class XUser(db.Model):
     pinned_post_id = db.Column(db.BigInteger, db.ForeignKey("x_posts.id"), nullable=True)
     most_recent_post_id = db.Column(db.BigInteger, nullable=True)
 
-    raw_profile_data = db.Column(JSON, nullable=False, default=dict)
+    raw_profile_hash = db.Column(db.String(64))
 
     last_updated_at = db.Column(
         db.DateTime(timezone=True),
@@ -101,6 +153,27 @@ class XUser(db.Model):
         onupdate=db.func.now(),
     )
 
+    raw_profile_data = PayloadField("raw_profile_hash")
+
+    # Usernames are case-insensitive on X; pickers and table search match on lower(username).
+    __table_args__ = (db.Index("ix_x_users_username_lower", db.func.lower(username)),)
+
+
+class XUserMetricSample(db.Model):
+    """Public metrics of an X user, written only when one of them changed."""
+
+    __tablename__ = "x_user_metric_samples"
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.BigInteger, db.ForeignKey("x_users.id"), nullable=False)
+    sampled_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    followers_count = db.Column(db.Integer)
+    following_count = db.Column(db.Integer)
+    post_count = db.Column(db.Integer)
+    listed_count = db.Column(db.Integer)
+
+    __table_args__ = (db.Index("ix_x_user_metric_samples_user_sampled", "user_id", "sampled_at"),)
+
 
 class XPost(db.Model):
     __tablename__ = "x_posts"
@@ -123,10 +196,30 @@ class XPost(db.Model):
 
     in_reply_to_post_id = db.Column(db.BigInteger, db.ForeignKey("x_posts.id"), nullable=True)
 
-    raw_post_data = db.Column(JSON, nullable=False, default=dict)
+    raw_post_hash = db.Column(db.String(64))
 
     author = db.relationship("XUser", backref="posts", foreign_keys=[author_id])
 
+    raw_post_data = PayloadField("raw_post_hash")
+
+
+class XPostMetricSample(db.Model):
+    """Public metrics of a post, written only when one of them changed."""
+
+    __tablename__ = "x_post_metric_samples"
+
+    id = db.Column(db.Integer, primary_key=True)
+    post_id = db.Column(db.BigInteger, db.ForeignKey("x_posts.id"), nullable=False)
+    sampled_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    repost_count = db.Column(db.Integer)
+    reply_count = db.Column(db.Integer)
+    like_count = db.Column(db.Integer)
+    quote_count = db.Column(db.Integer)
+    bookmark_count = db.Column(db.Integer)
+    impression_count = db.Column(db.Integer)
+
+    __table_args__ = (db.Index("ix_x_post_metric_samples_post_sampled", "post_id", "sampled_at"),)
+
 
 class XSpace(db.Model):
     __tablename__ = "x_spaces"
@@ -142,13 +235,19 @@ class XSpace(db.Model):
     subscriber_count = db.Column(db.Integer)
     lang = db.Column(db.String(10))
     is_ticketed = db.Column(db.Boolean)
-    raw_space_data = db.Column(JSON, nullable=False, default=dict)
+    raw_space_hash = db.Column(db.String(64))
+    # Set while the spaces poller follows this space; cleared once it ends.
+    poll_tracked = db.Column(db.Boolean, nullable=False, default=False, server_default=db.false())
+    poll_interval = db.Column(db.Integer)
+    next_poll_at = db.Column(db.DateTime, index=True)
     last_updated_at = db.Column(
         db.DateTime(timezone=True),
         server_default=db.func.now(),
         onupdate=db.func.now(),
     )
 
+    raw_space_data = PayloadField("raw_space_hash")
+
     creator = db.relationship("XUser", backref="spaces", foreign_keys=[creator_id])
 
 
@@ -162,10 +261,12 @@ class XSpaceSnapshot(db.Model):
     state = db.Column(db.String(20))
     participant_count = db.Column(db.Integer)
     subscriber_count = db.Column(db.Integer)
-    raw_space_data = db.Column(JSON, nullable=False, default=dict)
+    raw_space_hash = db.Column(db.String(64))
 
     space = db.relationship("XSpace", backref="snapshots")
 
+    raw_space_data = PayloadField("raw_space_hash")
+
 
 class AnnotationDomain(db.Model):
     __tablename__ = "annotation_domains"
@@ -195,6 +296,33 @@ class PostContextAnnotation(db.Model):
     entity = db.relationship("AnnotationEntity")
 
 
+class XTrendAppearance(db.Model):
+    """One unbroken stretch of a trend in a location's trend list."""
+
+    __tablename__ = "x_trend_appearances"
+
+    id = db.Column(db.Integer, primary_key=True)
+    woeid = db.Column(db.Integer, nullable=False)
+    trend_name = db.Column(db.String(255), nullable=False, index=True)
+    category = db.Column(db.String(120))
+    trending_since = db.Column(db.String(80))
+    first_seen_at = db.Column(db.DateTime, nullable=False)
+    last_seen_at = db.Column(db.DateTime, nullable=False)
+    # Set by the first fetch the trend is missing from; open appearances have none.
+    ended_at = db.Column(db.DateTime)
+    observations = db.Column(db.Integer, nullable=False, default=0)
+    first_rank = db.Column(db.Integer)
+    best_rank = db.Column(db.Integer)
+    last_rank = db.Column(db.Integer)
+    peak_post_count = db.Column(db.Integer)
+    last_post_count = db.Column(db.Integer)
+
+    __table_args__ = (
+        db.Index("ix_x_trend_appearances_woeid_ended", "woeid", "ended_at"),
+        db.Index("ix_x_trend_appearances_woeid_last_seen", "woeid", "last_seen_at"),
+    )
+
+
 class XTrendSnapshot(db.Model):
     __tablename__ = "x_trend_snapshots"
 
@@ -207,7 +335,12 @@ class XTrendSnapshot(db.Model):
     category = db.Column(db.String(120))
     trending_since = db.Column(db.String(80))
     raw_trend_data = db.Column(JSON, nullable=False, default=dict)
-    fetched_at = db.Column(db.DateTime(timezone=True), server_default=db.func.now(), nullable=False)
+    fetched_at = db.Column(db.DateTime(timezone=True), server_default=db.func.now(), nullable=False, index=True)
+    # Location trends are only snapshotted when their rank or details change.
+    appearance_id = db.Column(db.Integer, db.ForeignKey("x_trend_appearances.id"), index=True)
+    rank = db.Column(db.Integer)
+
+    appearance = db.relationship("XTrendAppearance", backref="snapshots")
 
 
 class XNewsStorySnapshot(db.Model):
@@ -223,7 +356,7 @@ class XNewsStorySnapshot(db.Model):
     disclaimer = db.Column(db.Text)
     last_updated_at = db.Column(db.DateTime(timezone=True))
     raw_news_data = db.Column(JSON, nullable=False, default=dict)
-    fetched_at = db.Column(db.DateTime(timezone=True), server_default=db.func.now(), nullable=False)
+    fetched_at = db.Column(db.DateTime(timezone=True), server_default=db.func.now(), nullable=False, index=True)
 
 
 class XMediaUpload(db.Model):
@@ -242,15 +375,29 @@ class XMediaUpload(db.Model):
     file_size = db.Column(db.Integer)
     stored_size = db.Column(db.Integer)
     upload_mode = db.Column(db.String(20))
+    # Kept so a resumed or restarted chunked upload INITs with the same flag.
+    shared = db.Column(db.Boolean, nullable=False, default=False, server_default=db.false())
     status = db.Column(db.String(30), nullable=False, default="pending")
     error_message = db.Column(db.Text)
     media_id = db.Column(db.String(32))
     media_key = db.Column(db.String(64))
     raw_response = db.Column(JSON)
-    file_blob = db.Column(db.LargeBinary)
+    # Legacy inline storage; new files go to the media blob store via blob_hash.
+    file_blob = deferred(db.Column(db.LargeBinary))
+    blob_hash = db.Column(db.String(64), index=True)
+    chunk_size = db.Column(db.Integer)
+    segment_count = db.Column(db.Integer)
+    completed_segments = db.Column(JSON)
+    bytes_uploaded = db.Column(db.BigInteger)
     created_at = db.Column(db.DateTime(timezone=True), server_default=db.func.now(), nullable=False)
     updated_at = db.Column(db.DateTime(timezone=True), server_default=db.func.now(), onupdate=db.func.now())
 
+    __table_args__ = (db.Index("ix_x_media_uploads_user_created", "user_id", "created_at"),)
+
+    @property
+    def has_file(self) -> bool:
+        return bool(self.blob_hash) or self.file_blob is not None
+
 
 class XUsageSnapshot(db.Model):
     __tablename__ = "x_usage_snapshots"
@@ -267,3 +414,56 @@ class XUsageSnapshot(db.Model):
     daily_client_app_usage = db.Column(JSON)
     raw_usage_data = db.Column(JSON)
     created_at = db.Column(db.DateTime(timezone=True), server_default=db.func.now(), nullable=False)
+
+    __table_args__ = (db.Index("ix_x_usage_snapshots_user_created", "user_id", "created_at"),)
+
+
+class XUsageDaily(db.Model):
+    """Posts consumed per day from usage snapshots, one row per project or client app and day.
+
+    ``client_app_id`` is empty for the project-wide total. Overlapping snapshots
+    update the same rows, so the latest reading for a day wins.
+    """
+
+    __tablename__ = "x_usage_daily"
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
+    project_id = db.Column(db.String(32), nullable=False, default="")
+    client_app_id = db.Column(db.String(32), nullable=False, default="")
+    day = db.Column(db.Date, nullable=False)
+    usage = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        db.UniqueConstraint("user_id", "project_id", "client_app_id", "day", name="uq_x_usage_daily_scope_day"),
+        db.Index("ix_x_usage_daily_user_day", "user_id", "day"),
+    )
+
+
+class XApiJob(db.Model):
+    __tablename__ = "x_api_jobs"
+
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(64), nullable=False, index=True)
+    status = db.Column(db.String(20), nullable=False, default="queued")
+    params = db.Column(JSON)
+    result = db.Column(JSON)
+    error_message = db.Column(db.Text)
+    # Set for jobs that must not run twice at once (e.g. one upload per media row).
+    dedupe_key = db.Column(db.String(255), index=True)
+    progress = db.Column(db.Integer, nullable=False, default=0)
+    total = db.Column(db.Integer)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=3)
+    run_after = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), index=True)
+    x_user_id = db.Column(db.String(64))
+    locked_by = db.Column(db.String(120))
+    locked_at = db.Column(db.DateTime)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (db.Index("ix_x_api_jobs_status_run_after", "status", "run_after"),)
+
@@ -0,0 +1,135 @@
+import hashlib
+import os
+import tempfile
+from abc import ABC, abstractmethod
+from typing import BinaryIO
+
+COPY_BUFFER_SIZE = 1024 * 1024
+
+
+class BlobStore(ABC):
+    """Content-addressed storage for media files, keyed by sha256."""
+
+    @abstractmethod
+    def put(self, data: bytes) -> str:
+        ...
+
+    def put_file(self, stream: BinaryIO) -> tuple[str, int]:
+        """Store a file-like object; returns ``(hash, size)``."""
+        data = stream.read()
+        return self.put(data), len(data)
+
+    @abstractmethod
+    def open(self, digest: str) -> BinaryIO:
+        ...
+
+    @abstractmethod
+    def exists(self, digest: str) -> bool:
+        ...
+
+    @abstractmethod
+    def delete(self, digest: str) -> None:
+        ...
+
+    def local_path(self, digest: str) -> str | None:
+        """Return a filesystem path when the store has one, so it can be sent without copying."""
+        return None
+
+
+class LocalBlobStore(BlobStore):
+    def __init__(self, root: str) -> None:
+        self.root = root
+
+    def _path(self, digest: str) -> str:
+        if len(digest) != 64 or any(char not in "0123456789abcdef" for char in digest):
+            raise ValueError(f"Invalid blob hash: {digest!r}")
+        return os.path.join(self.root, digest[:2], digest[2:4], digest)
+
+    def put(self, data: bytes) -> str:
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._path(digest)
+        if os.path.exists(path):
+            return digest
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temp file first so readers never see a partial blob.
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as handle:
+                handle.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return digest
+
+    def put_file(self, stream: BinaryIO) -> tuple[str, int]:
+        # Hash while copying so large videos never have to fit in memory.
+        os.makedirs(self.root, exist_ok=True)
+        hasher = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as handle:
+                while True:
+                    chunk = stream.read(COPY_BUFFER_SIZE)
+                    if not chunk:
+                        break
+                    hasher.update(chunk)
+                    handle.write(chunk)
+                    size += len(chunk)
+            digest = hasher.hexdigest()
+            path = self._path(digest)
+            if os.path.exists(path):
+                os.remove(tmp_path)
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return digest, size
+
+    def open(self, digest: str) -> BinaryIO:
+        return open(self._path(digest), "rb")
+
+    def exists(self, digest: str) -> bool:
+        return os.path.exists(self._path(digest))
+
+    def delete(self, digest: str) -> None:
+        try:
+            os.remove(self._path(digest))
+        except FileNotFoundError:
+            pass
+
+    def local_path(self, digest: str) -> str | None:
+        path = self._path(digest)
+        return path if os.path.exists(path) else None
+
+
+BLOB_STORE_BACKENDS = {
+    "local": LocalBlobStore,
+}
+
+
+class MediaStore:
+    """Application-level handle to the configured blob store backend."""
+
+    def __init__(self) -> None:
+        self.backend: BlobStore | None = None
+
+    def init_app(self, app) -> None:
+        backend = app.config.get("X_MEDIA_STORE", "local")
+        if backend not in BLOB_STORE_BACKENDS:
+            raise ValueError(f"Unknown X_MEDIA_STORE backend: {backend}")
+        root = app.config.get("X_MEDIA_STORE_PATH") or os.path.join(app.instance_path, "media")
+        self.backend = BLOB_STORE_BACKENDS[backend](root)
+
+    def __getattr__(self, name: str):
+        if self.backend is None:
+            raise RuntimeError("The media store is not configured; call init_app first.")
+        return getattr(self.backend, name)
+
+
+media_store = MediaStore()
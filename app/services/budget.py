@@ -0,0 +1,380 @@
+import json
+import threading
+import time
+from calendar import monthrange
+from collections import deque
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from typing import Any, Mapping
+
+import requests
+from flask import has_app_context
+from sqlalchemy import func, select
+
+from app.extensions import db
+from app.models import ApiRequestLog, XUsageSnapshot
+from app.services.rate_limits import endpoint_template
+
+BILLABLE_KINDS = ("read", "write")
+
+# Calls that Pay Per Use does not bill: usage lookups, media transfer and OAuth.
+NON_BILLABLE_PREFIXES = (
+    "GET /2/usage",
+    "POST /2/media/upload",
+    "GET /2/media/upload",
+    "POST /2/oauth2",
+)
+
+# Headers marking responses that never reached X (cache, shared in-flight call, local limits).
+LOCAL_RESPONSE_HEADERS = ("x-flax-cache", "x-flax-coalesced", "x-flax-rate-limited", "x-flax-budget")
+
+# Local responses that never passed ``check``, so they hold no reservation to settle.
+UNRESERVED_RESPONSE_HEADERS = ("x-flax-cache", "x-flax-coalesced", "x-flax-budget")
+
+# Reservations for calls that were never logged (e.g. the request raised) lapse after this many seconds.
+RESERVATION_TTL = 300.0
+
+
+def billable_kind(method: str, url: str) -> str | None:
+    template = endpoint_template(method, url)
+    if template.startswith(NON_BILLABLE_PREFIXES) or not template.startswith(f"{method.upper()} /2/"):
+        return None
+    return "read" if method.upper() == "GET" else "write"
+
+
+def billable_usage(
+    method: str,
+    url: str,
+    status_code: int | None,
+    response_body: str | None = None,
+    response_headers: Mapping[str, Any] | None = None,
+) -> tuple[str | None, int]:
+    """Return ``(kind, units)`` billed for a logged call.
+
+    Reads are billed per resource returned in ``data``; writes per successful call.
+    """
+    kind = billable_kind(method, url)
+    if kind is None or not status_code or status_code >= 400:
+        return kind, 0
+    headers = {key.lower() for key in (response_headers or {})}
+    if any(header in headers for header in LOCAL_RESPONSE_HEADERS):
+        return kind, 0
+    if kind == "write":
+        return kind, 1
+    try:
+        payload = json.loads(response_body) if response_body else None
+    except ValueError:
+        return kind, 0
+    data = payload.get("data") if isinstance(payload, dict) else None
+    if isinstance(data, list):
+        return kind, len(data)
+    return kind, 1 if data else 0
+
+
+def expected_units(method: str, params: Mapping[str, Any] | None = None) -> int:
+    """Units a call is expected to bill: one per requested id or username for reads, else one."""
+    if method.upper() == "GET":
+        for key in ("ids", "usernames"):
+            value = (params or {}).get(key)
+            if value:
+                return len([item for item in str(value).split(",") if item.strip()]) or 1
+    return 1
+
+
+def budget_exceeded_response(method: str, url: str, detail: str) -> requests.Response:
+    """Build a local 429 for a call that was not sent because a budget is spent."""
+    response = requests.Response()
+    response.status_code = 429
+    response.reason = "Too Many Requests"
+    response.url = url
+    response.encoding = "utf-8"
+    response.headers.update({"Content-Type": "application/json", "x-flax-budget": "exceeded"})
+    response._content = json.dumps(
+        {
+            "title": "Budget Exceeded",
+            "detail": f"{detail}; {endpoint_template(method, url)} was not sent.",
+            "status": 429,
+        }
+    ).encode("utf-8")
+    return response
+
+
+def next_reset(today: date, reset_day: int | None) -> date:
+    """Return the next date the project cap resets on ``reset_day`` of the month."""
+    if not reset_day:
+        year, month = (today.year + 1, 1) if today.month == 12 else (today.year, today.month + 1)
+        return date(year, month, 1)
+    year, month = today.year, today.month
+    if today.day >= min(reset_day, monthrange(year, month)[1]):
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return date(year, month, min(reset_day, monthrange(year, month)[1]))
+
+
+class BudgetMeter:
+    """Meter billable X usage from ``ApiRequestLog`` and enforce daily budgets.
+
+    Daily totals are summed from the log at most every ``refresh_interval``
+    seconds and topped up in memory as calls are logged, so checking a budget
+    never costs a usage API call. Limits of 0 mean unlimited. In ``throttle``
+    mode, calls past ``throttle_at`` of a budget are spaced out over the rest of
+    the (UTC) day; in ``reject`` mode they are sent until the budget is spent.
+
+    A call that passes ``check`` reserves its expected units until ``record``
+    settles the actual units, so concurrent calls (id batches, collector
+    threads) see each other and cannot all pass at ``limit - 1``.
+    """
+
+    def __init__(self) -> None:
+        self.mode = "reject"
+        self.daily_limits = {"read": 0, "write": 0}
+        self.user_daily_limits = {"read": 0, "write": 0}
+        self.throttle_at = 0.8
+        self.max_wait = 60.0
+        self.refresh_interval = 60.0
+        self._app = None
+        self._day: date | None = None
+        self._loaded_at = 0.0
+        self._project: dict[str, int] = {}
+        self._users: dict[int, dict[str, int]] = {}
+        self._reservations: dict[tuple[int | None, str], deque[tuple[float, int]]] = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def init_app(self, app) -> None:
+        self._app = app
+        config = app.config
+        self.mode = config.get("X_BUDGET_MODE", self.mode)
+        self.daily_limits = {
+            "read": int(config.get("X_BUDGET_DAILY_READS", 0)),
+            "write": int(config.get("X_BUDGET_DAILY_WRITES", 0)),
+        }
+        self.user_daily_limits = {
+            "read": int(config.get("X_BUDGET_USER_DAILY_READS", 0)),
+            "write": int(config.get("X_BUDGET_USER_DAILY_WRITES", 0)),
+        }
+        self.throttle_at = float(config.get("X_BUDGET_THROTTLE_AT", self.throttle_at))
+        self.max_wait = float(config.get("X_BUDGET_MAX_WAIT", self.max_wait))
+        self.refresh_interval = float(config.get("X_BUDGET_REFRESH_SECONDS", self.refresh_interval))
+        self.reset()
+
+    @property
+    def enabled(self) -> bool:
+        return any(self.daily_limits.values()) or any(self.user_daily_limits.values())
+
+    def reset(self) -> None:
+        with self._lock:
+            self._day = None
+            self._loaded_at = 0.0
+            self._project = {}
+            self._users = {}
+            self._reservations = {}
+
+    @contextmanager
+    def charge_to(self, user_id: int | None):
+        """Attribute calls made on this thread (e.g. from a worker pool) to ``user_id``."""
+        previous = getattr(self._local, "user_id", None)
+        self._local.user_id = user_id
+        try:
+            yield
+        finally:
+            self._local.user_id = previous
+
+    def current_user_id(self) -> int | None:
+        user_id = getattr(self._local, "user_id", None)
+        if user_id is not None:
+            return user_id
+        if not has_app_context():
+            return None
+        from app.blueprints.auth.token_helpers import get_current_identity
+
+        return get_current_identity()[0]
+
+    def _load(self, day: date) -> None:
+        start = datetime.combine(day, datetime.min.time())
+        query = (
+            select(ApiRequestLog.user_id, ApiRequestLog.billable_kind, func.sum(ApiRequestLog.billable_units))
+            .where(ApiRequestLog.created_at >= start, ApiRequestLog.billable_units > 0)
+            .group_by(ApiRequestLog.user_id, ApiRequestLog.billable_kind)
+        )
+        # A separate connection, so the check works from pool threads and never touches the caller's session.
+        with self._app.app_context(), db.engine.connect() as connection:
+            rows = connection.execute(query).all()
+        project: dict[str, int] = {}
+        users: dict[int, dict[str, int]] = {}
+        for user_id, kind, units in rows:
+            project[kind] = project.get(kind, 0) + int(units or 0)
+            if user_id is not None:
+                totals = users.setdefault(user_id, {})
+                totals[kind] = totals.get(kind, 0) + int(units or 0)
+        with self._lock:
+            self._day, self._project, self._users = day, project, users
+            self._loaded_at = time.monotonic()
+
+    def _ensure_loaded(self) -> None:
+        today = datetime.utcnow().date()
+        if self._day != today or time.monotonic() - self._loaded_at > self.refresh_interval:
+            self._load(today)
+
+    def usage(self, user_id: int | None = None) -> dict[str, Any]:
+        """Today's metered units for the project and (optionally) one user."""
+        self._ensure_loaded()
+        with self._lock:
+            project = {kind: self._project.get(kind, 0) for kind in BILLABLE_KINDS}
+            user = {kind: self._users.get(user_id, {}).get(kind, 0) for kind in BILLABLE_KINDS}
+        return {
+            "day": self._day.isoformat(),
+            "mode": self.mode,
+            "project": {kind: {"used": project[kind], "limit": self.daily_limits[kind]} for kind in BILLABLE_KINDS},
+            "user": {kind: {"used": user[kind], "limit": self.user_daily_limits[kind]} for kind in BILLABLE_KINDS},
+        }
+
+    def _reserved(self, kind: str, user_id: int | None = None, project: bool = False) -> int:
+        """Units reserved by calls in flight for ``user_id`` (or everyone when ``project``); needs ``_lock``."""
+        cutoff = time.monotonic() - RESERVATION_TTL
+        total = 0
+        for (owner, reserved_kind), entries in self._reservations.items():
+            while entries and entries[0][0] < cutoff:
+                entries.popleft()
+            if reserved_kind == kind and (project or owner == user_id):
+                total += sum(units for _, units in entries)
+        return total
+
+    def _release(self, user_id: int | None, kind: str) -> None:
+        """Drop the oldest reservation ``user_id`` holds for ``kind``; needs ``_lock``."""
+        entries = self._reservations.get((user_id, kind))
+        if entries:
+            entries.popleft()
+
+    def cancel(self, method: str, url: str) -> None:
+        """Release the reservation of a call that passed ``check`` but will not be logged."""
+        kind = billable_kind(method, url)
+        if kind is None or not self.enabled:
+            return
+        user_id = self.current_user_id()
+        with self._lock:
+            self._release(user_id, kind)
+
+    def record(
+        self,
+        user_id: int | None,
+        kind: str | None,
+        units: int,
+        response_headers: Mapping[str, Any] | None = None,
+    ) -> None:
+        """Count a logged call towards today's totals and settle its reservation."""
+        if not kind:
+            return
+        headers = {key.lower() for key in (response_headers or {})}
+        with self._lock:
+            if not any(header in headers for header in UNRESERVED_RESPONSE_HEADERS):
+                self._release(user_id, kind)
+            if units <= 0:
+                return
+            if self._day != datetime.utcnow().date():
+                return  # the next check reloads the new day from the log
+            self._project[kind] = self._project.get(kind, 0) + units
+            if user_id is not None:
+                totals = self._users.setdefault(user_id, {})
+                totals[kind] = totals.get(kind, 0) + units
+
+    def check(self, method: str, url: str, params: Mapping[str, Any] | None = None) -> requests.Response | None:
+        """Reserve the call's expected units; wait if throttled, or return a local 429 if it must not be sent."""
+        if not self.enabled:
+            return None
+        kind = billable_kind(method, url)
+        if kind is None:
+            return None
+        self._ensure_loaded()
+        user_id = self.current_user_id()
+        with self._lock:
+            budgets = [
+                ("Daily project", self._project.get(kind, 0) + self._reserved(kind, project=True), self.daily_limits[kind])
+            ]
+            if user_id is not None:
+                used = self._users.get(user_id, {}).get(kind, 0) + self._reserved(kind, user_id)
+                budgets.append(("Your daily", used, self.user_daily_limits[kind]))
+
+            wait = 0.0
+            for label, used, limit in budgets:
+                if not limit:
+                    continue
+                if used >= limit:
+                    return budget_exceeded_response(method, url, f"{label} {kind} budget of {limit} is used up")
+                if self.mode == "throttle" and used >= limit * self.throttle_at:
+                    now = datetime.utcnow()
+                    seconds_left = (datetime.combine(now.date() + timedelta(days=1), datetime.min.time()) - now).total_seconds()
+                    wait = max(wait, seconds_left / (limit - used))
+            if wait > self.max_wait:
+                return budget_exceeded_response(method, url, f"Throttled {kind} budget allows one call every {int(wait)}s")
+            # Held until ``record`` settles the logged call, so concurrent checks count it.
+            self._reservations.setdefault((user_id, kind), deque()).append(
+                (time.monotonic(), expected_units(method, params))
+            )
+        if wait > 0:
+            time.sleep(wait)
+        return None
+
+    def projection(self, user_id: int | None) -> dict[str, Any] | None:
+        """Project reads against ``project_cap`` from the latest usage snapshot and local metering."""
+        snapshot = (
+            XUsageSnapshot.query.filter(XUsageSnapshot.user_id == user_id, XUsageSnapshot.project_cap.isnot(None))
+            .order_by(XUsageSnapshot.created_at.desc())
+            .first()
+        )
+        if snapshot is None:
+            return None
+        now = datetime.utcnow()
+        taken_at = snapshot.created_at.replace(tzinfo=None)
+
+        def reads_since(since: datetime) -> int:
+            return int(
+                db.session.scalar(
+                    select(func.coalesce(func.sum(ApiRequestLog.billable_units), 0)).where(
+                        ApiRequestLog.created_at >= since, ApiRequestLog.billable_kind == "read"
+                    )
+                )
+                or 0
+            )
+
+        estimated = (snapshot.project_usage or 0) + reads_since(taken_at)
+        daily_rate = reads_since(now - timedelta(days=7)) / 7
+        reset_on = next_reset(now.date(), snapshot.cap_reset_day)
+        days_left = max(0, (reset_on - now.date()).days)
+        projected = estimated + int(daily_rate * days_left)
+        return {
+            "project_cap": snapshot.project_cap,
+            "snapshot_usage": snapshot.project_usage,
+            "snapshot_at": snapshot.created_at.isoformat(),
+            "estimated_usage": estimated,
+            "daily_rate": round(daily_rate, 1),
+            "reset_on": reset_on.isoformat(),
+            "projected_usage": projected,
+            "projected_percent": round(projected / snapshot.project_cap * 100, 1) if snapshot.project_cap else None,
+        }
+
+    def endpoint_usage(self, day: date | None = None, limit: int = 20) -> list[dict[str, Any]]:
+        """Billable units per endpoint for ``day`` (today by default), highest first."""
+        start = datetime.combine(day or datetime.utcnow().date(), datetime.min.time())
+        rows = db.session.execute(
+            select(
+                ApiRequestLog.endpoint,
+                ApiRequestLog.billable_kind,
+                func.count(),
+                func.sum(ApiRequestLog.billable_units),
+            )
+            .where(
+                ApiRequestLog.created_at >= start,
+                ApiRequestLog.created_at < start + timedelta(days=1),
+                ApiRequestLog.billable_units > 0,
+            )
+            .group_by(ApiRequestLog.endpoint, ApiRequestLog.billable_kind)
+            .order_by(func.sum(ApiRequestLog.billable_units).desc())
+            .limit(limit)
+        ).all()
+        return [
+            {"endpoint": endpoint, "kind": kind, "calls": calls, "units": int(units or 0)}
+            for endpoint, kind, calls, units in rows
+        ]
+
+
+budget_meter = BudgetMeter()
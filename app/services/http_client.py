@@ -0,0 +1,185 @@
+import os
+import threading
+import time
+from http.cookiejar import DefaultCookiePolicy
+from typing import Any
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from app.services.budget import budget_meter
+from app.services.rate_limits import RateLimitRegistry, endpoint_template, rate_limited_response, token_key
+from app.services.response_cache import ResponseCache, copy_response, parse_ttls, request_key
+from app.services.single_flight import SingleFlight
+
+
+class XHttpClient:
+    """Process-wide keep-alive HTTP client shared by every X API call."""
+
+    def __init__(self, pool_connections: int = 10, pool_maxsize: int = 20, pool_block: bool = False):
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.pool_block = pool_block
+        self.rate_limits = RateLimitRegistry()
+        self.rate_limit_enabled = True
+        self.rate_limit_max_wait = 60.0
+        self.rate_limit_retries = 1
+        self.response_cache = ResponseCache()
+        self.coalesce_enabled = True
+        self.in_flight = SingleFlight()
+        self._session: requests.Session | None = None
+        self._session_pid: int | None = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app) -> None:
+        self.configure(
+            pool_connections=app.config.get("X_HTTP_POOL_CONNECTIONS", self.pool_connections),
+            pool_maxsize=app.config.get("X_HTTP_POOL_MAXSIZE", self.pool_maxsize),
+            pool_block=app.config.get("X_HTTP_POOL_BLOCK", self.pool_block),
+        )
+        self.rate_limit_enabled = app.config.get("X_RATE_LIMIT_ENABLED", self.rate_limit_enabled)
+        self.rate_limit_max_wait = float(app.config.get("X_RATE_LIMIT_MAX_WAIT", self.rate_limit_max_wait))
+        self.rate_limit_retries = int(app.config.get("X_RATE_LIMIT_RETRIES", self.rate_limit_retries))
+        self.coalesce_enabled = app.config.get("X_COALESCE_ENABLED", self.coalesce_enabled)
+        self.response_cache.configure(
+            enabled=app.config.get("X_RESPONSE_CACHE_ENABLED", False),
+            max_entries=int(app.config.get("X_RESPONSE_CACHE_SIZE", 1000)),
+            ttls=parse_ttls(app.config.get("X_RESPONSE_CACHE_TTLS")),
+        )
+
+    def configure(
+        self,
+        pool_connections: int | None = None,
+        pool_maxsize: int | None = None,
+        pool_block: bool | None = None,
+    ) -> None:
+        with self._lock:
+            if pool_connections is not None:
+                self.pool_connections = int(pool_connections)
+            if pool_maxsize is not None:
+                self.pool_maxsize = int(pool_maxsize)
+            if pool_block is not None:
+                self.pool_block = bool(pool_block)
+            self._close_locked()
+
+    def _build_session(self) -> requests.Session:
+        session = requests.Session()
+        # Calls carry their own Authorization header; never replay cookies between users.
+        session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            pool_block=self.pool_block,
+        )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    @property
+    def session(self) -> requests.Session:
+        # Pools must not be shared across forked worker processes.
+        pid = os.getpid()
+        if self._session is None or self._session_pid != pid:
+            with self._lock:
+                if self._session is None or self._session_pid != pid:
+                    self._session = self._build_session()
+                    self._session_pid = pid
+        return self._session
+
+    def request(self, method: str, url: str, **kwargs: Any) -> requests.Response:
+        cache_key = self.response_cache.key(method, url, kwargs)
+        if cache_key is not None:
+            cached = self.response_cache.get(cache_key)
+            if cached is not None:
+                return cached
+        elif method.upper() != "GET" and self.response_cache.enabled:
+            # A write to a resource makes cached reads of it stale.
+            self.response_cache.invalidate(url.split("?", 1)[0])
+
+        if self.coalesce_enabled and method.upper() == "GET" and not kwargs.get("stream"):
+            # Identical GETs already in flight share that call instead of sending another.
+            response, shared = self.in_flight.do(
+                request_key(method, url, kwargs),
+                lambda: self._send(method, url, **kwargs),
+            )
+            if shared:
+                response = copy_response(response, {"x-flax-coalesced": "shared"})
+        else:
+            response = self._send(method, url, **kwargs)
+        if cache_key is not None:
+            self.response_cache.put(cache_key, response)
+        return response
+
+    def _send(self, method: str, url: str, **kwargs: Any) -> requests.Response:
+        refused = budget_meter.check(method, url, kwargs.get("params"))
+        if refused is not None:
+            return refused
+        try:
+            return self._send_rate_limited(method, url, **kwargs)
+        except Exception:
+            budget_meter.cancel(method, url)
+            raise
+
+    def _send_rate_limited(self, method: str, url: str, **kwargs: Any) -> requests.Response:
+        if not self.rate_limit_enabled:
+            return self.session.request(method, url, **kwargs)
+
+        key = (endpoint_template(method, url), token_key(kwargs.get("headers")))
+        attempts = 0
+        while True:
+            wait = self.rate_limits.reserve(key)
+            if wait > self.rate_limit_max_wait:
+                # Waiting this long would stall the caller; fail fast without spending a call.
+                return rate_limited_response(method, url, self.rate_limits.get(key))
+            if wait > 0:
+                time.sleep(wait)
+                continue
+
+            response = self.session.request(method, url, **kwargs)
+            self.rate_limits.update(key, response.headers)
+            if response.status_code != 429 or attempts >= self.rate_limit_retries:
+                return response
+
+            attempts += 1
+            try:
+                reset_at = float(response.headers["x-rate-limit-reset"])
+            except (KeyError, TypeError, ValueError):
+                return response
+            self.rate_limits.exhaust(key, reset_at)
+            if reset_at - time.time() > self.rate_limit_max_wait:
+                return response
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "coalesced_calls_saved": self.in_flight.saved,
+            "coalesced_calls_sent": self.in_flight.executed,
+            "in_flight": self.in_flight.in_flight(),
+            "response_cache_hits": self.response_cache.hits,
+            "response_cache_misses": self.response_cache.misses,
+            "rate_limits": self.rate_limits.snapshot(),
+        }
+
+    def get(self, url: str, **kwargs: Any) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs: Any) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def put(self, url: str, **kwargs: Any) -> requests.Response:
+        return self.request("PUT", url, **kwargs)
+
+    def delete(self, url: str, **kwargs: Any) -> requests.Response:
+        return self.request("DELETE", url, **kwargs)
+
+    def close(self) -> None:
+        with self._lock:
+            self._close_locked()
+
+    def _close_locked(self) -> None:
+        if self._session is not None and self._session_pid == os.getpid():
+            self._session.close()
+        self._session = None
+        self._session_pid = None
+
+
+x_http = XHttpClient()
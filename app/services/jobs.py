@@ -0,0 +1,267 @@
+import logging
+import os
+import socket
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable
+
+from sqlalchemy import update
+
+from app.blueprints.auth.token_helpers import acting_as, get_current_identity
+from app.extensions import db
+from app.models import XApiJob
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_JOB_STATUSES = ("queued", "running")
+
+# kind -> (handler, default max_attempts)
+JOB_HANDLERS: dict[str, tuple[Callable[[XApiJob], Any], int]] = {}
+
+
+def job_handler(kind: str, max_attempts: int | None = None) -> Callable:
+    """Register ``func(job) -> result`` as the handler for jobs of ``kind``.
+
+    Raising from the handler fails the attempt; the job is retried with
+    exponential backoff until ``max_attempts`` is reached.
+    """
+
+    def decorator(func: Callable[[XApiJob], Any]) -> Callable[[XApiJob], Any]:
+        JOB_HANDLERS[kind] = (func, max_attempts or 0)
+        return func
+
+    return decorator
+
+
+def serialize_job(job: XApiJob) -> dict[str, Any]:
+    def iso(value: datetime | None) -> str | None:
+        return value.isoformat() if value else None
+
+    return {
+        "id": job.id,
+        "kind": job.kind,
+        "status": job.status,
+        "progress": job.progress,
+        "total": job.total,
+        "attempts": job.attempts,
+        "max_attempts": job.max_attempts,
+        "params": job.params,
+        "result": job.result,
+        "error": job.error_message,
+        "run_after": iso(job.run_after),
+        "started_at": iso(job.started_at),
+        "finished_at": iso(job.finished_at),
+        "created_at": iso(job.created_at),
+    }
+
+
+def report_progress(job: XApiJob, progress: int, total: int | None = None, result: Any = None) -> None:
+    """Save progress (and optionally a partial result to resume from) while a job runs.
+
+    Also refreshes ``locked_at``, so a job that keeps reporting is never requeued as stale.
+    """
+    job.locked_at = datetime.utcnow()
+    job.progress = progress
+    if total is not None:
+        job.total = total
+    if result is not None:
+        job.result = result
+    db.session.commit()
+
+
+class JobQueue:
+    """Database-backed queue for X API work that should not run inside a request.
+
+    Jobs are claimed with a conditional UPDATE so any number of workers (the
+    ``flask x-api worker`` process or the optional in-app thread) can share the
+    table. Jobs run as the user who queued them.
+    """
+
+    def __init__(self) -> None:
+        self.embedded = True
+        self.poll_interval = 2.0
+        self.max_attempts = 3
+        self.retry_backoff = 30.0
+        self.stale_after = 900
+        self._app = None
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._pid: int | None = None
+
+    def init_app(self, app) -> None:
+        self._app = app
+        self.embedded = app.config.get("X_JOBS_EMBEDDED_WORKER", self.embedded)
+        self.poll_interval = float(app.config.get("X_JOBS_POLL_INTERVAL", self.poll_interval))
+        self.max_attempts = int(app.config.get("X_JOBS_MAX_ATTEMPTS", self.max_attempts))
+        self.retry_backoff = float(app.config.get("X_JOBS_RETRY_BACKOFF", self.retry_backoff))
+        self.stale_after = int(app.config.get("X_JOBS_STALE_AFTER", self.stale_after))
+
+    def enqueue(
+        self,
+        kind: str,
+        params: dict[str, Any] | None = None,
+        dedupe_key: str | None = None,
+        max_attempts: int | None = None,
+        delay: float = 0,
+    ) -> tuple[XApiJob, bool]:
+        """Queue a job for the current identity; returns ``(job, created)``.
+
+        With ``dedupe_key``, an already queued or running job with the same key
+        is returned instead of adding a second one.
+        """
+        if kind not in JOB_HANDLERS:
+            raise ValueError(f"Unknown job kind: {kind}")
+        if dedupe_key:
+            existing = (
+                XApiJob.query.filter(XApiJob.dedupe_key == dedupe_key, XApiJob.status.in_(ACTIVE_JOB_STATUSES))
+                .order_by(XApiJob.id)
+                .first()
+            )
+            if existing:
+                return existing, False
+        owner_user_id, x_user_id = get_current_identity()
+        job = XApiJob(
+            kind=kind,
+            status="queued",
+            params=params or {},
+            dedupe_key=dedupe_key,
+            max_attempts=max_attempts or JOB_HANDLERS[kind][1] or self.max_attempts,
+            run_after=datetime.utcnow() + timedelta(seconds=delay),
+            user_id=owner_user_id,
+            x_user_id=x_user_id,
+        )
+        db.session.add(job)
+        db.session.commit()
+        if self.embedded:
+            self._ensure_thread()
+        self._wake.set()
+        return job, True
+
+    def claim(self, worker_id: str) -> XApiJob | None:
+        """Lock the next due job for ``worker_id``; None when nothing is due."""
+        now = datetime.utcnow()
+        candidates = db.session.execute(
+            db.select(XApiJob.id)
+            .where(XApiJob.status == "queued", XApiJob.run_after <= now)
+            .order_by(XApiJob.run_after, XApiJob.id)
+            .limit(5)
+        ).scalars().all()
+        for job_id in candidates:
+            claimed = db.session.execute(
+                update(XApiJob)
+                .where(XApiJob.id == job_id, XApiJob.status == "queued")
+                .values(
+                    status="running",
+                    locked_by=worker_id,
+                    locked_at=now,
+                    started_at=now,
+                    attempts=XApiJob.attempts + 1,
+                )
+                .execution_options(synchronize_session=False)
+            )
+            db.session.commit()
+            if claimed.rowcount:
+                return db.session.get(XApiJob, job_id, populate_existing=True)
+        return None
+
+    def requeue_stale(self) -> int:
+        """Put back jobs whose worker stopped without finishing them."""
+        cutoff = datetime.utcnow() - timedelta(seconds=self.stale_after)
+        requeued = db.session.execute(
+            update(XApiJob)
+            .where(XApiJob.status == "running", XApiJob.locked_at < cutoff)
+            .values(status="queued", locked_by=None, locked_at=None)
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        return requeued.rowcount
+
+    def run(self, job: XApiJob) -> XApiJob:
+        # Captured before the handler runs: if the job is requeued as stale meanwhile,
+        # the row's lock belongs to another worker and this one must not write the outcome.
+        owner = job.locked_by
+        handler, _ = JOB_HANDLERS.get(job.kind, (None, 0))
+        if handler is None:
+            return self._finish(job, owner, "failed", error=f"No handler registered for job kind {job.kind!r}.")
+        try:
+            with acting_as(job.user_id, job.x_user_id):
+                result = handler(job)
+        except Exception as exc:
+            logger.exception("Job %s (%s) failed on attempt %s.", job.id, job.kind, job.attempts)
+            db.session.rollback()
+            job = db.session.get(XApiJob, job.id, populate_existing=True)
+            error = str(exc) or exc.__class__.__name__
+            if job.attempts < job.max_attempts:
+                run_after = datetime.utcnow() + timedelta(seconds=self.retry_backoff * 2 ** (job.attempts - 1))
+                return self._release(job, owner, status="queued", error_message=error, run_after=run_after)
+            return self._finish(job, owner, "failed", error=error)
+        return self._finish(job, owner, "succeeded", result=result)
+
+    def _finish(
+        self, job: XApiJob, owner: str | None, status: str, result: Any = None, error: str | None = None
+    ) -> XApiJob:
+        values: dict[str, Any] = {"status": status, "error_message": error, "finished_at": datetime.utcnow()}
+        if result is not None:
+            values["result"] = result
+        return self._release(job, owner, **values)
+
+    def _release(self, job: XApiJob, owner: str | None, **values: Any) -> XApiJob:
+        """Unlock ``job`` with ``values``, unless another worker has claimed it since ``owner`` did."""
+        released = db.session.execute(
+            update(XApiJob)
+            .where(XApiJob.id == job.id, XApiJob.status == "running", XApiJob.locked_by == owner)
+            .values(locked_by=None, locked_at=None, **values)
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        if not released.rowcount:
+            logger.warning("Job %s was requeued while %s ran it; discarding this attempt's outcome.", job.id, owner)
+        return db.session.get(XApiJob, job.id, populate_existing=True)
+
+    def work(self, worker_id: str | None = None, once: bool = False, stop: threading.Event | None = None) -> int:
+        """Run jobs until stopped (or until the queue is empty with ``once``); returns jobs run."""
+        worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+        processed = 0
+        last_stale_check = 0.0
+        while stop is None or not stop.is_set():
+            if time.monotonic() - last_stale_check > 60:
+                self.requeue_stale()
+                last_stale_check = time.monotonic()
+            job = self.claim(worker_id)
+            if job is not None:
+                self.run(job)
+                processed += 1
+                db.session.remove()
+                continue
+            db.session.remove()
+            if once:
+                break
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+        return processed
+
+    def _ensure_thread(self) -> None:
+        pid = os.getpid()
+        if self._thread is not None and self._pid == pid:
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == pid:
+                return
+            self._pid = pid
+            self._thread = threading.Thread(target=self._run_embedded, name="x-api-jobs", daemon=True)
+            self._thread.start()
+
+    def _run_embedded(self) -> None:
+        with self._app.app_context():
+            while True:
+                try:
+                    self.work()
+                except Exception:
+                    logger.exception("Embedded job worker crashed; restarting.")
+                    db.session.remove()
+                    time.sleep(self.poll_interval)
+
+
+job_queue = JobQueue()
@@ -0,0 +1,218 @@
+import atexit
+import logging
+import os
+import queue
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Any
+
+from flask import has_request_context
+from sqlalchemy import text
+
+from app.extensions import db
+from app.models import ApiRequestLog, IdSequence
+from app.services.payload_store import encode_text_payload, payload_store
+
+logger = logging.getLogger(__name__)
+
+LOG_SEQUENCE = "api_request_logs"
+
+
+def _allocate_ids(connection, count: int) -> range:
+    """Claim ``count`` consecutive ids from ``id_sequences`` on ``connection``."""
+    params = {"name": LOG_SEQUENCE, "count": count}
+    updated = connection.execute(
+        text("UPDATE id_sequences SET next_value = next_value + :count WHERE name = :name"),
+        params,
+    )
+    if not updated.rowcount:
+        # Seed from existing rows the first time (e.g. a database built with create_all).
+        start = connection.execute(text("SELECT COALESCE(MAX(id), 0) + 1 FROM api_request_logs")).scalar()
+        connection.execute(
+            IdSequence.__table__.insert().values(name=LOG_SEQUENCE, next_value=start + count)
+        )
+        return range(start, start + count)
+    end = connection.execute(
+        text("SELECT next_value FROM id_sequences WHERE name = :name"),
+        params,
+    ).scalar()
+    return range(end - count, end)
+
+
+def _session_holds_sqlite_write_lock() -> bool:
+    """Whether the session has already written on SQLite, i.e. holds the database write lock."""
+    if not db.session().in_transaction() or db.session.get_bind().dialect.name != "sqlite":
+        return False
+    return db.session.connection().connection.dbapi_connection.in_transaction
+
+
+class ApiLogWriter:
+    """Queue ApiRequestLog rows from background callers and insert them in batches.
+
+    Rows logged while handling a request are written in the request's own
+    transaction: the page redirects and reads ``x_last_api_log_id`` back, and
+    that GET may be served by another worker process that never saw the queue.
+    Queued rows take ids from blocks reserved in ``id_sequences`` so callers
+    know the id before the row is written.
+    """
+
+    def __init__(self) -> None:
+        self.enabled = True
+        self.queue_size = 1000
+        self.batch_size = 100
+        self.flush_interval = 1.0
+        self.overflow = "spill"
+        self.id_block_size = 100
+        self.dropped = 0
+        self._app = None
+        self._queue: queue.Queue | None = None
+        self._pending: dict[int, dict[str, Any]] = {}
+        self._ids: deque[int] = deque()
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._pid: int | None = None
+
+    def init_app(self, app) -> None:
+        self._app = app
+        self.enabled = app.config.get("X_LOG_ASYNC", self.enabled)
+        self.queue_size = int(app.config.get("X_LOG_QUEUE_SIZE", self.queue_size))
+        self.batch_size = int(app.config.get("X_LOG_BATCH_SIZE", self.batch_size))
+        self.flush_interval = float(app.config.get("X_LOG_FLUSH_INTERVAL", self.flush_interval))
+        self.overflow = app.config.get("X_LOG_OVERFLOW", self.overflow)
+        self.id_block_size = int(app.config.get("X_LOG_ID_BLOCK_SIZE", self.id_block_size))
+        atexit.register(self.flush)
+
+    def write(self, values: dict[str, Any]) -> ApiRequestLog:
+        """Assign an id to ``values`` and queue the row; returns an unsaved record."""
+        values = {**values, "created_at": values.get("created_at") or datetime.utcnow()}
+        # Bodies go to the payload store; the row only carries the hash.
+        body = values.pop("response_body", None)
+        blob = encode_text_payload(body) if body is not None else None
+        values["response_body_hash"] = payload_store.remember(blob) if blob is not None else None
+        if not self.enabled or has_request_context():
+            return self._write_now(values, blob)
+
+        self._ensure_thread()
+        with self._lock:
+            log_id = self._ids.popleft() if self._ids else None
+        if log_id is None:
+            # No reserved block yet; take a single id instead.
+            return self._write_now(values, blob)
+
+        values["id"] = log_id
+        with self._lock:
+            self._pending[log_id] = values
+        try:
+            self._queue.put_nowait((values, blob))
+        except queue.Full:
+            with self._lock:
+                self._pending.pop(log_id, None)
+            if self.overflow == "drop":
+                self.dropped += 1
+                logger.warning("API log queue full; dropped log %s (%s dropped so far).", log_id, self.dropped)
+                return ApiRequestLog(**values)
+            return self._write_now(values, blob)
+        return ApiRequestLog(**values)
+
+    def _write_now(self, values: dict[str, Any], blob: bytes | None) -> ApiRequestLog:
+        if values.get("id") is None:
+            if _session_holds_sqlite_write_lock():
+                # SQLite has one write lock; a second connection would wait on our own transaction.
+                values["id"] = _allocate_ids(db.session.connection(), 1).start
+            else:
+                # A short transaction of its own, so the sequence row is not locked until the caller commits.
+                with db.engine.begin() as connection:
+                    values["id"] = _allocate_ids(connection, 1).start
+        if blob is not None:
+            payload_store.put(blob)
+        record = ApiRequestLog(**values)
+        db.session.add(record)
+        return record
+
+    def pending(self, log_id: int) -> ApiRequestLog | None:
+        """Return a queued row that has not reached the database yet."""
+        with self._lock:
+            values = self._pending.get(log_id)
+        return ApiRequestLog(**values) if values is not None else None
+
+    def flush(self) -> None:
+        """Write everything queued so far from the calling thread."""
+        if self._queue is None or self._pid != os.getpid() or self._app is None:
+            return
+        batch = []
+        while True:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        if batch:
+            with self._app.app_context():
+                self._insert(batch)
+
+    def _ensure_thread(self) -> None:
+        pid = os.getpid()
+        if self._thread is not None and self._pid == pid:
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == pid:
+                return
+            # Reserved ids and queued rows belong to the parent process after a fork.
+            self._pid = pid
+            self._queue = queue.Queue(maxsize=self.queue_size)
+            self._pending = {}
+            self._ids = deque()
+            self._thread = threading.Thread(target=self._run, name="api-log-writer", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        with self._app.app_context():
+            while True:
+                self._refill_ids()
+                batch = self._next_batch()
+                if batch:
+                    self._insert(batch)
+                db.session.remove()
+
+    def _next_batch(self) -> list[tuple[dict[str, Any], bytes | None]]:
+        batch = []
+        try:
+            batch.append(self._queue.get(timeout=self.flush_interval))
+        except queue.Empty:
+            return batch
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _refill_ids(self) -> None:
+        with self._lock:
+            if len(self._ids) >= self.id_block_size // 2:
+                return
+        try:
+            with db.engine.begin() as connection:
+                block = _allocate_ids(connection, self.id_block_size)
+        except Exception:
+            logger.exception("Could not reserve API log ids; falling back to synchronous ids.")
+            return
+        with self._lock:
+            self._ids.extend(block)
+
+    def _insert(self, batch: list[tuple[dict[str, Any], bytes | None]]) -> None:
+        try:
+            payload_store.put_many([blob for _, blob in batch if blob is not None])
+            db.session.execute(ApiRequestLog.__table__.insert(), [values for values, _ in batch])
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            self.dropped += len(batch)
+            logger.exception("Failed to write %s API log rows.", len(batch))
+        finally:
+            with self._lock:
+                for values, _ in batch:
+                    self._pending.pop(values["id"], None)
+
+
+api_log_writer = ApiLogWriter()
@@ -0,0 +1,165 @@
+import hashlib
+import json
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Any, Iterable
+
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from app.extensions import db
+from app.models import PayloadBlob
+
+try:
+    import zstandard
+except ImportError:  # zstd is optional; zlib is always available.
+    zstandard = None
+
+
+def encode_json_payload(value: Any) -> bytes:
+    """Serialize JSON canonically so equal payloads hash to the same blob."""
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def encode_text_payload(value: str) -> bytes:
+    return value.encode("utf-8")
+
+
+def payload_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def compress_payload(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        return zstandard.ZstdCompressor(level=10).compress(data)
+    if codec == "zlib":
+        return zlib.compress(data, 6)
+    return data
+
+
+def decompress_payload(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("A stored payload uses zstd; install the zstandard package to read it.")
+        return zstandard.ZstdDecompressor().decompress(data)
+    if codec == "zlib":
+        return zlib.decompress(data)
+    return data
+
+
+class PayloadStore:
+    """Content-addressed, compressed storage for API payloads.
+
+    Blobs are keyed by the sha256 of their uncompressed bytes, so a payload that
+    is logged and stored on several rows is written once. Recently used blobs are
+    kept decompressed in a small in-process LRU.
+    """
+
+    def __init__(self, codec: str | None = None, cache_size: int = 512) -> None:
+        self.codec = codec or ("zstd" if zstandard is not None else "zlib")
+        self.cache_size = cache_size
+        self._cache: OrderedDict[str, bytes] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def init_app(self, app) -> None:
+        codec = app.config.get("X_PAYLOAD_CODEC") or self.codec
+        if codec == "zstd" and zstandard is None:
+            app.logger.warning("X_PAYLOAD_CODEC=zstd but zstandard is not installed; using zlib.")
+            codec = "zlib"
+        self.codec = codec
+        self.cache_size = int(app.config.get("X_PAYLOAD_CACHE_SIZE", self.cache_size))
+
+    def remember(self, data: bytes) -> str:
+        """Hash ``data`` and keep it in the cache without touching the database."""
+        digest = payload_hash(data)
+        self._cache_put(digest, data)
+        return digest
+
+    def put(self, data: bytes) -> str:
+        return self.put_many([data])[0]
+
+    def put_many(self, blobs: Iterable[bytes]) -> list[str]:
+        """Store blobs in the current session's transaction and return their hashes."""
+        digests = []
+        rows: dict[str, dict[str, Any]] = {}
+        for data in blobs:
+            digest = self.remember(data)
+            digests.append(digest)
+            if digest not in rows:
+                rows[digest] = {
+                    "hash": digest,
+                    "codec": self.codec,
+                    "size": len(data),
+                    "data": compress_payload(data, self.codec),
+                }
+        if rows:
+            self._insert_missing(list(rows.values()))
+        return digests
+
+    def _insert_missing(self, rows: list[dict[str, Any]]) -> None:
+        dialect = db.session.get_bind().dialect.name
+        table = PayloadBlob.__table__
+        if dialect in ("sqlite", "postgresql"):
+            insert = sqlite_insert if dialect == "sqlite" else postgresql_insert
+            db.session.execute(insert(table).on_conflict_do_nothing(index_elements=["hash"]), rows)
+            return
+        existing = set(
+            db.session.execute(
+                db.select(table.c.hash).where(table.c.hash.in_([row["hash"] for row in rows]))
+            ).scalars()
+        )
+        missing = [row for row in rows if row["hash"] not in existing]
+        if missing:
+            db.session.execute(table.insert(), missing)
+
+    def get(self, digest: str | None) -> bytes | None:
+        if not digest:
+            return None
+        return self.get_many([digest]).get(digest)
+
+    def get_many(self, digests: Iterable[str | None]) -> dict[str, bytes]:
+        """Return decompressed blobs, loading any uncached ones in one query."""
+        found: dict[str, bytes] = {}
+        missing = []
+        with self._lock:
+            for digest in digests:
+                if not digest or digest in found:
+                    continue
+                if digest in self._cache:
+                    self._cache.move_to_end(digest)
+                    found[digest] = self._cache[digest]
+                else:
+                    missing.append(digest)
+        if missing:
+            table = PayloadBlob.__table__
+            rows = db.session.execute(
+                db.select(table.c.hash, table.c.codec, table.c.data).where(table.c.hash.in_(missing))
+            )
+            for digest, codec, data in rows:
+                found[digest] = decompress_payload(data, codec)
+                self._cache_put(digest, found[digest])
+        return found
+
+    def prefetch(self, digests: Iterable[str | None]) -> None:
+        self.get_many(digests)
+
+    def load_json(self, digest: str | None) -> Any:
+        data = self.get(digest)
+        return json.loads(data) if data is not None else None
+
+    def load_text(self, digest: str | None) -> str | None:
+        data = self.get(digest)
+        return data.decode("utf-8") if data is not None else None
+
+    def _cache_put(self, digest: str, data: bytes) -> None:
+        if self.cache_size <= 0:
+            return
+        with self._lock:
+            self._cache[digest] = data
+            self._cache.move_to_end(digest)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+
+payload_store = PayloadStore()
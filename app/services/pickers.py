@@ -0,0 +1,86 @@
+import threading
+import time
+from typing import Any
+
+from flask import current_app
+from sqlalchemy import and_, func, or_, select
+
+from app.extensions import db
+from app.models import XPost, XUser
+from app.services.post_search import post_search_index
+
+PICKER_SIZE = 200
+POST_LABEL_LENGTH = 80
+
+
+def prefix_range(column: Any, value: str) -> Any:
+    """``column LIKE 'value%'`` written as a range so a plain b-tree index is used on any dialect."""
+    return and_(column >= value, column < value + "\uffff")
+
+
+class PickerCache:
+    """Small id/label lists for the user and post dropdowns rendered on most pages.
+
+    Only the columns a dropdown shows are read, and the lists are kept for
+    X_PICKER_CACHE_TTL seconds per process. The upsert helpers call
+    ``invalidate`` when a stored user or post the lists could show changes, so
+    this process sees new rows immediately and other processes within the TTL.
+    """
+
+    def __init__(self) -> None:
+        self._lists: dict[str, tuple[float, list[dict[str, Any]]]] = {}
+        self._lock = threading.Lock()
+
+    def invalidate(self, kind: str | None = None) -> None:
+        with self._lock:
+            if kind is None:
+                self._lists.clear()
+            else:
+                self._lists.pop(kind, None)
+
+    def _cached(self, kind: str, load) -> list[dict[str, Any]]:
+        ttl = float(current_app.config.get("X_PICKER_CACHE_TTL", 60))
+        with self._lock:
+            cached = self._lists.get(kind)
+        if cached is not None and cached[0] > time.monotonic():
+            return cached[1]
+        rows = load()
+        with self._lock:
+            self._lists[kind] = (time.monotonic() + ttl, rows)
+        return rows
+
+    def users(self) -> list[dict[str, Any]]:
+        return self._cached("users", lambda: self.search_users("", PICKER_SIZE))
+
+    def posts(self) -> list[dict[str, Any]]:
+        return self._cached("posts", lambda: self.search_posts("", PICKER_SIZE))
+
+    def search_users(self, query: str, limit: int = 20) -> list[dict[str, Any]]:
+        """Stored users whose username starts with ``query``, ignoring case (or whose id equals it), by username."""
+        statement = select(XUser.id, XUser.username, XUser.name)
+        query = query.strip().lstrip("@")
+        if query:
+            criteria = [prefix_range(func.lower(XUser.username), query.lower())]
+            if query.isdigit():
+                criteria.append(XUser.id == int(query))
+            statement = statement.where(or_(*criteria))
+        rows = db.session.execute(statement.order_by(XUser.username).limit(limit)).all()
+        return [{"id": str(user_id), "username": username, "name": name} for user_id, username, name in rows]
+
+    def search_posts(self, query: str, limit: int = 20) -> list[dict[str, Any]]:
+        """Recent stored posts matching ``query`` by id, author id or the full-text index."""
+        statement = select(XPost.id, func.substr(XPost.text, 1, POST_LABEL_LENGTH))
+        query = query.strip()
+        if query.isdigit():
+            statement = statement.where(or_(XPost.id == int(query), XPost.author_id == int(query)))
+        elif query:
+            matches = post_search_index.matching_ids(query)
+            if matches is None:
+                statement = statement.where(XPost.text.contains(query, autoescape=True))
+            else:
+                statement = statement.where(XPost.id.in_(matches))
+        rows = db.session.execute(statement.order_by(XPost.created_at.desc(), XPost.id.desc()).limit(limit)).all()
+        return [{"id": str(post_id), "text": text or ""} for post_id, text in rows]
+
+
+picker_cache = PickerCache()
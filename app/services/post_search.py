@@ -0,0 +1,163 @@
+import re
+from typing import Any, Iterable
+
+from sqlalchemy import BigInteger, column, inspect, text
+
+from app.extensions import db
+from app.models import AnnotationEntity, PostContextAnnotation, XPost, XUser
+
+SEARCH_TABLE = "x_posts_fts"
+_TERM = re.compile(r"\w+\*?", re.UNICODE)
+
+
+def search_terms(query: str) -> list[str]:
+    """Split a query into words; a trailing ``*`` marks a prefix match. All words must match."""
+    return _TERM.findall(query or "")[:32]
+
+
+class PostSearchIndex:
+    """Full-text index over post text, author username and annotation entity names.
+
+    SQLite uses an FTS5 table keyed by post id; PostgreSQL uses a ``tsvector``
+    column with a GIN index. Both live in ``x_posts_fts`` (created by migration)
+    and are refreshed by ``update`` from the post upsert path. Other databases
+    (or a database without the table) simply skip indexing.
+    """
+
+    def __init__(self) -> None:
+        self._available: dict[str, bool] = {}
+
+    def dialect(self) -> str | None:
+        bind = db.session.get_bind()
+        name = bind.dialect.name
+        if name not in {"sqlite", "postgresql"}:
+            return None
+        key = str(bind.url)
+        if key not in self._available:
+            self._available[key] = inspect(bind).has_table(SEARCH_TABLE)
+        return name if self._available[key] else None
+
+    def documents(self, post_ids: Iterable[int]) -> list[dict[str, Any]]:
+        post_ids = list(post_ids)
+        rows = db.session.execute(
+            db.select(XPost.id, XPost.text, XUser.username)
+            .outerjoin(XUser, XUser.id == XPost.author_id)
+            .where(XPost.id.in_(post_ids))
+        ).all()
+        entities: dict[int, list[str]] = {}
+        for post_id, name in db.session.execute(
+            db.select(PostContextAnnotation.post_id, AnnotationEntity.name)
+            .join(AnnotationEntity, AnnotationEntity.id == PostContextAnnotation.entity_id)
+            .where(PostContextAnnotation.post_id.in_(post_ids))
+        ):
+            entities.setdefault(post_id, []).append(name)
+        return [
+            {
+                "post_id": post_id,
+                "text": text_value or "",
+                "username": username or "",
+                "entities": " ".join(sorted(set(entities.get(post_id, [])))),
+            }
+            for post_id, text_value, username in rows
+        ]
+
+    def update(self, post_ids: Iterable[int]) -> None:
+        """Re-index ``post_ids`` inside the caller's transaction."""
+        post_ids = list(dict.fromkeys(post_ids))
+        dialect = self.dialect()
+        if not post_ids or dialect is None:
+            return
+        db.session.flush()
+        documents = self.documents(post_ids)
+        if not documents:
+            return
+        if dialect == "sqlite":
+            db.session.execute(
+                text(f"DELETE FROM {SEARCH_TABLE} WHERE rowid = :post_id"),
+                [{"post_id": document["post_id"]} for document in documents],
+            )
+            db.session.execute(
+                text(
+                    f"INSERT INTO {SEARCH_TABLE} (rowid, text, username, entities) "
+                    "VALUES (:post_id, :text, :username, :entities)"
+                ),
+                documents,
+            )
+            return
+        db.session.execute(
+            text(
+                f"INSERT INTO {SEARCH_TABLE} (post_id, document) VALUES (:post_id, "
+                "setweight(to_tsvector('simple', :text), 'A') || "
+                "setweight(to_tsvector('simple', :username), 'B') || "
+                "setweight(to_tsvector('simple', :entities), 'C')) "
+                "ON CONFLICT (post_id) DO UPDATE SET document = excluded.document"
+            ),
+            documents,
+        )
+
+    def rebuild(self, batch_size: int = 1000) -> int:
+        """Index every stored post; returns the number indexed."""
+        if self.dialect() is None:
+            return 0
+        indexed = 0
+        last_id = None
+        while True:
+            query = db.select(XPost.id).order_by(XPost.id).limit(batch_size)
+            if last_id is not None:
+                query = query.where(XPost.id > last_id)
+            post_ids = db.session.execute(query).scalars().all()
+            if not post_ids:
+                return indexed
+            self.update(post_ids)
+            db.session.commit()
+            indexed += len(post_ids)
+            last_id = post_ids[-1]
+
+    def search(self, query: str, page: int = 1, per_page: int = 20, sort: str = "relevance") -> dict[str, Any]:
+        """Return ``{"total", "post_ids"}`` for one page of matches, best (or newest) first."""
+        terms = search_terms(query)
+        dialect = self.dialect()
+        if not terms or dialect is None:
+            return {"total": 0, "post_ids": []}
+        offset = (max(page, 1) - 1) * per_page
+        order = "p.created_at DESC, p.id DESC" if sort == "recent" else "score, p.id DESC"
+        match = self._match(terms, dialect)
+        if dialect == "sqlite":
+            source = (
+                f"FROM {SEARCH_TABLE} JOIN x_posts p ON p.id = {SEARCH_TABLE}.rowid "
+                f"WHERE {SEARCH_TABLE} MATCH :match"
+            )
+            score = f"bm25({SEARCH_TABLE}, 1.0, 0.5, 0.25)"
+        else:
+            source = (
+                f"FROM {SEARCH_TABLE} s JOIN x_posts p ON p.id = s.post_id "
+                "WHERE s.document @@ to_tsquery('simple', :match)"
+            )
+            score = "-ts_rank(s.document, to_tsquery('simple', :match))"
+        total = db.session.execute(text(f"SELECT count(*) {source}"), {"match": match}).scalar()
+        post_ids = db.session.execute(
+            text(f"SELECT p.id, {score} AS score {source} ORDER BY {order} LIMIT :limit OFFSET :offset"),
+            {"match": match, "limit": per_page, "offset": offset},
+        ).scalars().all()
+        return {"total": total or 0, "post_ids": post_ids}
+
+    def matching_ids(self, query: str) -> Any:
+        """A SELECT of the ids of posts matching ``query``, for ``XPost.id.in_()``; None without an index."""
+        terms = search_terms(query)
+        dialect = self.dialect()
+        if not terms or dialect is None:
+            return None
+        if dialect == "sqlite":
+            sql = f"SELECT rowid AS id FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH :match"
+        else:
+            sql = f"SELECT post_id AS id FROM {SEARCH_TABLE} WHERE document @@ to_tsquery('simple', :match)"
+        return text(sql).bindparams(match=self._match(terms, dialect)).columns(column("id", BigInteger))
+
+    @staticmethod
+    def _match(terms: list[str], dialect: str) -> str:
+        if dialect == "sqlite":
+            return " ".join('"{}"{}'.format(term.rstrip("*"), "*" if term.endswith("*") else "") for term in terms)
+        return " & ".join(re.sub(r"\W", "", term) + (":*" if term.endswith("*") else "") for term in terms)
+
+
+post_search_index = PostSearchIndex()
@@ -0,0 +1,136 @@
+import hashlib
+import json
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Mapping
+from urllib.parse import urlsplit
+
+import requests
+
+_ID_SEGMENT = re.compile(r"\d")
+# Words that can follow /spaces/ without being a Space id.
+_SPACE_KEYWORDS = {"search", "by"}
+
+
+def endpoint_template(method: str, url: str) -> str:
+    """Collapse ids in an X API URL so calls to the same endpoint share a bucket."""
+    version, *segments = urlsplit(url).path.strip("/").split("/")
+    template = [version]
+    previous = None
+    for segment in segments:
+        if previous == "username":
+            template.append(":username")
+        elif (previous == "spaces" and segment not in _SPACE_KEYWORDS) or _ID_SEGMENT.search(segment):
+            template.append(":id")
+        else:
+            template.append(segment)
+        previous = segment
+    return f"{method.upper()} /{'/'.join(template)}"
+
+
+def token_key(headers: Mapping[str, Any] | None) -> str:
+    """Return a stable, non-reversible key for the credential on a request."""
+    authorization = (headers or {}).get("Authorization")
+    if not authorization:
+        return "anonymous"
+    return hashlib.sha256(str(authorization).encode("utf-8")).hexdigest()[:16]
+
+
+@dataclass
+class RateLimitState:
+    limit: int
+    remaining: int
+    reset_at: float
+
+
+class RateLimitRegistry:
+    """Track x-rate-limit-* headers per (endpoint template, token)."""
+
+    def __init__(self) -> None:
+        self._states: dict[tuple[str, str], RateLimitState] = {}
+        self._lock = threading.Lock()
+
+    def reserve(self, key: tuple[str, str]) -> float:
+        """Claim one call from the bucket; return seconds to wait first (0 if none)."""
+        now = time.time()
+        with self._lock:
+            state = self._states.get(key)
+            if state is None:
+                return 0.0
+            if state.reset_at <= now:
+                # Window rolled over; the next response will report the real numbers.
+                self._states.pop(key, None)
+                return 0.0
+            if state.remaining > 0:
+                state.remaining -= 1
+                return 0.0
+            return state.reset_at - now
+
+    def update(self, key: tuple[str, str], headers: Mapping[str, Any]) -> None:
+        try:
+            limit = int(headers["x-rate-limit-limit"])
+            remaining = int(headers["x-rate-limit-remaining"])
+            reset_at = float(headers["x-rate-limit-reset"])
+        except (KeyError, TypeError, ValueError):
+            return
+        with self._lock:
+            self._states[key] = RateLimitState(limit=limit, remaining=remaining, reset_at=reset_at)
+
+    def exhaust(self, key: tuple[str, str], reset_at: float) -> None:
+        with self._lock:
+            state = self._states.get(key)
+            if state is None:
+                self._states[key] = RateLimitState(limit=0, remaining=0, reset_at=reset_at)
+            else:
+                state.remaining = 0
+                state.reset_at = max(state.reset_at, reset_at)
+
+    def get(self, key: tuple[str, str]) -> RateLimitState | None:
+        with self._lock:
+            return self._states.get(key)
+
+    def snapshot(self) -> list[dict[str, Any]]:
+        with self._lock:
+            return [
+                {
+                    "endpoint": endpoint,
+                    "token": token,
+                    "limit": state.limit,
+                    "remaining": state.remaining,
+                    "reset_at": state.reset_at,
+                }
+                for (endpoint, token), state in sorted(self._states.items())
+            ]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._states.clear()
+
+
+def rate_limited_response(method: str, url: str, state: RateLimitState) -> requests.Response:
+    """Build a local 429 for a call that was not sent because its bucket is empty."""
+    wait = max(0, int(state.reset_at - time.time()))
+    response = requests.Response()
+    response.status_code = 429
+    response.reason = "Too Many Requests"
+    response.url = url
+    response.encoding = "utf-8"
+    response.headers.update(
+        {
+            "Content-Type": "application/json",
+            "x-rate-limit-limit": str(state.limit),
+            "x-rate-limit-remaining": "0",
+            "x-rate-limit-reset": str(int(state.reset_at)),
+            "x-flax-rate-limited": "local",
+        }
+    )
+    response._content = json.dumps(
+        {
+            "title": "Too Many Requests",
+            "detail": f"Rate limit for {endpoint_template(method, url)} resets in {wait}s; request was not sent.",
+            "status": 429,
+        }
+    ).encode("utf-8")
+    return response
@@ -0,0 +1,155 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Mapping
+from urllib.parse import parse_qsl, urlsplit, urlunsplit
+
+import requests
+
+from app.services.rate_limits import endpoint_template, token_key
+
+# Seconds to keep successful responses per endpoint; endpoints not listed are never cached.
+DEFAULT_RESPONSE_TTLS = {
+    "GET /2/users/by/username/:username": 300,
+    "GET /2/users/:id": 300,
+    "GET /2/tweets/:id": 60,
+    "GET /2/lists/:id": 300,
+    "GET /2/communities/:id": 600,
+    "GET /2/news/:id": 300,
+}
+
+
+def parse_ttls(value: str | None) -> dict[str, float]:
+    """Parse ``"GET /2/users/:id=600;GET /2/tweets/:id=0"`` into a TTL map."""
+    ttls: dict[str, float] = {}
+    for item in (value or "").split(";"):
+        template, _, seconds = item.rpartition("=")
+        if template.strip() and seconds.strip():
+            ttls[template.strip()] = float(seconds)
+    return ttls
+
+
+def _normalize_params(url: str, params: Any) -> tuple:
+    items = parse_qsl(urlsplit(url).query, keep_blank_values=True)
+    if isinstance(params, Mapping):
+        items += [(key, value) for key, value in params.items() if value is not None]
+    elif params:
+        items += list(params)
+    normalized = []
+    for key, value in items:
+        value = str(value)
+        if key.endswith(".fields") or key == "expansions":
+            # Field lists mean the same thing in any order.
+            value = ",".join(sorted(part for part in value.split(",") if part))
+        normalized.append((key, value))
+    return tuple(sorted(normalized))
+
+
+def request_key(method: str, url: str, kwargs: Mapping[str, Any]) -> tuple:
+    """Identify a call by method, URL, normalized params and credential."""
+    parts = urlsplit(url)
+    base = urlunsplit((parts.scheme, parts.netloc, parts.path, "", ""))
+    return (method.upper(), base, _normalize_params(url, kwargs.get("params")), token_key(kwargs.get("headers")))
+
+
+def copy_response(response: requests.Response, headers: Mapping[str, str] | None = None) -> requests.Response:
+    return build_response(response.url, response.status_code, response.content, {**response.headers, **(headers or {})})
+
+
+def build_response(url: str, status_code: int, content: bytes, headers: Mapping[str, str]) -> requests.Response:
+    response = requests.Response()
+    response.status_code = status_code
+    response.url = url
+    response.encoding = "utf-8"
+    response.headers.update(headers)
+    response._content = content
+    return response
+
+
+def local_response(url: str, params: Mapping[str, Any] | None, payload: Any) -> requests.Response:
+    """Wrap data served from the local database as if X had returned it."""
+    prepared = requests.Request("GET", url, params=params).prepare()
+    return build_response(
+        prepared.url,
+        200,
+        json.dumps(payload).encode("utf-8"),
+        {"Content-Type": "application/json", "x-flax-cache": "local"},
+    )
+
+
+@dataclass
+class CachedResponse:
+    url: str
+    status_code: int
+    content: bytes
+    headers: dict[str, str]
+    expires_at: float
+
+
+class ResponseCache:
+    """Size-bounded LRU of successful GET responses with per-endpoint TTLs."""
+
+    def __init__(self, max_entries: int = 1000) -> None:
+        self.enabled = False
+        self.max_entries = max_entries
+        self.ttls = dict(DEFAULT_RESPONSE_TTLS)
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[tuple, CachedResponse] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def configure(self, enabled: bool, max_entries: int, ttls: Mapping[str, float] | None = None) -> None:
+        self.enabled = enabled
+        self.max_entries = max_entries
+        self.ttls = {**DEFAULT_RESPONSE_TTLS, **(ttls or {})}
+        self.clear()
+
+    def key(self, method: str, url: str, kwargs: Mapping[str, Any]) -> tuple | None:
+        """Return the cache key for a call, or None if the endpoint is not cacheable."""
+        if not self.enabled or method.upper() != "GET":
+            return None
+        template = endpoint_template(method, url)
+        if self.ttls.get(template, 0) <= 0:
+            return None
+        return (template, *request_key(method, url, kwargs)[1:])
+
+    def get(self, key: tuple) -> requests.Response | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.expires_at <= time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return build_response(entry.url, entry.status_code, entry.content, {**entry.headers, "x-flax-cache": "hit"})
+
+    def put(self, key: tuple, response: requests.Response) -> None:
+        if response.status_code != 200:
+            return
+        entry = CachedResponse(
+            url=response.url,
+            status_code=response.status_code,
+            content=response.content,
+            headers=dict(response.headers),
+            expires_at=time.monotonic() + self.ttls[key[0]],
+        )
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, url_prefix: str | None = None) -> None:
+        with self._lock:
+            if url_prefix is None:
+                self._entries.clear()
+                return
+            for key in [key for key in self._entries if key[1] == url_prefix or key[1].startswith(url_prefix + "/")]:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        self.invalidate()
@@ -0,0 +1,102 @@
+from datetime import datetime, timedelta
+from typing import Any
+
+from sqlalchemy import delete, func, select
+
+from app.extensions import db
+
+BUCKETS = {"minute": timedelta(minutes=1), "hour": timedelta(hours=1), "day": timedelta(days=1)}
+# Longest series rollup_series returns; older periods only seed the first value.
+MAX_PERIODS = 10_000
+_SQLITE_FORMATS = {"minute": "%Y-%m-%d %H:%M:00", "hour": "%Y-%m-%d %H:00:00", "day": "%Y-%m-%d 00:00:00"}
+
+
+def time_bucket(column: Any, bucket: str) -> Any:
+    """SQL expression truncating ``column`` to the start of its minute, hour or day."""
+    if bucket not in BUCKETS:
+        raise ValueError(f"Unknown bucket: {bucket}")
+    if db.session.get_bind().dialect.name == "sqlite":
+        return func.strftime(_SQLITE_FORMATS[bucket], column)
+    return func.date_trunc(bucket, column)
+
+
+def truncate(value: datetime, bucket: str) -> datetime:
+    if bucket == "minute":
+        return value.replace(second=0, microsecond=0)
+    if bucket == "hour":
+        return value.replace(minute=0, second=0, microsecond=0)
+    return value.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def rollup_series(
+    model: Any,
+    owner_column: str,
+    owner_id: Any,
+    columns: tuple[str, ...],
+    bucket: str = "hour",
+    since: datetime | None = None,
+) -> list[dict[str, Any]]:
+    """Roll one owner's change-only counter samples up into ``bucket`` periods.
+
+    Each period carries the latest counts seen in it and ``deltas`` against the
+    previous period. Periods without a sample had no change and are filled
+    forward up to now, so the series has no gaps. With ``since``, the last
+    sample before it seeds the series, so counts that last changed earlier
+    still show (and the first delta is measured from them). At most
+    ``MAX_PERIODS`` periods are returned, the most recent ones.
+    """
+    step = BUCKETS[bucket]
+    earliest = truncate(datetime.utcnow(), bucket) - step * (MAX_PERIODS - 1)
+    if since is None or since < earliest:
+        since = earliest
+    owner = getattr(model, owner_column)
+    period = time_bucket(model.sampled_at, bucket)
+    # Samples are append-only, so the highest id in a period is its latest sample.
+    latest = select(func.max(model.id)).where(owner == owner_id, model.sampled_at >= since).group_by(period)
+    selected = [getattr(model, column) for column in columns]
+    query = select(model.sampled_at, *selected).where(model.id.in_(latest))
+    rows = {truncate(row[0], bucket): dict(zip(columns, row[1:])) for row in db.session.execute(query)}
+
+    previous: dict[str, Any] | None = None
+    baseline = db.session.execute(
+        select(*selected)
+        .where(owner == owner_id, model.sampled_at < since)
+        .order_by(model.sampled_at.desc(), model.id.desc())
+        .limit(1)
+    ).first()
+    if baseline is not None:
+        previous = dict(zip(columns, baseline))
+    if not rows and previous is None:
+        return []
+
+    series = []
+    moment = truncate(since, bucket)
+    end = max(truncate(datetime.utcnow(), bucket), *rows) if rows else truncate(datetime.utcnow(), bucket)
+    end = min(end, moment + step * (MAX_PERIODS - 1))
+    while moment <= end:
+        values = rows.get(moment) or dict(previous or {})
+        if values:
+            deltas = {
+                column: (values[column] or 0) - (previous[column] or 0) if previous else 0
+                for column in columns
+            }
+            series.append({"period": moment.isoformat(), **values, "deltas": deltas})
+            previous = values
+        moment = truncate(moment + step, bucket)
+    return series
+
+
+def downsample(model: Any, owner_column: str, older_than: datetime, bucket: str) -> int:
+    """Keep only the latest sample per owner and ``bucket`` before ``older_than``; returns rows deleted."""
+    period = time_bucket(model.sampled_at, bucket)
+    keep = (
+        select(func.max(model.id))
+        .where(model.sampled_at < older_than)
+        .group_by(getattr(model, owner_column), period)
+    )
+    result = db.session.execute(
+        delete(model)
+        .where(model.sampled_at < older_than, model.id.not_in(keep))
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount
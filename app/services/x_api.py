@@ -1,4 +1,4 @@
-import requests
+from app.services.http_client import x_http
 
 
 class XApiClient:
@@ -15,7 +15,7 @@ class XApiClient:
         headers = self._headers()
         if not headers:
             return {"error": "X_BEARER_TOKEN is not configured."}
-        response = requests.get(
+        response = x_http.get(
             f"{self.base_url}/users/me",
             headers=headers,
             timeout=10,
@@ -27,7 +27,7 @@ class XApiClient:
         }
 
     def get_me_with_token(self, access_token):
-        response = requests.get(
+        response = x_http.get(
             f"{self.base_url}/users/me",
             headers={"Authorization": f"Bearer {access_token}"},
             timeout=10,
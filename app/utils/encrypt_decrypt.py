@@ -1,6 +1,8 @@
 import base64
 import hashlib
 import os
+import threading
+import time
 from pathlib import Path
 from typing import Any, Mapping, Optional
 
@@ -8,10 +10,70 @@ from dotenv import dotenv_values
 from flask import current_app, has_app_context
 
 from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from sqlalchemy import event
 
 from app.extensions import db
 from app.models import AppVar
 
+_MISSING = object()
+_NOT_CACHED = object()
+
+
+class AppVarCache:
+    """Process-local cache of app_vars lookups and the ciphers derived from them.
+
+    Entries expire after ``X_APP_VAR_CACHE_TTL`` seconds so changes made by
+    other processes are picked up; writes through the ORM in this process
+    invalidate the affected key immediately.
+    """
+
+    def __init__(self) -> None:
+        self._values: dict[str, tuple[Any, float]] = {}
+        self._ciphers: dict[str, AESGCM] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            entry = self._values.get(key)
+        if entry is None or entry[1] <= time.monotonic():
+            return _NOT_CACHED
+        return entry[0]
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._values[key] = (value, time.monotonic() + ttl)
+
+    def cipher(self, secret: str) -> AESGCM:
+        with self._lock:
+            cipher = self._ciphers.get(secret)
+        if cipher is None:
+            cipher = AESGCM(_derive_key(secret))
+            with self._lock:
+                self._ciphers[secret] = cipher
+        return cipher
+
+    def invalidate(self, key: str | None = None) -> None:
+        with self._lock:
+            if key is None:
+                self._values.clear()
+                self._ciphers.clear()
+            else:
+                self._values.pop(key, None)
+                if key in ("X_TOKEN_ENCRYPTION_KEY", "SECRET_KEY"):
+                    self._ciphers.clear()
+
+
+app_var_cache = AppVarCache()
+
+
+@event.listens_for(AppVar, "after_insert")
+@event.listens_for(AppVar, "after_update")
+@event.listens_for(AppVar, "after_delete")
+def _invalidate_app_var(mapper, connection, target) -> None:
+    app_var_cache.invalidate(target.key)
+
 
 def load_env_vars_to_db() -> int:
     """Sync .env values into the app_vars table on app startup."""
@@ -38,18 +100,25 @@ def load_env_vars_to_db() -> int:
         db.session.delete(record)
 
     db.session.commit()
+    app_var_cache.invalidate()
     return len(values)
 
 
 def get_app_var(key: str, default: Optional[Any] = None) -> Optional[Any]:
     """Fetch a value from app_vars with safe fallbacks."""
     if has_app_context():
-        try:
-            record = AppVar.query.filter_by(key=key).first()
-            if record is not None:
-                return record.value
-        except Exception:
-            pass
+        value = app_var_cache.get(key)
+        if value is _NOT_CACHED:
+            try:
+                # Don't flush half-built rows (e.g. a token being encrypted) just to read config.
+                with db.session.no_autoflush:
+                    record = AppVar.query.filter_by(key=key).first()
+                value = record.value if record is not None else _MISSING
+                app_var_cache.set(key, value, float(current_app.config.get("X_APP_VAR_CACHE_TTL", 60)))
+            except Exception:
+                value = _MISSING
+        if value is not _MISSING:
+            return value
         return current_app.config.get(key, os.getenv(key, default))
 
     return os.getenv(key, default)
@@ -59,16 +128,15 @@ def _derive_key(secret: str) -> bytes:
     return hashlib.sha256(secret.encode("utf-8")).digest()
 
 
-def _get_key() -> bytes:
+def _get_cipher() -> AESGCM:
     raw = get_app_var("X_TOKEN_ENCRYPTION_KEY") or get_app_var("SECRET_KEY", "dev-secret")
-    return _derive_key(raw)
+    return app_var_cache.cipher(raw)
 
 
 def encrypt_value(value: Optional[str]) -> Optional[str]:
     if value is None:
         return None
-    key = _get_key()
-    aesgcm = AESGCM(key)
+    aesgcm = _get_cipher()
     nonce = os.urandom(12)
     ciphertext = aesgcm.encrypt(nonce, value.encode("utf-8"), None)
     payload = nonce + ciphertext
@@ -78,8 +146,7 @@ def encrypt_value(value: Optional[str]) -> Optional[str]:
 def decrypt_value(value: Optional[str]) -> Optional[str]:
     if value is None:
         return None
-    key = _get_key()
-    aesgcm = AESGCM(key)
+    aesgcm = _get_cipher()
     payload = base64.urlsafe_b64decode(value.encode("utf-8"))
     nonce = payload[:12]
     ciphertext = payload[12:]
@@ -0,0 +1,60 @@
+"""post search index
+
+Revision ID: 0b7305a6df07
+Revises: 2fa2da246a28
+Create Date: 2026-10-18 05:10:12.318204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0b7305a6df07'
+down_revision = '2fa2da246a28'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Not autogenerated: the index is an FTS5 table on SQLite and a tsvector table on PostgreSQL.
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        op.execute(
+            "CREATE VIRTUAL TABLE x_posts_fts USING fts5("
+            "text, username, entities, tokenize = 'unicode61 remove_diacritics 2')"
+        )
+        op.execute(
+            "INSERT INTO x_posts_fts (rowid, text, username, entities) "
+            "SELECT p.id, p.text, COALESCE(u.username, ''), COALESCE(("
+            "SELECT group_concat(e.name, ' ') FROM post_context_annotations a "
+            "JOIN annotation_entities e ON e.id = a.entity_id WHERE a.post_id = p.id), '') "
+            "FROM x_posts p LEFT JOIN x_users u ON u.id = p.author_id"
+        )
+    elif dialect == 'postgresql':
+        op.create_table('x_posts_fts',
+        sa.Column('post_id', sa.BigInteger(), nullable=False),
+        sa.Column('document', sa.dialects.postgresql.TSVECTOR(), nullable=False),
+        sa.ForeignKeyConstraint(['post_id'], ['x_posts.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('post_id')
+        )
+        op.create_index('ix_x_posts_fts_document', 'x_posts_fts', ['document'], unique=False, postgresql_using='gin')
+        op.execute(
+            "INSERT INTO x_posts_fts (post_id, document) "
+            "SELECT p.id, "
+            "setweight(to_tsvector('simple', p.text), 'A') || "
+            "setweight(to_tsvector('simple', COALESCE(u.username, '')), 'B') || "
+            "setweight(to_tsvector('simple', COALESCE(("
+            "SELECT string_agg(e.name, ' ') FROM post_context_annotations a "
+            "JOIN annotation_entities e ON e.id = a.entity_id WHERE a.post_id = p.id), '')), 'C') "
+            "FROM x_posts p LEFT JOIN x_users u ON u.id = p.author_id"
+        )
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        op.execute("DROP TABLE IF EXISTS x_posts_fts")
+    elif dialect == 'postgresql':
+        op.drop_index('ix_x_posts_fts_document', table_name='x_posts_fts', postgresql_using='gin')
+        op.drop_table('x_posts_fts')
@@ -0,0 +1,27 @@
+"""username lower index
+
+Revision ID: 738cd8f38a56
+Revises: cf4c6fbcc9b1
+Create Date: 2026-10-18 05:40:49.152572
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '738cd8f38a56'
+down_revision = 'cf4c6fbcc9b1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Autogenerate cannot compare expression indexes on SQLite, so this one is written by hand.
+    with op.batch_alter_table('x_users', schema=None) as batch_op:
+        batch_op.create_index('ix_x_users_username_lower', [sa.text('lower(username)')], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('x_users', schema=None) as batch_op:
+        batch_op.drop_index('ix_x_users_username_lower')
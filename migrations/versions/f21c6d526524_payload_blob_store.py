@@ -0,0 +1,149 @@
+"""payload blob store
+
+Revision ID: f21c6d526524
+Revises: 8fcd2a686db2
+Create Date: 2026-10-18 04:35:30.181472
+
+"""
+import hashlib
+import json
+import zlib
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f21c6d526524'
+down_revision = '8fcd2a686db2'
+branch_labels = None
+depends_on = None
+
+# (table, key column, old payload column, new hash column, payload kind)
+PAYLOAD_COLUMNS = [
+    ('api_request_logs', 'id', 'response_body', 'response_body_hash', 'text'),
+    ('x_posts', 'id', 'raw_post_data', 'raw_post_hash', 'json'),
+    ('x_users', 'id', 'raw_profile_data', 'raw_profile_hash', 'json'),
+    ('x_spaces', 'id', 'raw_space_data', 'raw_space_hash', 'json'),
+    ('x_space_snapshots', 'id', 'raw_space_data', 'raw_space_hash', 'json'),
+]
+BATCH_SIZE = 500
+
+
+def _encode(value, kind):
+    if kind == 'text':
+        return value.encode('utf-8')
+    return json.dumps(value, sort_keys=True, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def _decode(data, kind):
+    data = zlib.decompress(data)
+    if kind == 'text':
+        return data.decode('utf-8')
+    return json.loads(data)
+
+
+def _move_payloads_to_blobs(bind, blobs, table_name, key, old_column, new_column, kind):
+    value_type = sa.Text() if kind == 'text' else sa.JSON()
+    table = sa.table(table_name, sa.column(key), sa.column(old_column, value_type), sa.column(new_column))
+    seen = set(bind.execute(sa.select(blobs.c.hash)).scalars())
+    last_key = None
+    while True:
+        query = sa.select(table.c[key], table.c[old_column]).order_by(table.c[key]).limit(BATCH_SIZE)
+        if last_key is not None:
+            query = query.where(table.c[key] > last_key)
+        rows = bind.execute(query).all()
+        if not rows:
+            break
+        new_blobs = []
+        updates = []
+        for row_key, value in rows:
+            if value is None:
+                continue
+            data = _encode(value, kind)
+            digest = hashlib.sha256(data).hexdigest()
+            if digest not in seen:
+                seen.add(digest)
+                new_blobs.append(
+                    {
+                        'hash': digest,
+                        'codec': 'zlib',
+                        'size': len(data),
+                        'data': zlib.compress(data, 6),
+                        'created_at': datetime.utcnow(),
+                    }
+                )
+            updates.append({'row_key': row_key, 'digest': digest})
+        if new_blobs:
+            bind.execute(blobs.insert(), new_blobs)
+        if updates:
+            bind.execute(
+                table.update().where(table.c[key] == sa.bindparam('row_key')).values({new_column: sa.bindparam('digest')}),
+                updates,
+            )
+        last_key = rows[-1][0]
+
+
+def upgrade():
+    op.create_table('payload_blobs',
+    sa.Column('hash', sa.String(length=64), nullable=False),
+    sa.Column('codec', sa.String(length=10), nullable=False),
+    sa.Column('size', sa.Integer(), nullable=False),
+    sa.Column('data', sa.LargeBinary(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('hash')
+    )
+    for table_name, _, _, new_column, _ in PAYLOAD_COLUMNS:
+        with op.batch_alter_table(table_name, schema=None) as batch_op:
+            batch_op.add_column(sa.Column(new_column, sa.String(length=64), nullable=True))
+
+    bind = op.get_bind()
+    blobs = sa.table(
+        'payload_blobs',
+        sa.column('hash'),
+        sa.column('codec'),
+        sa.column('size'),
+        sa.column('data', sa.LargeBinary()),
+        sa.column('created_at'),
+    )
+    for spec in PAYLOAD_COLUMNS:
+        _move_payloads_to_blobs(bind, blobs, *spec)
+
+    for table_name, _, old_column, _, _ in PAYLOAD_COLUMNS:
+        with op.batch_alter_table(table_name, schema=None) as batch_op:
+            batch_op.drop_column(old_column)
+
+
+def downgrade():
+    for table_name, _, old_column, _, kind in PAYLOAD_COLUMNS:
+        column_type = sa.Text() if kind == 'text' else sa.JSON()
+        with op.batch_alter_table(table_name, schema=None) as batch_op:
+            batch_op.add_column(sa.Column(old_column, column_type, nullable=True))
+
+    bind = op.get_bind()
+    blobs = sa.table('payload_blobs', sa.column('hash'), sa.column('codec'), sa.column('data', sa.LargeBinary()))
+    for table_name, key, old_column, new_column, kind in PAYLOAD_COLUMNS:
+        column_type = sa.Text() if kind == 'text' else sa.JSON()
+        table = sa.table(table_name, sa.column(key), sa.column(old_column, column_type), sa.column(new_column))
+        rows = bind.execute(
+            sa.select(table.c[key], blobs.c.codec, blobs.c.data).select_from(
+                table.join(blobs, blobs.c.hash == table.c[new_column])
+            )
+        ).all()
+        updates = []
+        for row_key, codec, data in rows:
+            if codec != 'zlib':
+                raise RuntimeError('Only zlib payloads can be restored by this downgrade; re-encode zstd blobs first.')
+            updates.append({'row_key': row_key, 'value': _decode(data, kind)})
+        if updates:
+            bind.execute(
+                table.update().where(table.c[key] == sa.bindparam('row_key')).values({old_column: sa.bindparam('value')}),
+                updates,
+            )
+
+    for table_name, _, _, new_column, _ in PAYLOAD_COLUMNS:
+        with op.batch_alter_table(table_name, schema=None) as batch_op:
+            batch_op.drop_column(new_column)
+
+    op.drop_table('payload_blobs')